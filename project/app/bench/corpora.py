@@ -0,0 +1,94 @@
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+# Vocabulary for synthetic HR policies and meetings. Texts only need to look
+# like the real corpora to the chunker, embedder and BM25 (lengths, repeated
+# domain terms, codes and numbers); they do not need to make sense.
+_TOPICS = [
+    "annual leave", "sick leave", "parental leave", "remote work", "travel expenses",
+    "overtime", "performance reviews", "probation", "code of conduct", "data protection",
+    "equipment", "training budget", "relocation", "notice period", "public holidays",
+]
+_SUBJECTS = ["Employees", "Managers", "Contractors", "New hires", "Team leads", "Part-time staff"]
+_VERBS = ["may request", "must submit", "are entitled to", "should agree", "can carry over", "must record"]
+_OBJECTS = [
+    "{n} days per calendar year", "a written request {n} working days in advance",
+    "reimbursement within {n} days", "approval from their line manager",
+    "form HR-{code} in the HR portal", "up to {n} hours per month",
+]
+_CONDITIONS = [
+    "unless otherwise agreed in their contract", "subject to business needs",
+    "after completing the probation period", "in line with local regulations",
+    "where the regional office allows it", "provided the request is made in writing",
+]
+_PEOPLE = ["Alice", "Bob", "Chen", "Dana", "Elif", "Farid", "Grace", "Hiro"]
+_AGENDA = ["the Q3 roadmap", "the hiring plan", "the vendor contract", "the release checklist",
+           "budget approvals", "customer escalations", "the onboarding process", "the office move"]
+
+
+def _sentence(rng: random.Random, topic: str) -> str:
+    obj = rng.choice(_OBJECTS).format(n=rng.randint(1, 30), code=rng.randint(100, 999))
+    return f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {obj} for {topic}, {rng.choice(_CONDITIONS)}."
+
+
+def hr_document(rng: random.Random, doc_id: int, sections: int = 6) -> str:
+    """One policy document: a title and ``sections`` numbered sections"""
+    topic = rng.choice(_TOPICS)
+    parts = [f"{topic.title()} Policy (POL-{doc_id:05d})"]
+    for s in range(1, sections + 1):
+        body = " ".join(_sentence(rng, topic) for _ in range(rng.randint(3, 7)))
+        parts.append(f"Section {s}. {body}")
+    return "\n\n".join(parts)
+
+
+def write_hr_corpus(root: Path, n_docs: int, seed: int = 0) -> int:
+    """Write ``n_docs`` synthetic policy .txt files under ``root``; returns total chars"""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(n_docs):
+        text = hr_document(rng, i)
+        (root / f"policy-{i:05d}.txt").write_text(text, encoding="utf-8")
+        total += len(text)
+    return total
+
+
+def hr_questions(n: int, seed: int = 1) -> List[str]:
+    """Distinct HR questions, so answer caches only hit when asked to"""
+    rng = random.Random(seed)
+    templates = [
+        "How many days of {t} do {s} get?", "Who approves {t} for {s}?",
+        "What form do {s} need for {t}?", "Does the {t} policy apply to {s}?",
+        "How far in advance must {s} ask for {t}?",
+    ]
+    return [
+        f"{rng.choice(templates).format(t=rng.choice(_TOPICS), s=rng.choice(_SUBJECTS).lower())} (case {i})"
+        for i in range(n)
+    ]
+
+
+def meeting_transcript(rng: random.Random, chars: int) -> Tuple[str, str]:
+    """(title, transcript) of roughly ``chars`` characters of speaker turns"""
+    agenda = rng.sample(_AGENDA, 3)
+    title = f"Sync on {agenda[0]}"
+    turns: List[str] = []
+    size = 0
+    while size < chars:
+        item = rng.choice(agenda)
+        speaker, owner = rng.sample(_PEOPLE, 2)
+        turn = rng.choice([
+            f"{speaker}: On {item}, we agreed to move the deadline by {rng.randint(1, 4)} weeks.",
+            f"{speaker}: {owner} will follow up on {item} by Friday.",
+            f"{speaker}: I'm worried that {item} is blocked on {rng.choice(_AGENDA)}.",
+            f"{speaker}: Decision: {item} goes ahead with a budget of {rng.randint(5, 90)}k.",
+            f"{speaker}: Can we revisit {item} next week once {owner} has the numbers?",
+        ])
+        turns.append(turn)
+        size += len(turn) + 1
+    return title, "\n".join(turns)
+
+
+def meeting_transcripts(n: int, chars: int, seed: int = 2) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    return [meeting_transcript(rng, chars) for _ in range(n)]
@@ -0,0 +1,341 @@
+import asyncio
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from app.bench.corpora import hr_questions, meeting_transcripts, write_hr_corpus
+from app.bench.stub_llm import StubLLMServer, free_port
+
+# project/, where ``uvicorn app.main:app`` is importable
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+# (status, perf_counter of the first answer token or None) for request ``i``
+Send = Callable[[httpx.AsyncClient, int], Awaitable[Tuple[str, Optional[float]]]]
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99/mean in ms of durations given in seconds"""
+    if not len(samples):
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    ms = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """High-water RSS of ``pid`` (default: this process) from /proc; Linux only"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid is None:
+        try:
+            import resource
+        except ImportError:
+            return None
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return None
+
+
+# ---- index ------------------------------------------------------------------
+def bench_index(workdir: Path, n_docs: int, queries: List[str], k: int, seed: int = 0) -> Dict[str, Any]:
+    """Ingest ``n_docs`` synthetic policies into a fresh HR index under
+    ``workdir`` (the real ingestion path: parse, chunk, embed, add, save),
+    then time reloading it and ``search`` / ``lexical_search`` per query."""
+    from app.services.embeddings import embeddings
+    from app.services.ingestion import ingest_hr_policies
+    from app.vectorstores.faiss_store import SimpleFaissIndex
+
+    docs_dir, indices = workdir / "hr", workdir / "indices"
+    chars = write_hr_corpus(docs_dir, n_docs, seed)
+    index = SimpleFaissIndex(indices / "hr.index", indices / "hr.meta.json")
+    embeddings.load()  # model load is startup cost, not build cost
+
+    t0 = time.perf_counter()
+    report = ingest_hr_policies(full=True, root=docs_dir, index=index, manifest_path=indices / "hr.manifest.json")
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reloaded = SimpleFaissIndex(indices / "hr.index", indices / "hr.meta.json")
+    reloaded.load()
+    load_s = time.perf_counter() - t0
+
+    dense: List[float] = []
+    for vector in embeddings.embed(queries):
+        t0 = time.perf_counter()
+        reloaded.search(vector, k=k)
+        dense.append(time.perf_counter() - t0)
+    lexical: List[float] = []
+    for query in queries:
+        t0 = time.perf_counter()
+        reloaded.lexical_search(query, k=k)
+        lexical.append(time.perf_counter() - t0)
+
+    return {
+        "docs": n_docs,
+        "chars": chars,
+        "chunks": report["total_chunks"],
+        "build_s": round(build_s, 3),
+        "chunks_per_s": round(report["total_chunks"] / build_s, 1) if build_s else None,
+        "load_s": round(load_s, 4),
+        "search": percentiles(dense),
+        "lexical_search": percentiles(lexical),
+        "index_dir": str(indices),
+    }
+
+
+# ---- server -----------------------------------------------------------------
+@contextmanager
+def serve_app(port: int, env: Dict[str, str]) -> Iterator[subprocess.Popen]:
+    """``uvicorn app.main:app`` in a subprocess with ``env`` on top of ours"""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_DIR,
+        env={**os.environ, **env},
+    )
+    try:
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float) -> float:
+    """Seconds until ``/readyz`` answers 200"""
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app exited with code {proc.returncode} during startup")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return time.perf_counter() - t0
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"app not ready after {timeout:.0f}s")
+
+
+# ---- load -------------------------------------------------------------------
+async def run_load(base_url: str, send: Send, requests: int, concurrency: int, warmup: int = 0) -> Dict[str, Any]:
+    """Closed-loop load: ``concurrency`` workers issue ``requests`` calls in
+    total; request ``i`` in ``range(requests, requests + warmup)`` warms up
+    first and is not measured. Only 200s count towards latency and QPS."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        for i in range(requests, requests + warmup):
+            await send(client, i)
+
+        latencies: List[float] = []
+        first_tokens: List[float] = []
+        statuses: Counter = Counter()
+        pending = iter(range(requests))
+
+        async def worker() -> None:
+            for i in pending:
+                t0 = time.perf_counter()
+                try:
+                    status, first = await send(client, i)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                    continue
+                statuses[status] += 1
+                if status == "200":
+                    latencies.append(time.perf_counter() - t0)
+                    if first is not None:
+                        first_tokens.append(first - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    result: Dict[str, Any] = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "statuses": dict(statuses),
+        "wall_s": round(wall, 3),
+        "qps": round(len(latencies) / wall, 2) if wall else None,
+        "latency": percentiles(latencies),
+    }
+    if first_tokens:
+        result["first_token"] = percentiles(first_tokens)
+    return result
+
+
+def form_sender(path: str, payloads: Sequence[Dict[str, Any]]) -> Send:
+    async def send(client: httpx.AsyncClient, i: int) -> Tuple[str, Optional[float]]:
+        response = await client.post(path, data=payloads[i % len(payloads)])
+        return str(response.status_code), None
+    return send
+
+
+def sse_sender(path: str, payloads: Sequence[Dict[str, Any]]) -> Send:
+    """Reads the whole event stream; the first ``delta`` event is the first token"""
+    async def send(client: httpx.AsyncClient, i: int) -> Tuple[str, Optional[float]]:
+        first: Optional[float] = None
+        async with client.stream("POST", path, data=payloads[i % len(payloads)]) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return str(response.status_code), None
+            async for line in response.aiter_lines():
+                if line == "event: delta" and first is None:
+                    first = time.perf_counter()
+                elif line == "event: error":
+                    return "stream_error", None
+        return "200", first
+    return send
+
+
+# ---- suite ------------------------------------------------------------------
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                             capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmark(
+    workdir: Path,
+    sizes: Sequence[int],
+    serve_size: Optional[int],
+    meeting_chars: Sequence[int],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    top_k: int,
+    queries: int,
+    use_cache: bool,
+    llm: Dict[str, Any],
+    ready_timeout: float = 600.0,
+) -> Dict[str, Any]:
+    """Index benchmarks per corpus size, then end-to-end load on the app
+    serving the ``serve_size`` index against a local stub LLM."""
+    from app.config import settings
+
+    started = time.time()
+    questions = hr_questions(max(queries, requests + warmup))
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "started_at": started,
+        "python": platform.python_version(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {
+            "embedding_model": settings.embedding_model,
+            "embedding_backend": settings.embedding_backend,
+            "faiss_index_factory": settings.faiss_index_factory,
+            "retrieval_mode": settings.retrieval_mode,
+            "top_k": top_k,
+            "cache": use_cache,
+            "stub_llm": llm,
+        },
+        "index": [],
+        "endpoints": {},
+    }
+
+    index_dirs: Dict[int, str] = {}
+    for size in sizes:
+        row = bench_index(workdir / f"hr-{size}", size, questions[:queries], top_k)
+        index_dirs[size] = row.pop("index_dir")
+        results["index"].append(row)
+    results["bench_peak_rss_mb"] = peak_rss_mb()
+
+    if not serve_size:
+        return results
+    if serve_size not in index_dirs:
+        index_dirs[serve_size] = bench_index(workdir / f"hr-{serve_size}", serve_size, questions[:queries], top_k)["index_dir"]
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        "INDICES_PATH": index_dirs[serve_size],
+        "CACHE_PATH": str(workdir / "cache"),
+        "GEMINI_API_KEY": "bench",
+        "ANSWER_CACHE_ENABLED": str(use_cache).lower(),
+        "SEMANTIC_CACHE_ENABLED": str(use_cache).lower(),
+    }
+    hr_payloads = [{"query": q, "top_k": top_k} for q in questions]
+    endpoints: Dict[str, Tuple[Send, int]] = {
+        "hr_ask": (form_sender("/api/hr/ask", hr_payloads), requests),
+        "hr_ask_stream": (sse_sender("/api/hr/ask/stream", hr_payloads), requests),
+    }
+    for chars in meeting_chars:
+        # Long transcripts fan out into map/reduce calls; fewer of them keep runs short
+        n = requests if chars <= settings.summary_single_pass_chars else max(concurrency, requests // 4)
+        # Summaries are always cached by content: each endpoint gets its own transcripts
+        payloads = [
+            [{"meeting_content": text, "meeting_title": title}
+             for title, text in meeting_transcripts(n + warmup, chars, seed=chars * 2 + stream)]
+            for stream in (0, 1)
+        ]
+        endpoints[f"summarize_text@{chars}"] = (form_sender("/api/meetings/summarize/text", payloads[0]), n)
+        endpoints[f"summarize_text_stream@{chars}"] = (
+            sse_sender("/api/meetings/summarize/text/stream", payloads[1]), n
+        )
+
+    with StubLLMServer(**llm) as stub:
+        env["GEMINI_BASE_URL"] = stub.base_url
+        with serve_app(port, env) as proc:
+            results["server_ready_s"] = round(wait_ready(base_url, proc, ready_timeout), 3)
+            results["server_rss_after_start_mb"] = peak_rss_mb(proc.pid)
+            for name, (send, n) in endpoints.items():
+                calls = stub.calls
+                results["endpoints"][name] = {
+                    **asyncio.run(run_load(base_url, send, n, concurrency, warmup)),
+                    "llm_calls": stub.calls - calls,
+                }
+            results["server_peak_rss_mb"] = peak_rss_mb(proc.pid)
+    results["elapsed_s"] = round(time.time() - started, 1)
+    return results
+
+
+def compare_results(base: Dict[str, Any], head: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Numeric metrics present in both runs with their relative change"""
+    def flatten(node: Any, prefix: str = "") -> Dict[str, float]:
+        if isinstance(node, dict):
+            out: Dict[str, float] = {}
+            for key, value in node.items():
+                out.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+            return out
+        if isinstance(node, list):
+            # Index rows are keyed by corpus size
+            out = {}
+            for row in node:
+                if isinstance(row, dict) and "docs" in row:
+                    out.update(flatten(row, f"{prefix}[{row['docs']}]"))
+            return out
+        if isinstance(node, (int, float)) and not isinstance(node, bool):
+            return {prefix: float(node)}
+        return {}
+
+    a, b = flatten(base), flatten(head)
+    skip = ("started_at", "elapsed_s", "commit")
+    rows = []
+    for key in sorted(a.keys() & b.keys()):
+        if key.startswith(skip) or key.startswith("config.") or key.startswith("machine."):
+            continue
+        change = (b[key] - a[key]) / a[key] if a[key] else None
+        rows.append({"metric": key, "base": a[key], "head": b[key],
+                     "change": round(change, 4) if change is not None else None})
+    return rows
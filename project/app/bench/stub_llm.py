@@ -0,0 +1,97 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+_REPLY_WORDS = ("Per the policy excerpts, employees should follow the documented process "
+                "and confirm the details with their manager before the deadline.").split()
+
+
+def create_stub_app(first_token_ms: float = 300.0, tokens_per_s: float = 50.0, reply_tokens: int = 60) -> FastAPI:
+    """OpenAI-compatible ``/chat/completions`` that answers after a fixed delay.
+
+    ``first_token_ms`` models queueing plus prompt processing upstream, then
+    ``reply_tokens`` words follow at ``tokens_per_s`` (streamed as SSE deltas
+    when the request asks for ``stream``). ``app.state.calls`` counts requests.
+    """
+    app = FastAPI(title="One-Desk stub LLM")
+    app.state.calls = 0
+    gap = 1.0 / tokens_per_s if tokens_per_s > 0 else 0.0
+    words = [_REPLY_WORDS[i % len(_REPLY_WORDS)] for i in range(reply_tokens)]
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body: Dict[str, Any] = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(first_token_ms / 1000)
+        if body.get("stream"):
+            return StreamingResponse(_stream(body.get("model", "stub")), media_type="text/event-stream")
+        await asyncio.sleep(gap * len(words))
+        return {
+            "id": f"stub-{app.state.calls}",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                         "finish_reason": "stop"}],
+            "usage": {"completion_tokens": len(words)},
+        }
+
+    async def _stream(model: str) -> AsyncIterator[str]:
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(gap)
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": (" " if i else "") + word}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubLLMServer:
+    """Runs ``create_stub_app`` under uvicorn in a daemon thread.
+
+    Use as a context manager; ``base_url`` is what ``GEMINI_BASE_URL`` should
+    be set to for the app under test.
+    """
+
+    def __init__(self, port: Optional[int] = None, **options: Any) -> None:
+        import uvicorn
+
+        self.port = port or free_port()
+        self.app = create_stub_app(**options)
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False,
+        ))
+        self._thread = threading.Thread(target=self._server.run, name="stub-llm", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def calls(self) -> int:
+        return self.app.state.calls
+
+    def __enter__(self) -> "StubLLMServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("stub LLM server did not start")
+            time.sleep(0.02)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
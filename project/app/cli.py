@@ -0,0 +1,181 @@
+import json
+from pathlib import Path
+
+import click
+
+
+@click.group()
+def cli() -> None:
+    """One-Desk maintenance commands"""
+
+
+@cli.command("ingest-hr")
+@click.option("--full", is_flag=True, help="Re-embed every file instead of only new/changed ones.")
+def ingest_hr(full: bool) -> None:
+    """Sync the HR policies directory into the HR index"""
+    from app.services.ingestion import ingest_hr_policies
+
+    report = ingest_hr_policies(full=full)
+    click.echo(json.dumps(report, indent=2))
+
+
+
+def _named_index(name: str):
+    from app.vectorstores.faiss_store import HR_INDEX, MEET_INDEX
+
+    return {"hr": HR_INDEX, "meet": MEET_INDEX}[name]
+
+
+@cli.command("rebuild-index")
+@click.option("--index", "index_name", type=click.Choice(["hr", "meet"]), default="hr")
+@click.option("--factory", default=None, help="FAISS factory string (default: FAISS_INDEX_FACTORY).")
+def rebuild_index(index_name: str, factory: str) -> None:
+    """Re-create an index with another FAISS type, retraining on stored vectors"""
+    index = _named_index(index_name)
+    if not index.load():
+        raise click.ClickException(f"No '{index_name}' index found")
+    try:
+        index.rebuild_index(factory)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    index.save()
+    click.echo(json.dumps(index.describe(), indent=2))
+
+
+@cli.command("ann-report")
+@click.option("--index", "index_name", type=click.Choice(["hr", "meet"]), default=None,
+              help="Evaluate on vectors of an existing index.")
+@click.option("--synthetic", type=int, default=0, help="Evaluate on N synthetic vectors instead.")
+@click.option("--dim", type=int, default=384, help="Dimension of synthetic vectors.")
+@click.option("--factory", "factories", multiple=True, default=["IVF256,Flat", "HNSW32", "IVF256,PQ48", "SQ8"])
+@click.option("--nprobe", "nprobes", type=int, multiple=True, default=[1, 8, 32])
+@click.option("--ef-search", "ef_searches", type=int, multiple=True, default=[16, 64, 256])
+@click.option("--queries", type=int, default=200)
+@click.option("--k", type=int, default=10)
+def ann_report(index_name, synthetic, dim, factories, nprobes, ef_searches, queries, k) -> None:
+    """Recall-vs-latency report of ANN index types against the flat baseline"""
+    from app.vectorstores.ann_eval import evaluate_factories, make_queries, synthetic_vectors
+
+    if synthetic:
+        vectors = synthetic_vectors(synthetic, dim)
+    elif index_name:
+        index = _named_index(index_name)
+        if not index.load() or not index.count:
+            raise click.ClickException(f"No '{index_name}' index found")
+        vectors = index.live_rows()[0]
+    else:
+        raise click.UsageError("Pass --index or --synthetic")
+    rows = evaluate_factories(vectors, make_queries(vectors, queries), factories, k, nprobes, ef_searches)
+    click.echo(json.dumps({"vectors": int(vectors.shape[0]), "dim": int(vectors.shape[1]), "k": k, "results": rows}, indent=2))
+
+
+@cli.command("export-onnx")
+@click.option("--no-quantize", is_flag=True, help="Keep fp32 weights (skip dynamic int8 quantization).")
+def export_onnx(no_quantize: bool) -> None:
+    """Export EMBEDDING_MODEL to ONNX for EMBEDDING_BACKEND=onnx (needs torch)"""
+    from app.config import settings
+    from app.services.onnx_embeddings import export_onnx_model
+
+    path = export_onnx_model(settings.embedding_model, settings.onnx_model_dir, quantize=not no_quantize)
+    click.echo(str(path))
+
+
+@cli.command("embed-bench")
+@click.option("--texts", "n_texts", type=int, default=512, help="Number of texts to embed.")
+@click.option("--batch-size", type=int, default=32)
+def embed_bench(n_texts: int, batch_size: int) -> None:
+    """Cosine parity and throughput of the ONNX backend against the torch one,
+    on HR chunk texts (padded with synthetic sentences if there are too few)"""
+    from app.config import settings
+    from app.services.embeddings import get_embedding_model
+    from app.services.onnx_embeddings import compare_backends, load_onnx_embeddings
+
+    index = _named_index("hr")
+    texts = list(index.texts[:n_texts]) if index.load() else []
+    if len(texts) < n_texts:
+        texts += [f"Employees in region {i % 7} may carry over {i % 15} days of leave into year {2020 + i % 6}."
+                  for i in range(n_texts - len(texts))]
+    reference = get_embedding_model("torch")
+    candidate = load_onnx_embeddings(
+        settings.embedding_model, settings.onnx_model_dir, settings.onnx_quantize,
+        settings.onnx_intra_op_threads, batch_size,
+    )
+    report = compare_backends(reference.embed_documents, candidate.embed_documents, texts, batch_size)
+    click.echo(json.dumps({"model": settings.embedding_model, "quantized": settings.onnx_quantize, **report}, indent=2))
+
+
+def _int_list(value: str):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+@cli.command("bench")
+@click.option("--sizes", default="50,500", help="Comma-separated HR corpus sizes (documents) to index.")
+@click.option("--serve-size", type=int, default=None,
+              help="Corpus size served for the endpoint load test (default: largest; 0 skips it).")
+@click.option("--meeting-chars", default="6000,60000",
+              help="Comma-separated transcript lengths for the summarize endpoints.")
+@click.option("--requests", "n_requests", type=int, default=200, help="Requests per endpoint.")
+@click.option("--concurrency", type=int, default=8)
+@click.option("--warmup", type=int, default=5, help="Unmeasured requests per endpoint first.")
+@click.option("--top-k", type=int, default=5)
+@click.option("--queries", type=int, default=200, help="Queries for the index search timings.")
+@click.option("--cache/--no-cache", "use_cache", default=False,
+              help="Keep the answer and semantic caches on (off: measure the full pipeline).")
+@click.option("--llm-first-token-ms", type=float, default=300.0)
+@click.option("--llm-tokens-per-s", type=float, default=50.0)
+@click.option("--llm-reply-tokens", type=int, default=60)
+@click.option("--workdir", type=click.Path(file_okay=False, path_type=Path), default=None,
+              help="Where corpora and indices are written (default: a temporary directory).")
+@click.option("--out", type=click.Path(dir_okay=False, path_type=Path), default=Path("bench-results.json"))
+def bench(sizes, serve_size, meeting_chars, n_requests, concurrency, warmup, top_k, queries, use_cache,
+          llm_first_token_ms, llm_tokens_per_s, llm_reply_tokens, workdir, out) -> None:
+    """Offline benchmark: index build/search per corpus size, then end-to-end
+    latency and QPS of the HR and summarize endpoints against a stub LLM"""
+    import tempfile
+
+    from app.bench.runner import run_benchmark
+
+    corpus_sizes = _int_list(sizes)
+    if serve_size is None:
+        serve_size = max(corpus_sizes, default=0)
+    llm = {"first_token_ms": llm_first_token_ms, "tokens_per_s": llm_tokens_per_s, "reply_tokens": llm_reply_tokens}
+    with tempfile.TemporaryDirectory(prefix="onedesk-bench-") as tmp:
+        results = run_benchmark(
+            workdir or Path(tmp), corpus_sizes, serve_size, _int_list(meeting_chars),
+            n_requests, concurrency, warmup, top_k, queries, use_cache, llm,
+        )
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    click.echo(json.dumps(results, indent=2))
+
+
+@cli.command("bench-compare")
+@click.argument("base", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("head", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--threshold", type=float, default=0.1, help="Only show metrics that changed by more than this.")
+def bench_compare(base: Path, head: Path, threshold: float) -> None:
+    """Relative change of every metric between two ``bench`` result files"""
+    from app.bench.runner import compare_results
+
+    rows = compare_results(json.loads(base.read_text()), json.loads(head.read_text()))
+    for row in rows:
+        if row["change"] is None or abs(row["change"]) >= threshold:
+            change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+            click.echo(f"{row['metric']:<60} {row['base']:>12g} -> {row['head']:<12g} {change}")
+
+
+@cli.command("stub-llm")
+@click.option("--port", type=int, default=8900)
+@click.option("--first-token-ms", type=float, default=300.0)
+@click.option("--tokens-per-s", type=float, default=50.0)
+@click.option("--reply-tokens", type=int, default=60)
+def stub_llm(port: int, first_token_ms: float, tokens_per_s: float, reply_tokens: int) -> None:
+    """Serve the benchmark's OpenAI-compatible stub LLM (point GEMINI_BASE_URL at it)"""
+    import uvicorn
+
+    from app.bench.stub_llm import create_stub_app
+
+    uvicorn.run(create_stub_app(first_token_ms, tokens_per_s, reply_tokens), host="127.0.0.1", port=port)
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,6 +1,7 @@
+import warnings
 from pathlib import Path
-from typing import List
-from pydantic import Field
+from typing import List, Optional
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,6 +10,10 @@ class Settings(BaseSettings):
     host: str = Field(default="127.0.0.1")
     port: int = Field(default=8000)
     debug: bool = Field(default=False)
+    # Add a per-stage ``timings`` breakdown (ms) to query and summary responses
+    debug_timings: bool = Field(default=False)
+    # Serve Prometheus metrics at /metrics
+    metrics_enabled: bool = Field(default=True)
 
     # DeepSeek (do NOT hardcode real keys here; use .env)
     gemini_api_key: str = Field(default="")
@@ -17,32 +22,155 @@ class Settings(BaseSettings):
 
     # Embeddings
     embedding_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
+    # "torch" (sentence-transformers) or "onnx": an int8-quantized export of
+    # embedding_model under onnxruntime, no torch needed at serve time
+    embedding_backend: str = Field(default="torch")
+    onnx_models_path: str = Field(default="./data/models")
+    onnx_quantize: bool = Field(default=True)
+    onnx_intra_op_threads: int = Field(default=0)  # 0 = onnxruntime default (one per core)
+    onnx_batch_size: int = Field(default=32)
+
+    # Micro-batching of concurrent query embeddings
+    embed_batch_window_ms: float = Field(default=5.0)
+    embed_max_batch_size: int = Field(default=32)
 
     # Storage paths
     hr_policies_path: str = Field(default="./data/HR Polices")
     indices_path: str = Field(default="./data/indices")
-    # (Cache removed) retain path var only if future use needed; removing
-    # cache_path field to simplify configuration
+    cache_path: str = Field(default="./data/cache")
 
     # FAISS filenames
     faiss_index_name: str = Field(default="hr_faiss.index")
     faiss_metadata_name: str = Field(default="hr_meta.json")
 
+    # FAISS index type as a faiss.index_factory string (inner-product metric),
+    # e.g. "Flat", "HNSW32", "IVF1024,Flat", "IVF1024,PQ32", "SQ8", "SQfp16".
+    # Trainable types fall back to Flat until there are enough vectors. Types
+    # that cannot take an ID selector (bare PQ, fast-scan, refine) are rejected.
+    faiss_index_factory: str = Field(default="Flat")
+    faiss_train_sample: int = Field(default=50000)
+    faiss_nprobe: int = Field(default=16)
+    faiss_ef_search: int = Field(default=64)
+
+    # Multi-worker serving (uvicorn --workers N): open FAISS indices and BM25
+    # postings memory-mapped read-only, so workers share one copy of each
+    # published snapshot in the OS page cache instead of one per process
+    index_mmap: bool = Field(default=False)
+    # Seconds between checks for snapshots published by other processes
+    # (ingestion CLI, another worker); 0 = only when a request searches
+    index_refresh_seconds: float = Field(default=5.0)
+    # Seconds before a failed warm-up step (index or model load) is retried;
+    # doubles on each further failure up to a minute, 0 = never retry
+    warmup_retry_seconds: float = Field(default=5.0)
+
+    # Meeting index: append-only segments, merged this many at a time once a
+    # size class (floor(log_T(chunks))) holds this many
+    segment_compact_threshold: int = Field(default=8)
+
+    # Deleted chunks are tombstoned; save() physically drops them once they
+    # make up this fraction of an index
+    tombstone_compact_ratio: float = Field(default=0.2)
+
+    # Filtered searches matching at most this many chunks are scored exactly
+    # instead of going through the ANN index
+    filter_exact_max: int = Field(default=4096)
+
+    # Retrieval: "dense" (FAISS), "lexical" (BM25) or "hybrid" (both, merged
+    # with reciprocal-rank fusion over hybrid_candidates hits from each)
+    retrieval_mode: str = Field(default="hybrid")
+    hybrid_candidates: int = Field(default=20)
+    rrf_k: int = Field(default=60)
+    bm25_k1: float = Field(default=1.2)
+    bm25_b: float = Field(default=0.75)
+
+    # /api/hr/ask/batch: questions per request and concurrent LLM calls
+    batch_max_questions: int = Field(default=64)
+    batch_llm_concurrency: int = Field(default=8)
+
+    # HR answer cache, keyed by normalized query, top_k, model and HR index
+    # generation. "disk" keeps answers across restarts under cache_path.
+    answer_cache_enabled: bool = Field(default=True)
+    answer_cache_backend: str = Field(default="memory")
+    answer_cache_size: int = Field(default=1024)
+    answer_cache_ttl_seconds: float = Field(default=24 * 3600)
+
+    # Semantic cache: reuse the answer of a past query at least this
+    # cosine-similar that was answered from the same retrieved chunks
+    semantic_cache_enabled: bool = Field(default=True)
+    semantic_cache_threshold: float = Field(default=0.92)
+    semantic_cache_size: int = Field(default=2048)
+
+    # Meeting archive: finished background ingestion jobs remembered for status
+    meeting_jobs_kept: int = Field(default=1000)
+
     # Chunking
     chunk_size: int = Field(default=1000)
     chunk_overlap: int = Field(default=200)
 
-    # Cache removed (ttl/enable flags deleted)
+    # Meeting summarization: transcripts longer than summary_single_pass_chars
+    # are summarized map-reduce style; completions are cached by prompt hash
+    summary_single_pass_chars: int = Field(default=24000)
+    summary_chunk_size: int = Field(default=8000)
+    summary_chunk_overlap: int = Field(default=400)
+    summary_map_concurrency: int = Field(default=4)
+    summary_cache_size: int = Field(default=4096)
+    summary_cache_ttl_seconds: float = Field(default=7 * 24 * 3600)
 
     # Retrieval / RAG defaults
     top_k_retrieval: int = Field(default=5)
     include_sources: bool = Field(default=True)
-    max_context_length: int = Field(default=20000)
+    # Prompt context budget in tokens of context_tokenizer (tiktoken encoding;
+    # estimated from characters when tiktoken is not installed)
+    max_context_tokens: int = Field(default=4000)
+    context_tokenizer: str = Field(default="cl100k_base")
+    # Deprecated: the old budget in characters, converted to max_context_tokens
+    # (about 4 characters per token) when that is not set itself
+    max_context_length: Optional[int] = Field(default=None)
 
     # LLM settings
     llm_temperature: float = Field(default=0.2)
     max_tokens: int = Field(default=600)
 
+    # LLM HTTP client: one pooled keep-alive client per process
+    llm_http2: bool = Field(default=True)
+    llm_connect_timeout: float = Field(default=5.0)
+    llm_read_timeout: float = Field(default=30.0)
+    llm_write_timeout: float = Field(default=10.0)
+    llm_pool_timeout: float = Field(default=10.0)
+    llm_max_connections: int = Field(default=32)
+    llm_max_keepalive_connections: int = Field(default=16)
+    llm_keepalive_expiry: float = Field(default=60.0)
+    llm_max_retries: int = Field(default=3)
+    llm_retry_base_delay: float = Field(default=0.5)
+    llm_retry_max_delay: float = Field(default=8.0)
+    llm_max_inflight: int = Field(default=16)
+
+    # Executors: CPU-bound stages run off the event loop. Embedding and FAISS
+    # release the GIL, so threads are enough; PDF parsing gets processes.
+    embed_workers: int = Field(default=2)
+    embed_max_concurrency: int = Field(default=4)
+    search_workers: int = Field(default=4)
+    search_max_concurrency: int = Field(default=8)
+    pdf_workers: int = Field(default=2)
+    pdf_max_concurrency: int = Field(default=2)
+    # PDFs longer than this many pages are parsed in parallel page ranges
+    pdf_pages_per_task: int = Field(default=32)
+    executor_queue_size: int = Field(default=64)
+
+    # Admission control for LLM-backed requests (answer/summary cache misses):
+    # beyond max_active_requests, up to request_queue_size wait at most
+    # request_queue_timeout seconds; the rest get 429 immediately
+    max_active_requests: int = Field(default=16)
+    request_queue_size: int = Field(default=64)
+    request_queue_timeout: float = Field(default=10.0)
+
+    # HR policy ingestion (python -m app.cli ingest-hr / POST /api/admin/ingest/hr)
+    ingest_workers: int = Field(default=4)
+    ingest_embed_batch_size: int = Field(default=256)
+
+    # Admin endpoints: required X-Admin-Token value (empty = admin API disabled, 403)
+    admin_token: str = Field(default="")
+
     # Uploads
     allowed_file_types: List[str] = Field(default=[".pdf", ".txt", ".docx"])
     max_file_size_mb: int = Field(default=10)
@@ -54,6 +182,19 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
+    @model_validator(mode="after")
+    def _convert_max_context_length(self) -> "Settings":
+        if self.max_context_length is None:
+            return self
+        if "max_context_tokens" in self.model_fields_set:
+            warnings.warn("MAX_CONTEXT_LENGTH is deprecated and ignored because MAX_CONTEXT_TOKENS is set",
+                          FutureWarning)
+        else:
+            self.max_context_tokens = max(1, -(-self.max_context_length // 4))
+            warnings.warn(f"MAX_CONTEXT_LENGTH (characters) is deprecated; using MAX_CONTEXT_TOKENS="
+                          f"{self.max_context_tokens}. Set MAX_CONTEXT_TOKENS instead.", FutureWarning)
+        return self
+
     @property
     def hr_policies_dir(self) -> Path:
         return Path(self.hr_policies_path)
@@ -61,7 +202,14 @@ class Settings(BaseSettings):
     @property
     def indices_dir(self) -> Path:
         return Path(self.indices_path)
-    # cache_dir removed
+
+    @property
+    def cache_dir(self) -> Path:
+        return Path(self.cache_path)
+
+    @property
+    def onnx_model_dir(self) -> Path:
+        return Path(self.onnx_models_path) / self.embedding_model.replace("/", "__")
 
     @property
     def faiss_index_path(self) -> str:
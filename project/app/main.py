@@ -1,20 +1,150 @@
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 
 from app.config import settings
-from app.routers import hr, meetings
+from app.routers import admin, hr, meetings
+from app.services.admission import REQUEST_GATE, AdmissionRejected
+from app.services.embeddings import embeddings
+from app.services.executors import STAGES, StageOverloaded, shutdown_executors
+from app.services.llm import shutdown_llm_client, startup_llm_client
+from app.services.metrics import COLLECTOR, REQUEST_SECONDS, REQUESTS_IN_FLIGHT
+from app.services.rag import rag_service
+from app.services.summary import summary_service
+from app.services.tokens import load_tokenizer
+from app.services.warmup import Readiness, warm_up
 from app.vectorstores.faiss_store import HR_INDEX, MEET_INDEX
 
+IMPORT_MS = round((time.perf_counter() - _import_started) * 1000, 1)
+
+logger = logging.getLogger(__name__)
+
+readiness = Readiness()
+readiness.register("hr_index")
+readiness.register("meet_index")
+readiness.register("embedding_model")
+readiness.register("tokenizer", required=False)
+
 
-app = FastAPI(title="One-Desk Backend API", version="1.0.0")
+async def follow_snapshots(interval: float) -> None:
+    """Swap in index snapshots published by other processes, so idle workers
+    stay current and drop superseded (mapped) files"""
+    while True:
+        await asyncio.sleep(interval)
+        for index in (HR_INDEX, MEET_INDEX):
+            try:
+                await asyncio.to_thread(index.refresh)
+            except Exception:
+                logger.exception("refreshing %s failed", index.name)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    t0 = time.perf_counter()
+    settings.ensure_directories()
+    await startup_llm_client()
+    logger.info(
+        "startup: imports %.0f ms, lifespan %.0f ms; loading indices and model in the background",
+        IMPORT_MS, (time.perf_counter() - t0) * 1000,
+    )
+    # Serve (and answer /healthz) right away; /readyz turns true once warm
+    warm = asyncio.create_task(warm_up(readiness, [
+        ("hr_index", HR_INDEX.load),
+        ("meet_index", MEET_INDEX.load),
+        ("embedding_model", embeddings.load),
+        ("tokenizer", load_tokenizer),
+    ], retry_seconds=settings.warmup_retry_seconds))
+    background = [warm]
+    if settings.index_refresh_seconds > 0:
+        background.append(asyncio.create_task(follow_snapshots(settings.index_refresh_seconds)))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        await shutdown_llm_client()
+        shutdown_executors()
+
+
+app = FastAPI(title="One-Desk Backend API", version="1.0.0", lifespan=lifespan)
 
 app.include_router(hr.router)
 app.include_router(meetings.router)
+app.include_router(admin.router)
 
 
-@app.on_event("startup")
-async def _startup():
-    settings.ensure_directories()
-    HR_INDEX.load()
-    MEET_INDEX.load()
+# Load shedding surfaces as exceptions from any depth (admission gate,
+# executor stage queues); routes let them through and they are answered here
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse({"detail": str(exc)}, status_code=429, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(StageOverloaded)
+async def stage_overloaded(request: Request, exc: StageOverloaded):
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+def _cache_stats():
+    caches = {
+        "answers": rag_service.cache,
+        "semantic": rag_service.semantic_cache,
+        "summary": summary_service.cache,
+    }
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+
+# Exported at scrape time from the objects' own stats()
+COLLECTOR.add("cache", _cache_stats)
+COLLECTOR.add("stage", lambda: {name: stage.stats() for name, stage in STAGES.items()})
+COLLECTOR.add("admission", lambda: {REQUEST_GATE.name: REQUEST_GATE.stats()})
+COLLECTOR.add("coalescing", lambda: {"hr": rag_service.flights.stats(), "summary": summary_service.flights.stats()})
+COLLECTOR.add("index", lambda: {"hr": HR_INDEX.describe(), "meet": MEET_INDEX.describe()})
+
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Latency histogram per route template (not raw path) and in-flight gauge"""
+    if request.url.path == "/metrics":
+        return await call_next(request)
+    t0 = time.perf_counter()
+    status = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        REQUEST_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status)
+        ).observe(time.perf_counter() - t0)
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/healthz", tags=["Health"])
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
 
 
+@app.get("/readyz", tags=["Health"])
+async def readyz():
+    """Readiness: indices and embedding model loaded (503 until then)"""
+    report = readiness.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -1,10 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
 
 # Request Models
 class HRQueryRequest(BaseModel):
     query: str = Field(..., description="The HR policy question to answer")
     top_k: Optional[int] = Field(None, description="Number of relevant contexts to retrieve")
+    filters: Optional[Dict[str, Any]] = Field(
+        None, description='Only search chunks whose metadata matches, e.g. {"source": "leave.pdf"}'
+    )
+
+class HRBatchRequest(BaseModel):
+    queries: List[str] = Field(..., description="HR policy questions to answer")
+    top_k: Optional[int] = Field(None, description="Number of relevant contexts to retrieve per question")
+    filters: Optional[Dict[str, Any]] = Field(None, description="Metadata filter applied to every question")
 
 class SummarizeTextRequest(BaseModel):
     meeting_content: str = Field(..., description="The meeting content to summarize")
@@ -22,6 +30,28 @@ class HRQueryResponse(BaseModel):
     sources: List[SourceInfo] = Field(..., description="Source information")
     cached: bool = Field(..., description="Whether response was cached")
     latency_ms: int = Field(..., description="Response latency in milliseconds")
+    timings: Optional[Dict[str, float]] = Field(None, description="Per-stage timings in ms (debug_timings only)")
+
+class HRBatchItem(BaseModel):
+    query: str = Field(..., description="The question")
+    answer: Optional[str] = Field(None, description="Generated answer (None if synthesis failed)")
+    contexts: List[str] = Field(..., description="Retrieved context chunks")
+    sources: List[SourceInfo] = Field(..., description="Source information")
+    cached: bool = Field(..., description="Whether response was cached")
+    error: Optional[str] = Field(None, description="Why this item failed, if it did")
+
+class HRBatchResponse(BaseModel):
+    results: List[HRBatchItem] = Field(..., description="One result per question, in request order")
+    failed: int = Field(..., description="Number of items with an error")
+    latency_ms: int = Field(..., description="Response latency in milliseconds")
+
+class MeetingIngestJob(BaseModel):
+    job_id: str = Field(..., description="Ingestion job id (GET /api/meetings/jobs/{job_id})")
+    meeting_id: str = Field(..., description="Content hash identifying the stored meeting")
+    meeting_title: str = Field(..., description="Meeting title")
+    status: str = Field(..., description="queued, running, done or failed")
+    chunks_stored: Optional[int] = Field(None, description="Number of chunks stored, once done")
+    error: Optional[str] = Field(None, description="Why ingestion failed, if it did")
 
 class SummaryResponse(BaseModel):
     summary: str = Field(..., description="Generated meeting summary")
@@ -30,3 +60,18 @@ class SummaryResponse(BaseModel):
     cached: bool = Field(..., description="Whether response was cached")
     latency_ms: int = Field(..., description="Response latency in milliseconds")
     chunks_stored: Optional[int] = Field(None, description="Number of chunks stored")
+    ingest_job: Optional[MeetingIngestJob] = Field(None, description="Background indexing job, if store_for_search")
+    timings: Optional[Dict[str, float]] = Field(None, description="Per-stage timings in ms (debug_timings only)")
+
+class MeetingHit(BaseModel):
+    text: str = Field(..., description="Matching meeting excerpt")
+    meeting_title: str = Field(..., description="Meeting the excerpt comes from")
+    meeting_id: Optional[str] = Field(None, description="Stored meeting id")
+    chunk: int = Field(..., description="Chunk number within the meeting")
+    score: float = Field(..., description="Relevance score")
+
+class MeetingSearchResponse(BaseModel):
+    query: str = Field(..., description="The search query")
+    answer: Optional[str] = Field(None, description="Generated answer, if requested")
+    results: List[MeetingHit] = Field(..., description="Matching excerpts, best first")
+    latency_ms: int = Field(..., description="Response latency in milliseconds")
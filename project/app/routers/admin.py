@@ -0,0 +1,59 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Form, Header, HTTPException
+
+from app.config import settings
+from app.services.admission import REQUEST_GATE
+from app.services.ingestion import IngestionInProgress, ingest_hr_policies
+from app.services.rag import rag_service
+from app.services.summary import summary_service
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+
+def _check_token(token: Optional[str]) -> None:
+    # Fail closed: without a configured token the admin API is disabled
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API disabled: ADMIN_TOKEN is not set")
+    if token is None or not hmac.compare_digest(token.encode("utf-8"), settings.admin_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.post("/ingest/hr")
+async def ingest_hr(
+    full: bool = Form(False),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Incrementally re-index the HR policies directory"""
+    _check_token(x_admin_token)
+    
+    try:
+        # Runs in a worker thread; parsing fans out to a process pool
+        return await asyncio.to_thread(ingest_hr_policies, full)
+    
+    except IngestionInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
+
+
+@router.get("/cache")
+async def cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """Hit/miss counters of the HR answer caches"""
+    _check_token(x_admin_token)
+    return {
+        "answers": rag_service.cache.stats() if rag_service.cache else None,
+        "semantic": rag_service.semantic_cache.stats() if rag_service.semantic_cache else None,
+    }
+
+
+@router.get("/load")
+async def load_stats(x_admin_token: Optional[str] = Header(None)):
+    """Admission queue and request-coalescing counters"""
+    _check_token(x_admin_token)
+    return {
+        "admission": REQUEST_GATE.stats(),
+        "coalescing": {"hr": rag_service.flights.stats(), "summary": summary_service.flights.stats()},
+    }
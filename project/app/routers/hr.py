@@ -1,13 +1,38 @@
+import json
+from typing import Any, Dict, Optional
+
 from fastapi import APIRouter, HTTPException, Form
-from app.models import HRQueryRequest, HRQueryResponse
+from app.config import settings
+from app.models import HRBatchRequest, HRBatchResponse, HRQueryRequest, HRQueryResponse
 from app.services.rag import rag_service
+from app.services.admission import REQUEST_GATE, AdmissionRejected
+from app.services.executors import StageOverloaded
+from app.services.streaming import sse_response
 
 router = APIRouter(prefix="/api/hr", tags=["HR Policies"])
 
+
+def _parse_filters(filters: Optional[str], source: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Form fields -> metadata filter: ``filters`` is a JSON object, ``source`` a shortcut"""
+    parsed: Dict[str, Any] = {}
+    if filters:
+        try:
+            parsed = json.loads(filters)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="filters must be a JSON object")
+        if not isinstance(parsed, dict):
+            raise HTTPException(status_code=400, detail="filters must be a JSON object")
+    if source:
+        parsed["source"] = source
+    return parsed or None
+
+
 @router.post("/ask", response_model=HRQueryResponse)
 async def ask_hr_question(
     query: str = Form(...),
-    top_k: int = Form(5)
+    top_k: int = Form(5),
+    filters: Optional[str] = Form(None),
+    source: Optional[str] = Form(None)
 ):
     """Ask a question about HR policies using RAG"""
     
@@ -18,10 +43,60 @@ async def ask_hr_question(
     if top_k < 1 or top_k > 20:
         raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
     
+    meta_filters = _parse_filters(filters, source)
+    
     try:
         # Use RAG service to generate answer
-        response = await rag_service.answer_question(query.strip(), top_k)
+        response = await rag_service.answer_question(query.strip(), top_k, meta_filters)
         return HRQueryResponse(**response)
     
+    except (AdmissionRejected, StageOverloaded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+@router.post("/ask/batch", response_model=HRBatchResponse)
+async def ask_hr_questions_batch(request: HRBatchRequest):
+    """Answer many HR questions in one call (evaluation runs, FAQ pre-warming)"""
+    
+    queries = [query.strip() for query in request.queries]
+    if not queries:
+        raise HTTPException(status_code=400, detail="queries cannot be empty")
+    
+    if len(queries) > settings.batch_max_questions:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_questions} questions per batch")
+    
+    if not all(queries):
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    top_k = request.top_k or settings.top_k_retrieval
+    if top_k < 1 or top_k > 20:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
+    
+    try:
+        response = await rag_service.answer_batch(queries, top_k, request.filters)
+        return HRBatchResponse(**response)
+    
+    except (AdmissionRejected, StageOverloaded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+@router.post("/ask/stream")
+async def ask_hr_question_stream(
+    query: str = Form(...),
+    top_k: int = Form(5),
+    filters: Optional[str] = Form(None),
+    source: Optional[str] = Form(None)
+):
+    """Stream an HR answer as Server-Sent Events (sources, delta..., done)"""
+    
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    if top_k < 1 or top_k > 20:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
+    
+    meta_filters = _parse_filters(filters, source)
+    
+    return sse_response(rag_service.stream_answer(query.strip(), top_k, meta_filters), gate=REQUEST_GATE)
@@ -1,16 +1,31 @@
-from fastapi import APIRouter, HTTPException, Form, UploadFile, File
-from typing import Optional
-import fitz  # PyMuPDF
-import io
-from app.models import SummaryResponse
-from app.services.summary import summary_service
-from app.services.chunking import chunk_text
-from app.services.embeddings import embeddings
-from app.vectorstores.faiss_store import MEET_INDEX
-from app.config import settings
+import time
+from fastapi import APIRouter, HTTPException, Form, Request
+from typing import Any, Dict, Optional, Tuple
+from app.models import MeetingIngestJob, MeetingSearchResponse, SummaryResponse
+from app.services.summary import SummaryFailed, summary_service
+from app.services.admission import REQUEST_GATE, AdmissionRejected
+from app.services.executors import StageOverloaded
+from app.services.meeting_archive import meeting_archive
+from app.services.uploads import InvalidUpload, UploadTooLarge, read_pdf_text, receive_upload_form
+from app.services.streaming import sse_response
 
 router = APIRouter(prefix="/api/meetings", tags=["Meeting Summarization"])
 
+_TRUE_VALUES = {"1", "true", "t", "on", "yes", "y"}
+_FALSE_VALUES = {"", "0", "false", "f", "off", "no", "n"}
+
+def _pdf_form_schema(store_for_search: bool) -> Dict[str, Any]:
+    """OpenAPI body of the PDF routes, which parse their multipart form themselves"""
+    properties: Dict[str, Any] = {
+        "pdf_file": {"type": "string", "format": "binary"},
+        "meeting_title": {"type": "string"},
+    }
+    if store_for_search:
+        properties["store_for_search"] = {"type": "boolean", "default": False}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {
+        "schema": {"type": "object", "required": ["pdf_file"], "properties": properties},
+    }}}}
+
 @router.post("/summarize/text", response_model=SummaryResponse)
 async def summarize_text_meeting(
     meeting_content: str = Form(...),
@@ -28,31 +43,40 @@ async def summarize_text_meeting(
             meeting_content.strip(), 
             meeting_title
         )
+        
+        # Indexing runs in the background, only for meetings that were summarized
+        job = meeting_archive.submit(meeting_content.strip(), meeting_title) if store_for_search else None
        
-        return SummaryResponse(**result)
+        return SummaryResponse(**result, **_ingest_fields(job))
     
+    except (AdmissionRejected, StageOverloaded):
+        raise
+    except SummaryFailed as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Summarization error: {str(e)}")
 
-@router.post("/summarize/pdf", response_model=SummaryResponse)
-async def summarize_pdf_meeting(
-    pdf_file: UploadFile = File(...),
-    meeting_title: Optional[str] = Form(None),
-    store_for_search: bool = Form(False)
+@router.post("/summarize/text/stream")
+async def summarize_text_meeting_stream(
+    meeting_content: str = Form(...),
+    meeting_title: str = Form("Untitled Meeting")
 ):
-    """Upload PDF, extract text, summarize using LLM and optionally store for search"""
+    """Stream a meeting summary as Server-Sent Events (start, delta..., done)"""
     
-    # Validate file
-    if not pdf_file.filename or not pdf_file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if not meeting_content.strip():
+        raise HTTPException(status_code=400, detail="Meeting content cannot be empty")
     
-    # Extract title from filename if notd
-    if not meeting_title:
-        meeting_title = pdf_file.filename.replace('.pdf', '').replace('_', ' ').title()
+    return sse_response(summary_service.stream_summary(meeting_content.strip(), meeting_title), gate=REQUEST_GATE)
+
+@router.post("/summarize/pdf", response_model=SummaryResponse, openapi_extra=_pdf_form_schema(store_for_search=True))
+async def summarize_pdf_meeting(request: Request):
+    """Upload PDF (form fields ``pdf_file``, ``meeting_title``, ``store_for_search``), extract
+    text, summarize using LLM and optionally store for search"""
     
     try:
         # Extract text from PDF
-        meeting_content = await _extract_pdf_text(pdf_file)
+        meeting_content, meeting_title, fields = await _receive_pdf(request)
+        store_for_search = _form_flag(fields.get("store_for_search"))
         
         if not meeting_content.strip():
             raise HTTPException(status_code=400, detail="No text content found in PDF")
@@ -60,51 +84,127 @@ async def summarize_pdf_meeting(
         # Generate LLM-powered summary
         result = await summary_service.summarize_text(meeting_content, meeting_title)
         
-        return SummaryResponse(**result)
+        # Indexing runs in the background, only for meetings that were summarized
+        job = meeting_archive.submit(meeting_content, meeting_title) if store_for_search else None
+        
+        return SummaryResponse(**result, **_ingest_fields(job))
     
+    except (HTTPException, AdmissionRejected, StageOverloaded):
+        raise
+    except SummaryFailed as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF processing error: {str(e)}")
 
-# Helper functions
-async def _extract_pdf_text(file: UploadFile) -> str:
-    """Extract text from uploaded PDF file"""
+@router.post("/summarize/pdf/stream", openapi_extra=_pdf_form_schema(store_for_search=False))
+async def summarize_pdf_meeting_stream(request: Request):
+    """Upload PDF (form fields ``pdf_file``, ``meeting_title``), extract text, then stream
+    its summary as Server-Sent Events"""
+    
+    # Extraction happens before the stream opens so failures keep their status code
     try:
-        pdf_bytes = await file.read()
-        with fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf") as doc:
-            text_content = ""
-            for page in doc:
-                text_content += page.get_text("text") + "\n"
-        return text_content.strip()
+        meeting_content, meeting_title, _ = await _receive_pdf(request)
+    except (HTTPException, StageOverloaded):
+        raise
     except Exception as e:
-        raise Exception(f"Failed to extract PDF text: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"PDF processing error: {str(e)}")
+    
+    if not meeting_content.strip():
+        raise HTTPException(status_code=400, detail="No text content found in PDF")
+    
+    return sse_response(summary_service.stream_summary(meeting_content, meeting_title), gate=REQUEST_GATE)
 
-    """Store meeting chunks in vector database for future search"""
+@router.post("/search", response_model=MeetingSearchResponse)
+async def search_meetings(
+    query: str = Form(...),
+    top_k: int = Form(5),
+    meeting_title: Optional[str] = Form(None),
+    answer: bool = Form(False)
+):
+    """Search stored meetings; with ``answer`` also answer the query from the matches"""
+    
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    if top_k < 1 or top_k > 20:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
+    
+    start = time.perf_counter()
+    filters = {"source": meeting_title} if meeting_title else None
     try:
-        chunks = chunk_text(content, settings.chunk_size, settings.chunk_overlap)
-        
-        if not chunks:
-            return 0
-        
-        # Generate embeddings
-        chunk_embeddings = embeddings.embed(chunks)
-        
-        # Create metadata
-        metas = [
+        if answer:
+            response = await meeting_archive.ask(query.strip(), top_k, filters)
+        else:
+            response = {"answer": None, "results": await meeting_archive.search(query.strip(), top_k, filters)}
+    
+    except (AdmissionRejected, StageOverloaded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Meeting search error: {str(e)}")
+    
+    return MeetingSearchResponse(
+        query=query.strip(),
+        answer=response["answer"],
+        results=[
             {
-                "source": title,
-                "chunk": i,
-                "type": "meeting"
+                "text": hit["text"],
+                "meeting_title": hit["meta"]["source"],
+                "meeting_id": hit["meta"].get("meeting_id"),
+                "chunk": hit["meta"]["chunk"],
+                "score": round(hit["score"], 4),
             }
-            for i in range(len(chunks))
-        ]
-        
-        # Store in FAISS
-        MEET_INDEX.add(chunk_embeddings, chunks, metas)
-        MEET_INDEX.save()
-        
-        return len(chunks)
+            for hit in response["results"]
+        ],
+        latency_ms=int((time.perf_counter() - start) * 1000),
+    )
+
+@router.get("/jobs/{job_id}", response_model=MeetingIngestJob)
+async def meeting_ingest_job(job_id: str):
+    """Status of a store_for_search background indexing job"""
     
-    except Exception as e:
-        # Log error but don't fail the whole request
-        print(f"Error storing meeting chunks: {str(e)}")
-        return 0
+    job = meeting_archive.job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingestion job")
+    return MeetingIngestJob(**job)
+
+# Helper functions
+async def _receive_pdf(request: Request) -> Tuple[str, str, Dict[str, str]]:
+    """Receive the PDF form and extract its text (spooled to disk, parsed in the PDF
+    process pool); returns (text, meeting title, form fields)"""
+    try:
+        form = await receive_upload_form(request, "pdf_file", ".pdf")
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Validate file
+        if not form.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        
+        # Extract title from filename if not given
+        meeting_title = form.fields.get("meeting_title") or form.filename.replace('.pdf', '').replace('_', ' ').title()
+        try:
+            return await read_pdf_text(form.path), meeting_title, form.fields
+        except StageOverloaded:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to extract PDF text: {str(e)}")
+    finally:
+        form.path.unlink(missing_ok=True)
+
+def _form_flag(value: Optional[str]) -> bool:
+    """Parse a boolean form field the way FastAPI's ``Form(False)`` does"""
+    if value is None or value.strip().lower() in _FALSE_VALUES:
+        return False
+    if value.strip().lower() in _TRUE_VALUES:
+        return True
+    raise HTTPException(status_code=422, detail=f"Invalid boolean form value: {value!r}")
+
+def _ingest_fields(job: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """SummaryResponse fields for a store_for_search job (current status)"""
+    if job is None:
+        return {}
+    job = meeting_archive.job(job["job_id"]) or job
+    return {"chunks_stored": job["chunks_stored"], "ingest_job": MeetingIngestJob(**job)}
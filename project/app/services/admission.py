@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when the request queue is full; the API answers 429."""
+
+    def __init__(self, gate: str) -> None:
+        super().__init__(f"Too many '{gate}' requests in flight, try again later")
+        self.gate = gate
+
+
+class AdmissionGate:
+    """Caps concurrent expensive requests, with a bounded wait queue.
+
+    Up to ``max_concurrency`` requests run at once and ``queue_size`` more
+    may wait up to ``queue_timeout`` seconds for a slot. Everything else is
+    rejected immediately, so a spike turns into fast 429s instead of a pile
+    of requests holding memory and LLM quota.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, queue_size: int, queue_timeout: float) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._waiting = 0
+        self._running = 0
+        self.rejected = 0
+
+    def check(self) -> None:
+        """Reject now if a new request could not even be queued"""
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(self.name)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        self.check()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AdmissionRejected(self.name) from None
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": self._running, "waiting": self._waiting, "rejected": self.rejected}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one computation.
+
+    The first caller starts ``fn``; callers arriving while it runs await the
+    same task. A caller that goes away does not cancel the shared work, and
+    nothing is remembered once the task finishes (caching is separate).
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """(result, shared): ``shared`` is True if another caller's work was reused"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved by the awaiting callers; silences the unawaited warning
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._inflight), "coalesced": self.coalesced}
+
+
+# One gate for all LLM-backed requests (HR answers and meeting summaries)
+REQUEST_GATE = AdmissionGate(
+    "llm", settings.max_active_requests, settings.request_queue_size, settings.request_queue_timeout
+)
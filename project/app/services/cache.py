@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(*parts: Any) -> str:
+    """Stable SHA-256 key over JSON-serialisable parts"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with an optional per-entry TTL.
+
+    ``ttl_seconds <= 0`` disables expiry; ``max_entries`` bounds memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 0) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class DiskCache:
+    """``LRUCache``-compatible store on disk (diskcache / SQLite) that survives restarts.
+
+    Values must be picklable. Entries expire after ``ttl_seconds`` and the
+    least recently used ones are culled past ``size_limit_mb``.
+    """
+
+    def __init__(self, directory: Path, ttl_seconds: float = 0, size_limit_mb: int = 256) -> None:
+        import diskcache  # optional dependency, only needed for the disk backend
+
+        self.ttl_seconds = ttl_seconds
+        self._cache = diskcache.Cache(
+            str(directory),
+            size_limit=size_limit_mb * 2 ** 20,
+            eviction_policy="least-recently-used",
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._cache.get(key, default=None, retry=True)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value, expire=self.ttl_seconds if self.ttl_seconds > 0 else None, retry=True)
+
+    def clear(self) -> None:
+        self._cache.clear(retry=True)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class TieredCache:
+    """In-memory LRU in front of a persistent cache; disk hits are promoted"""
+
+    def __init__(self, memory: LRUCache, disk: DiskCache) -> None:
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        memory, disk = self.memory.stats(), self.disk.stats()
+        hits = memory["hits"] + disk["hits"]
+        total = memory["hits"] + memory["misses"]
+        return {
+            "hits": hits,
+            "misses": total - hits,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "memory": memory,
+            "disk": disk,
+        }
+
+
+def build_cache(
+    max_entries: int, ttl_seconds: float, backend: str = "memory", directory: Optional[Path] = None
+) -> Union[LRUCache, TieredCache]:
+    """``memory``: LRU only; ``disk``: LRU in front of a DiskCache in ``directory``.
+
+    Falls back to memory-only if diskcache is not installed.
+    """
+    memory = LRUCache(max_entries, ttl_seconds)
+    if backend != "disk" or directory is None:
+        return memory
+    try:
+        return TieredCache(memory, DiskCache(directory, ttl_seconds))
+    except ImportError:
+        logger.warning("diskcache is not installed; caching in memory only")
+        return memory
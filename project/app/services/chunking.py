@@ -1,6 +1,16 @@
-from typing import List
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+@lru_cache(maxsize=8)
+def _splitter(size: int, overlap: int) -> Any:
+    # Imported on first use: langchain is slow to import and most workers
+    # only need it once a document is actually chunked
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=overlap)
 
 
 def chunk_text(text: str, size: int = 800, overlap: int = 120) -> List[str]:
@@ -15,9 +25,104 @@ def chunk_text(text: str, size: int = 800, overlap: int = 120) -> List[str]:
     Returns:
         List of text chunks
     """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=size,
-        chunk_overlap=overlap
-    )
-    chunks = text_splitter.split_text(text)
+    chunks = _splitter(size, overlap).split_text(text)
+    return chunks
+
+
+def chunk_spans(text: str, size: int = 800, overlap: int = 120) -> List[Tuple[str, int]]:
+    """
+    Split text like ``chunk_text``, returning (chunk, start offset) pairs.
+    
+    ``text[start:start + len(chunk)] == chunk``; start is -1 in the unlikely
+    case a chunk cannot be located (the splitter strips whitespace only).
+    """
+    spans: List[Tuple[str, int]] = []
+    pos = 0
+    for chunk in chunk_text(text, size, overlap):
+        start = text.find(chunk, pos)
+        if start < 0:
+            start = text.find(chunk)
+        spans.append((chunk, start))
+        if start >= 0:
+            pos = start + 1
+    return spans
+
+
+def is_anchor(unit: str, target: float) -> bool:
+    """
+    Whether a chunk boundary goes after ``unit``.
+
+    Decided by a hash of the unit's own text, with probability
+    ``len(unit) / target`` - so on average one cut every ``target``
+    characters, at places that do not move when text elsewhere changes.
+    """
+    digest = hashlib.blake2b(unit.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < len(unit) / max(target, 1.0) * 2 ** 64
+
+
+def _units(text: str, size: int) -> List[Tuple[str, str]]:
+    """(separator, unit) pairs: paragraphs, or the lines (speaker turns) of
+    paragraphs longer than ``size``, or splitter pieces of longer lines"""
+    units: List[Tuple[str, str]] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        sep = "\n\n"
+        lines = [paragraph] if len(paragraph) <= size else [row.strip() for row in paragraph.splitlines() if row.strip()]
+        for line in lines:
+            pieces = [line] if len(line) <= size else chunk_text(line, size, 0)
+            for piece in pieces:
+                units.append((sep, piece))
+                sep = " "
+            sep = "\n"
+    return units
+
+
+def anchored_chunks(text: str, size: int = 800, overlap: int = 120) -> List[str]:
+    """
+    Split text into chunks of at most ``size`` characters whose boundaries
+    only depend on nearby content.
+
+    Paragraphs (or speaker-turn lines) are packed in order, and a chunk ends
+    after a unit picked by ``is_anchor`` once it holds a quarter of ``size``.
+    Inserting or editing a passage therefore only changes the chunk(s)
+    around it; a greedy splitter would shift every later boundary. The
+    previous chunk's last whole units, up to ``overlap`` characters, are
+    repeated at the start of the next one.
+    """
+    chunks: List[str] = []
+    current: List[Tuple[str, str]] = []
+    carried = 0  # leading units repeated from the previous chunk
+    length = 0
+
+    def flush() -> None:
+        nonlocal current, carried, length
+        chunks.append("".join(sep + unit for sep, unit in current).strip())
+        tail: List[Tuple[str, str]] = []
+        size_of_tail = 0
+        for sep, unit in reversed(current[carried:]):
+            if size_of_tail + len(unit) > overlap:
+                break
+            tail.insert(0, (sep, unit))
+            size_of_tail += len(sep) + len(unit)
+        current, carried, length = tail, len(tail), size_of_tail
+
+    for sep, unit in _units(text, size):
+        if length + len(sep) + len(unit) > size:
+            if len(current) > carried:
+                flush()
+            if length + len(sep) + len(unit) > size:
+                current, carried, length = [], 0, 0
+        current.append((sep, unit))
+        length += len(sep) + len(unit)
+        if length >= size // 4 and is_anchor(unit, size / 2):
+            flush()
+    if len(current) > carried:
+        flush()
     return chunks
+
+
+def span_meta(chunk: str, start: int) -> Dict[str, int]:
+    """Chunk metadata fields recording where ``chunk`` sits in its document"""
+    return {"start": start, "end": start + len(chunk)} if start >= 0 else {}
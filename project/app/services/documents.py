@@ -0,0 +1,29 @@
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.services.pdf import extract_pdf_text
+
+# Like app.services.pdf, this runs inside ingestion worker processes and
+# must not import app.config or the embedding model.
+
+
+def extract_document_text(path: str) -> str:
+    """Extract plain text from a .pdf, .txt or .docx file on disk"""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".pdf":
+        return extract_pdf_text(path)
+    if suffix == ".txt":
+        return Path(path).read_text(encoding="utf-8", errors="replace").strip()
+    if suffix == ".docx":
+        from docx import Document  # python-docx, only needed for .docx
+
+        return "\n".join(p.text for p in Document(path).paragraphs).strip()
+    raise ValueError(f"Unsupported file type: {suffix}")
+
+
+def safe_extract_document_text(path: str) -> Tuple[str, Optional[str]]:
+    """(text, error) variant for process-pool maps where one bad file must not abort the batch"""
+    try:
+        return extract_document_text(path), None
+    except Exception as e:
+        return "", str(e)
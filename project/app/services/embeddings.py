@@ -1,8 +1,149 @@
+import asyncio
+import threading
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
 from app.config import settings  # Adjust the import path as needed
-from langchain.embeddings import HuggingFaceEmbeddings
+from app.services.executors import run_in_stage
+from app.services.metrics import EMBED_BATCH_SIZE
+
+def get_embedding_model(backend: Optional[str] = None):
+    backend = backend or settings.embedding_backend
+    if backend == "onnx":
+        from app.services.onnx_embeddings import load_onnx_embeddings
+
+        return load_onnx_embeddings(
+            settings.embedding_model,
+            settings.onnx_model_dir,
+            settings.onnx_quantize,
+            settings.onnx_intra_op_threads,
+            settings.onnx_batch_size,
+        )
+    if backend != "torch":
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    # langchain + sentence-transformers take seconds to import; only pay on first use
+    from langchain.embeddings import HuggingFaceEmbeddings
 
-def get_embedding_model():
     model = HuggingFaceEmbeddings(model_name=settings.embedding_model)
     return model
 
-Embedding = get_embedding_model()
\ No newline at end of file
+
+class EmbeddingService:
+    """Synchronous numpy wrapper around the embedding model.
+
+    The model is built on first use (or by ``load()`` during warm-up), so
+    importing this module stays cheap.
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self._factory = factory
+        self._model: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> None:
+        """Build the model and run one tiny batch so the first request is not the slow one"""
+        self.embed(["warm-up"])
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts in one forward pass -> (n, dim) float32"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.model.embed_documents(list(texts)), dtype=np.float32)
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class EmbeddingDispatcher:
+    """Coalesces concurrent ``embed_one`` calls into batched forward passes.
+
+    The first queued request opens a batch window of ``window_ms``; every
+    request that arrives before it closes (up to ``max_batch_size``) rides
+    along in the same model call. Batches run on the ``embed`` executor stage,
+    so several can be in flight at once under its concurrency limit.
+    """
+
+    def __init__(self, service: EmbeddingService, window_ms: float, max_batch_size: int) -> None:
+        self.service = service
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        queue = self._ensure_collector()
+        fut = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, fut))
+        return await fut
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed an already-batched list directly (bypasses the window)"""
+        return await run_in_stage("embed", self.service.embed, list(texts))
+
+    def _ensure_collector(self) -> "asyncio.Queue[Tuple[str, asyncio.Future]]":
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop or self._collector is None or self._collector.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._collector = loop.create_task(self._collect(self._queue))
+        return self._queue
+
+    async def _collect(self, queue: "asyncio.Queue[Tuple[str, asyncio.Future]]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            live = [(text, fut) for text, fut in batch if not fut.done()]
+            if not live:
+                continue
+            task = loop.create_task(self._dispatch(live))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        EMBED_BATCH_SIZE.observe(len(batch))
+        try:
+            vectors = await run_in_stage("embed", self.service.embed, [text for text, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), vec in zip(batch, vectors):
+            if not fut.done():
+                fut.set_result(vec)
+
+
+embeddings = EmbeddingService(get_embedding_model)
+embedding_dispatcher = EmbeddingDispatcher(
+    embeddings,
+    window_ms=settings.embed_batch_window_ms,
+    max_batch_size=settings.embed_max_batch_size,
+)
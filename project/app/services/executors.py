@@ -0,0 +1,112 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+class StageOverloaded(RuntimeError):
+    """Raised when a stage's wait queue is full; callers should shed load."""
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"'{stage}' stage is overloaded, try again later")
+        self.stage = stage
+
+
+class Stage:
+    """A named executor with a concurrency cap and a bounded wait queue.
+
+    At most ``max_concurrency`` jobs run in the pool at once; up to
+    ``queue_size`` more may wait for a slot. Anything beyond that fails fast
+    with ``StageOverloaded`` instead of piling up on the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        workers: int,
+        max_concurrency: int,
+        queue_size: int,
+    ) -> None:
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = max(0, queue_size)
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._waiting = 0
+        self._running = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"onedesk-{self.name}"
+                )
+            else:
+                # spawn: never fork a parent that holds model/BLAS threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._slots.locked():
+            if self._waiting >= self.queue_size:
+                raise StageOverloaded(self.name)
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"running": self._running, "waiting": self._waiting}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+STAGES: Dict[str, Stage] = {
+    "embed": Stage(
+        "embed", "thread", settings.embed_workers,
+        settings.embed_max_concurrency, settings.executor_queue_size,
+    ),
+    "search": Stage(
+        "search", "thread", settings.search_workers,
+        settings.search_max_concurrency, settings.executor_queue_size,
+    ),
+    # Index writes hold the index's write lock anyway; one thread keeps them
+    # (and any wait for that lock) off the embed and search pools
+    "index": Stage("index", "thread", 1, 1, settings.executor_queue_size),
+    "pdf": Stage(
+        "pdf", "process", settings.pdf_workers,
+        settings.pdf_max_concurrency, settings.executor_queue_size,
+    ),
+}
+
+
+async def run_in_stage(stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable in the named stage's pool and await its result"""
+    return await STAGES[stage].run(fn, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    for stage in STAGES.values():
+        stage.shutdown()
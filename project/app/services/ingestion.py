@@ -0,0 +1,168 @@
+import hashlib
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.chunking import chunk_spans, span_meta
+from app.services.documents import safe_extract_document_text
+from app.services.embeddings import embeddings
+from app.vectorstores.faiss_store import HR_INDEX, SimpleFaissIndex, interprocess_lock
+
+# Only one ingestion may rewrite an index at a time (CLI and admin endpoint)
+_ingest_lock = threading.Lock()
+
+
+class IngestionInProgress(RuntimeError):
+    """Raised when another ingestion run holds the lock"""
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("files", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(path: Path, files: Dict[str, Dict[str, Any]]) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps({"files": files}, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _scan(root: Path) -> Dict[str, Path]:
+    """Map of source name (posix path relative to root) -> file path"""
+    allowed = {ext.lower() for ext in settings.allowed_file_types}
+    found: Dict[str, Path] = {}
+    if not root.exists():
+        return found
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in allowed and not path.name.startswith("."):
+            found[path.relative_to(root).as_posix()] = path
+    return found
+
+
+def ingest_hr_policies(
+    full: bool = False,
+    root: Optional[Path] = None,
+    index: SimpleFaissIndex = HR_INDEX,
+    manifest_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Incrementally sync ``hr_policies_dir`` into the HR index.
+
+    A manifest next to the index records a SHA-256 per file. Unchanged files
+    are skipped (size+mtime short-circuits hashing), new or changed files are
+    parsed in a process pool, chunked and embedded in large batches, and
+    chunks of deleted or changed files are tombstoned by chunk id (no other
+    file is re-embedded). ``full=True`` rebuilds everything.
+    """
+    if not _ingest_lock.acquire(blocking=False):
+        raise IngestionInProgress("HR ingestion is already running")
+    try:
+        # Other processes (uvicorn workers, the CLI) may publish the same index
+        with interprocess_lock(index.index_path.with_suffix(".ingest.lock"), blocking=False) as acquired:
+            if not acquired:
+                raise IngestionInProgress("HR ingestion is already running in another process")
+            return _ingest(full, root or settings.hr_policies_dir, index,
+                           manifest_path or settings.indices_dir / "hr.manifest.json")
+    finally:
+        _ingest_lock.release()
+
+
+def _ingest(full: bool, root: Path, index: SimpleFaissIndex, manifest_path: Path) -> Dict[str, Any]:
+    start = time.perf_counter()
+    index.refresh()
+    old = {} if full else _load_manifest(manifest_path)
+    current = _scan(root)
+
+    # Diff against the manifest
+    new_manifest: Dict[str, Dict[str, Any]] = {}
+    to_parse: List[str] = []
+    for source, path in current.items():
+        st = path.stat()
+        prev = old.get(source)
+        if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+            new_manifest[source] = prev
+            continue
+        digest = _file_sha256(path)
+        if prev and prev.get("sha256") == digest:
+            new_manifest[source] = {**prev, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            continue
+        new_manifest[source] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        to_parse.append(source)
+    deleted = [source for source in old if source not in current]
+
+    # Parse changed files in worker processes, chunk and embed in big batches
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    vectors: List[np.ndarray] = []
+    pending: List[str] = []
+    failed: Dict[str, str] = {}
+    batch_size = max(1, settings.ingest_embed_batch_size)
+
+    def flush() -> None:
+        if pending:
+            vectors.append(embeddings.embed(pending))
+            pending.clear()
+
+    if to_parse:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=settings.ingest_workers, mp_context=ctx) as pool:
+            paths = [str(current[source]) for source in to_parse]
+            for source, (text, error) in zip(to_parse, pool.map(safe_extract_document_text, paths)):
+                if error is not None:
+                    failed[source] = error
+                    continue
+                chunks = chunk_spans(text, settings.chunk_size, settings.chunk_overlap)
+                new_manifest[source]["chunks"] = len(chunks)
+                for i, (chunk, start) in enumerate(chunks):
+                    texts.append(chunk)
+                    metas.append({"source": source, "chunk": i, "type": "hr_policy", **span_meta(chunk, start)})
+                    pending.append(chunk)
+                    if len(pending) >= batch_size:
+                        flush()
+        flush()
+
+    # A file that failed to parse keeps its previous chunks and manifest entry
+    for source in failed:
+        if source in old:
+            new_manifest[source] = old[source]
+        else:
+            new_manifest.pop(source)
+    replaced = {s for s in to_parse if s not in failed}
+    stale = set(deleted) | replaced
+    if full:
+        stale |= {meta.get("source") for meta in index.metas}
+
+    removed = index.remove_sources(stale) if stale else 0
+    added = index.add(np.vstack(vectors), texts, metas) if texts else 0
+    if removed or added or full:
+        index.save()
+    _save_manifest(manifest_path, new_manifest)
+
+    return {
+        "files_scanned": len(current),
+        "files_added": sorted(s for s in replaced if s not in old),
+        "files_updated": sorted(s for s in replaced if s in old),
+        "files_deleted": sorted(deleted),
+        "files_failed": failed,
+        "chunks_added": added,
+        "chunks_removed": removed,
+        "total_chunks": index.count,
+        "generation": index.generation,
+        "elapsed_ms": int((time.perf_counter() - start) * 1000),
+    }
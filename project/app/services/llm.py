@@ -1,42 +1,204 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Optional
 from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import random
+import time
 import httpx
 from app.config import settings
+from app.services.metrics import LLM_ERRORS, LLM_IN_FLIGHT, record
 
 API_KEY = settings.gemini_api_key
 MODEL_NAME = settings.gemini_model
 BASE_URL = settings.gemini_base_url
 
+# Upstream responses worth retrying (rate limiting / transient server errors)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+# One pooled keep-alive client and one in-flight limiter per process.
+# Created/closed by the FastAPI lifespan; created lazily for CLI/scripts.
+_http_client: Optional[httpx.AsyncClient] = None
+_upstream_slots: Optional[asyncio.Semaphore] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  # type: ignore
+    except ImportError:
+        return False
+    return True
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    http2 = settings.llm_http2 and _http2_available()
+    if settings.llm_http2 and not http2:
+        logger.warning("h2 is not installed; LLM client falls back to HTTP/1.1 keep-alive")
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            connect=settings.llm_connect_timeout,
+            read=settings.llm_read_timeout,
+            write=settings.llm_write_timeout,
+            pool=settings.llm_pool_timeout,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+
+def _get_upstream_slots() -> asyncio.Semaphore:
+    global _upstream_slots
+    if _upstream_slots is None:
+        _upstream_slots = asyncio.Semaphore(settings.llm_max_inflight)
+    return _upstream_slots
+
+
+async def startup_llm_client() -> None:
+    """Open the shared upstream connection pool (called from the app lifespan)"""
+    get_http_client()
+
+
+async def shutdown_llm_client() -> None:
+    global _http_client, _upstream_slots
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _upstream_slots = None
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After"""
+    cap = settings.llm_retry_max_delay
+    if retry_after:
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, settings.llm_retry_base_delay * (2 ** attempt)))
+
+
 class LLM():
     """DeepSeek API client using OpenAI-compatible format"""
-    
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = BASE_URL
-        
-    async def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
+
+    def _build_request(self, messages: List[Dict[str, str]], stream: bool, **kwargs) -> Dict[str, Any]:
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        
+
         payload = {
             "model": MODEL_NAME,
             "messages": messages,
             "temperature": kwargs.get("temperature", settings.llm_temperature),
             "max_tokens": kwargs.get("max_tokens", settings.max_tokens),
-            "stream": False
+            "stream": stream
         }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            )
+        return {"url": f"{self.base_url}/chat/completions", "headers": headers, "json": payload}
+
+    async def generate_response(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        request = self._build_request(messages, stream=False, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            with LLM_IN_FLIGHT.track_inprogress():
+                response = await self._post_with_retries(request["url"], request["headers"], request["json"])
+        except Exception:
+            LLM_ERRORS.inc()
+            raise
+        record("llm_call", t0)
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
+    async def stream_response(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Yield content deltas as the upstream emits them (OpenAI-style SSE).
+
+        Retries only happen before the first byte of the body; once tokens
+        have been yielded a failure is raised to the caller.
+        """
+        request = self._build_request(messages, stream=True, **kwargs)
+        t0 = time.perf_counter()
+        try:
+            with LLM_IN_FLIGHT.track_inprogress():
+                async for delta in self._stream_with_retries(request):
+                    yield delta
+        except Exception:
+            LLM_ERRORS.inc()
+            raise
+        record("llm_call", t0)
+
+    async def _stream_with_retries(self, request: Dict[str, Any]) -> AsyncIterator[str]:
+        client = get_http_client()
+        max_retries = settings.llm_max_retries
+        for attempt in range(max_retries + 1):
+            retry_after: Optional[str] = None
+            try:
+                async with _get_upstream_slots():
+                    async with client.stream("POST", request["url"], headers=request["headers"], json=request["json"]) as response:
+                        if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                            retry_after = response.headers.get("retry-after")
+                        else:
+                            response.raise_for_status()
+                            async for delta in _iter_sse_deltas(response):
+                                yield delta
+                            return
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt >= max_retries:
+                    raise
+            await asyncio.sleep(_retry_delay(attempt, retry_after))
+
+    async def _post_with_retries(
+        self, url: str, headers: Dict[str, str], payload: Dict[str, Any]
+    ) -> httpx.Response:
+        client = get_http_client()
+        max_retries = settings.llm_max_retries
+        for attempt in range(max_retries + 1):
+            try:
+                async with _get_upstream_slots():
+                    response = await client.post(url, headers=headers, json=payload)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                if attempt >= max_retries:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                await asyncio.sleep(_retry_delay(attempt, response.headers.get("retry-after")))
+                continue
             response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+            return response
+        raise RuntimeError("unreachable")  # pragma: no cover
+
+
+async def _iter_sse_deltas(response: httpx.Response) -> AsyncIterator[str]:
+    """Parse ``data:`` lines incrementally and yield non-empty content deltas"""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        if not data:
+            continue
+        chunk = json.loads(data)
+        for choice in chunk.get("choices", []):
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                yield delta
 
 
 def get_llm_client() :
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.admission import REQUEST_GATE
+from app.services.cache import content_key
+from app.services.chunking import chunk_spans, span_meta
+from app.services.embeddings import embedding_dispatcher, embeddings
+from app.services.executors import run_in_stage
+from app.services.llm import get_llm_client
+from app.services.packing import pack_contexts
+from app.services.rag import reciprocal_rank_fusion
+from app.vectorstores.faiss_store import MEET_INDEX
+
+logger = logging.getLogger(__name__)
+
+NO_MEETING_CONTEXT_ANSWER = "I couldn't find anything about that in the stored meetings."
+
+MEETING_QA_PROMPT = """You are an assistant answering questions about past meetings.
+
+INSTRUCTIONS:
+1. Answer using ONLY the provided meeting excerpts
+2. Name the meeting(s) the answer comes from
+3. If the excerpts do not contain the answer, say so
+4. Keep answers concise; list decisions and action items with their owners when relevant"""
+
+
+def meeting_chunks(
+    content: str, title: str, meeting_id: str
+) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]]]:
+    """Chunk and embed one meeting -> (embeddings, chunks, metas); blocking, runs in the embed stage"""
+    spans = chunk_spans(content, settings.chunk_size, settings.chunk_overlap)
+    chunks = [chunk for chunk, _ in spans]
+
+    # Generate embeddings
+    chunk_embeddings = embeddings.embed(chunks)
+
+    # Create metadata (character offsets let overlapping hits be merged)
+    metas = [
+        {
+            "source": title,
+            "chunk": i,
+            "type": "meeting",
+            "meeting_id": meeting_id,
+            **span_meta(chunk, start),
+        }
+        for i, (chunk, start) in enumerate(spans)
+    ]
+    return chunk_embeddings, chunks, metas
+
+
+def store_meeting_chunks(
+    meeting_id: str, chunk_embeddings: np.ndarray, chunks: List[str], metas: List[Dict[str, Any]]
+) -> int:
+    """Index one meeting's chunks; blocking, runs in the index stage.
+
+    One small new segment, independent of index size; any earlier copy of
+    this meeting is tombstoned, so re-storing it never duplicates it.
+    """
+    if not chunks:
+        return 0
+    return MEET_INDEX.replace({"meeting_id": meeting_id}, chunk_embeddings, chunks, metas)
+
+
+class MeetingArchive:
+    """Searchable store of summarized meetings.
+
+    ``submit`` indexes a meeting in a background task and returns a job at
+    once, so summaries are never held up by embedding or index writes. The
+    same meeting submitted again while its job is queued, running or done
+    reuses that job; once that job is forgotten, storing it again replaces
+    the indexed copy. Search is hybrid (dense + BM25, rank-fused) like the HR
+    pipeline; ``ask`` adds an LLM answer over the packed excerpts.
+    """
+
+    def __init__(self) -> None:
+        self.llm_client = get_llm_client()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_meeting: Dict[str, str] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    # ---- ingestion ----------------------------------------------------------
+    def submit(self, content: str, title: str) -> Dict[str, Any]:
+        """Start indexing a meeting; returns its job (see ``job``)"""
+        meeting_id = content_key("meeting", title, content)[:16]
+        existing = self._jobs.get(self._by_meeting.get(meeting_id, ""))
+        if existing is not None and existing["status"] != "failed":
+            return dict(existing)
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "meeting_id": meeting_id,
+            "meeting_title": title,
+            "status": "queued",
+            "chunks_stored": None,
+            "error": None,
+            "created_at": time.time(),
+            "finished_at": None,
+        }
+        self._remember(job)
+        task = asyncio.create_task(self._ingest(job, content))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(job)
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def _ingest(self, job: Dict[str, Any], content: str) -> None:
+        job["status"] = "running"
+        try:
+            vectors, chunks, metas = await run_in_stage(
+                "embed", meeting_chunks, content, job["meeting_title"], job["meeting_id"]
+            )
+            # Written on its own stage: waiting for the index lock must not hold an embed thread
+            job["chunks_stored"] = await run_in_stage(
+                "index", store_meeting_chunks, job["meeting_id"], vectors, chunks, metas
+            )
+            job["status"] = "done"
+        except Exception as e:
+            logger.warning("storing meeting %r failed: %s", job["meeting_title"], e)
+            job["status"] = "failed"
+            job["error"] = str(e)
+        job["finished_at"] = time.time()
+
+    def _remember(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["job_id"]] = job
+        self._by_meeting[job["meeting_id"]] = job["job_id"]
+        # Forget the oldest finished jobs beyond the limit
+        while len(self._jobs) > settings.meeting_jobs_kept:
+            oldest = next(iter(self._jobs.values()))
+            if oldest["status"] in ("queued", "running"):
+                break
+            self._jobs.popitem(last=False)
+            if self._by_meeting.get(oldest["meeting_id"]) == oldest["job_id"]:
+                del self._by_meeting[oldest["meeting_id"]]
+
+    # ---- retrieval ----------------------------------------------------------
+    async def search(
+        self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top meeting chunks for ``query``, best first"""
+        mode = settings.retrieval_mode
+        candidates = max(top_k, settings.hybrid_candidates) if mode == "hybrid" else top_k
+        retrievers = []
+        if mode != "lexical":
+            retrievers.append(self._dense_search(query, candidates, filters))
+        if mode != "dense":
+            retrievers.append(run_in_stage("search", self._search_lexical, query, candidates, filters))
+        rankings = await asyncio.gather(*retrievers)
+        if len(rankings) == 1:
+            return rankings[0][:top_k]
+        return reciprocal_rank_fusion(rankings, settings.rrf_k)[:top_k]
+
+    async def ask(
+        self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Answer ``query`` from the stored meetings; returns answer and the excerpts used"""
+        async with REQUEST_GATE.admit():
+            contexts = pack_contexts(await self.search(query, top_k, filters), settings.max_context_tokens)
+            if not contexts:
+                return {"answer": NO_MEETING_CONTEXT_ANSWER, "results": []}
+            answer = await self.llm_client.generate_response(self._build_messages(query, contexts))
+        return {"answer": answer.strip(), "results": contexts}
+
+    async def _dense_search(
+        self, query: str, k: int, filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        query_embedding = await embedding_dispatcher.embed_one(query)
+        return await run_in_stage("search", self._search, query_embedding, k, filters)
+
+    @staticmethod
+    def _search(query_embedding, top_k: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Pick up segments written by other workers (no-op otherwise)
+        MEET_INDEX.refresh()
+        return MEET_INDEX.search(query_embedding, k=top_k, filters=filters)
+
+    @staticmethod
+    def _search_lexical(query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        MEET_INDEX.refresh()
+        return MEET_INDEX.lexical_search(query, k=top_k, filters=filters)
+
+    @staticmethod
+    def _build_messages(query: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        excerpts = "\n\n".join(
+            f"[Excerpt {i} - {ctx['meta']['source']}]:\n{ctx['text']}" for i, ctx in enumerate(contexts, 1)
+        )
+        return [
+            {"role": "system", "content": MEETING_QA_PROMPT},
+            {"role": "user", "content": f"Question: {query}\n\nMeeting Excerpts:\n{excerpts}"},
+        ]
+
+
+# Global meeting archive instance
+meeting_archive = MeetingArchive()
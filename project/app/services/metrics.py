@@ -0,0 +1,87 @@
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Sub-millisecond (cached embeds, FAISS) up to long LLM / map-reduce calls
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "onedesk_stage_seconds",
+    "Time spent per pipeline stage (embed, search, lexical, pack, llm, pdf_extract, ...)",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+INDEX_OP_SECONDS = Histogram(
+    "onedesk_index_op_seconds",
+    "FAISS index search/load/save time",
+    ["index", "op"],
+    buckets=_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "onedesk_request_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+EMBED_BATCH_SIZE = Histogram(
+    "onedesk_embed_batch_size",
+    "Queries per coalesced embedding forward pass (count = batches, sum = queries)",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+REQUESTS_IN_FLIGHT = Gauge("onedesk_requests_in_flight", "HTTP requests being served")
+LLM_IN_FLIGHT = Gauge("onedesk_llm_in_flight", "Upstream LLM calls in progress")
+LLM_ERRORS = Counter("onedesk_llm_errors_total", "Upstream LLM calls that failed after retries")
+
+
+def record(stage: str, since: float, timings: Optional[Dict[str, float]] = None) -> float:
+    """Observe the time since ``since`` (perf_counter) for ``stage``; also
+    stores it in ``timings`` as ``<stage>_ms`` when given. Returns seconds."""
+    seconds = time.perf_counter() - since
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if timings is not None:
+        timings[f"{stage}_ms"] = round(seconds * 1000, 2)
+    return seconds
+
+
+class StatsCollector:
+    """Exports ``stats()`` dicts of live objects (caches, executor stages,
+    indices) at scrape time, so hot paths never touch a metric for them.
+
+    Each source returns ``{label_value: {field: number}}``; numeric fields
+    named ``hits``/``misses``/``rejected``/``coalesced`` become counters,
+    everything else gauges.
+    """
+
+    _COUNTERS = ("hits", "misses", "rejected", "coalesced", "context_mismatches")
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, Callable[[], Dict[str, Dict[str, Any]]]] = {}
+
+    def add(self, name: str, source: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+        self._sources[name] = source
+
+    def collect(self) -> Iterable[Any]:
+        for name, source in self._sources.items():
+            try:
+                groups = source()
+            except Exception:
+                continue  # a broken source must not break the scrape
+            families: Dict[str, Any] = {}
+            for label, fields in groups.items():
+                for field, value in fields.items():
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        continue
+                    metric = f"onedesk_{name}_{field}"
+                    if metric not in families:
+                        if field in self._COUNTERS:
+                            families[metric] = CounterMetricFamily(metric, f"{name} {field}", labels=["name"])
+                        else:
+                            families[metric] = GaugeMetricFamily(metric, f"{name} {field}", labels=["name"])
+                    families[metric].add_metric([label], value)
+            yield from families.values()
+
+
+COLLECTOR = StatsCollector()
+REGISTRY.register(COLLECTOR)
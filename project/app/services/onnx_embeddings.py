@@ -0,0 +1,173 @@
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# sentence-transformers truncates all-MiniLM-L6-v2 inputs at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+
+
+def export_onnx_model(model_name: str, out_dir: Path, quantize: bool = True) -> Path:
+    """Export a Hugging Face encoder to ONNX (+ dynamic int8 quantization).
+
+    Needs torch and transformers, so run it once at build time (``python -m
+    app.cli export-onnx``); serving only needs onnxruntime and tokenizers.
+    Returns the path of the model file to serve.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(str(out_dir))
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    fp32 = out_dir / FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in names),
+            str(fp32),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14,
+        )
+    if not quantize:
+        return fp32
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8 = out_dir / INT8_FILE
+    quantize_dynamic(str(fp32), str(int8), weight_type=QuantType.QInt8)
+    logger.info("exported %s: %.1f MB fp32 -> %.1f MB int8", model_name,
+                fp32.stat().st_size / 2 ** 20, int8.stat().st_size / 2 ** 20)
+    return int8
+
+
+class OnnxEmbeddings:
+    """Sentence embeddings from an exported encoder under onnxruntime.
+
+    Mean pooling over the attention mask, then L2 normalisation, matching
+    the sentence-transformers pipeline of all-MiniLM-L6-v2. Texts are
+    batched in length order so each batch pads to similar lengths.
+    Exposes ``embed_documents`` like the langchain model it replaces.
+    """
+
+    def __init__(self, model_path: Path, intra_op_threads: int = 0, batch_size: int = 32) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        # Embedding batches already run concurrently on the embed stage
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.batch_size = max(1, batch_size)
+
+        self.tokenizer = Tokenizer.from_file(str(model_path.parent / "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        pad_id = self.tokenizer.token_to_id("[PAD]")
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0, pad_token="[PAD]")
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        out: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        for lo in range(0, len(texts), self.batch_size):
+            rows = order[lo:lo + self.batch_size]
+            vectors = self._embed_batch([texts[i] for i in rows])
+            if not out.size:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[rows] = vectors
+        return out
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+
+def load_onnx_embeddings(
+    model_name: str, model_dir: Path, quantize: bool, intra_op_threads: int, batch_size: int
+) -> OnnxEmbeddings:
+    """Serve the exported model in ``model_dir``, exporting it first if missing"""
+    path = model_dir / (INT8_FILE if quantize else FP32_FILE)
+    if not path.exists():
+        logger.warning("no ONNX export at %s; exporting %s now (needs torch)", path, model_name)
+        path = export_onnx_model(model_name, model_dir, quantize)
+    return OnnxEmbeddings(path, intra_op_threads, batch_size)
+
+
+def _rate(embed: Callable[[Sequence[str]], Any], texts: Sequence[str], batch_size: int) -> Dict[str, Any]:
+    embed(list(texts[:batch_size]))  # warm-up: allocations, kernel selection
+    t0 = time.perf_counter()
+    vectors = [np.asarray(embed(list(texts[i:i + batch_size])), dtype=np.float32)
+               for i in range(0, len(texts), batch_size)]
+    elapsed = time.perf_counter() - t0
+    return {
+        "vectors": np.vstack(vectors),
+        "texts_per_s": round(len(texts) / elapsed, 1) if elapsed > 0 else None,
+        "ms_per_batch": round(elapsed * 1000 / len(vectors), 2),
+    }
+
+
+def compare_backends(
+    reference: Callable[[Sequence[str]], Any],
+    candidate: Callable[[Sequence[str]], Any],
+    texts: Sequence[str],
+    batch_size: int = 32,
+) -> Dict[str, Any]:
+    """Cosine parity and throughput of ``candidate`` against ``reference``.
+
+    Parity is the per-text cosine similarity between the two backends'
+    embeddings; for retrieval, what matters is that neighbours are kept, so
+    the overlap of each text's top-10 neighbours within the sample is
+    reported as well.
+    """
+    ref = _rate(reference, texts, batch_size)
+    cand = _rate(candidate, texts, batch_size)
+    a = ref.pop("vectors")
+    b = cand.pop("vectors")
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cosine = (a * b).sum(axis=1)
+    k = min(10, len(texts) - 1)
+    overlap = None
+    if k > 0:
+        top_a = np.argsort(-(a @ a.T), axis=1)[:, 1:k + 1]
+        top_b = np.argsort(-(b @ b.T), axis=1)[:, 1:k + 1]
+        overlap = round(float(np.mean([len(set(x) & set(y)) / k for x, y in zip(top_a, top_b)])), 4)
+    return {
+        "texts": len(texts),
+        "cosine_mean": round(float(cosine.mean()), 5),
+        "cosine_min": round(float(cosine.min()), 5),
+        "cosine_p1": round(float(np.percentile(cosine, 1)), 5),
+        f"neighbour_overlap@{k}": overlap,
+        "reference": ref,
+        "candidate": cand,
+        "speedup": round(cand["texts_per_s"] / ref["texts_per_s"], 2)
+        if cand["texts_per_s"] and ref["texts_per_s"] else None,
+    }
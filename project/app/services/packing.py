@@ -0,0 +1,79 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.tokens import count_tokens
+
+
+def _span(meta: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    start, end = meta.get("start"), meta.get("end")
+    if isinstance(start, int) and isinstance(end, int):
+        return start, end
+    return None
+
+
+def _touches(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Same source and overlapping or adjacent character spans"""
+    if a["meta"].get("source") != b["meta"].get("source"):
+        return False
+    sa, sb = _span(a["meta"]), _span(b["meta"])
+    return sa is not None and sb is not None and sa[0] <= sb[1] and sb[0] <= sa[1]
+
+
+def _merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """One passage covering both; ``a`` keeps its rank position, shared text appears once"""
+    (sa, ea), (sb, eb) = _span(a["meta"]), _span(b["meta"])
+    first, (s1, e1), second, (s2, e2) = (a, (sa, ea), b, (sb, eb)) if sa <= sb else (b, (sb, eb), a, (sa, ea))
+    text = first["text"] if e2 <= e1 else first["text"] + second["text"][e1 - s2:]
+    chunks = sorted(set(a["meta"].get("chunks", [a["meta"].get("chunk")]))
+                    | set(b["meta"].get("chunks", [b["meta"].get("chunk")])))
+    return {
+        **a,
+        "text": text,
+        "score": max(a["score"], b["score"]),
+        "ids": a["ids"] + b["ids"],
+        "meta": {**a["meta"], "start": s1, "end": max(e1, e2), "chunks": chunks},
+    }
+
+
+def pack_contexts(
+    results: List[Dict[str, Any]],
+    max_tokens: int,
+    count: Callable[[str], int] = count_tokens,
+) -> List[Dict[str, Any]]:
+    """Rank-ordered hits -> prompt passages within ``max_tokens``.
+
+    Hits from the same document whose character spans (``start``/``end`` in
+    the chunk meta) overlap or touch are merged into one passage, so the
+    chunk overlap is sent once; a hit already covered by a packed passage
+    costs nothing. As before, packing stops at the first hit that does not
+    fit. Hits without offsets (indexed before they were recorded) are
+    packed as they are.
+    """
+    packed: List[Dict[str, Any]] = []
+    costs: List[int] = []
+    used = 0
+    for result in results:
+        ctx = {**result, "ids": [result.get("id", (result["meta"].get("source"), result["meta"].get("chunk")))]}
+        at = next((i for i, other in enumerate(packed) if _touches(other, ctx)), None)
+        if at is None:
+            cost = count(ctx["text"])
+            if used + cost > max_tokens:
+                break
+            packed.append(ctx)
+            costs.append(cost)
+            used += cost
+            continue
+
+        # The new hit may also bridge the gap to later passages of the document
+        merged = _merge(packed[at], ctx)
+        absorbed = [i for i in range(at + 1, len(packed)) if _touches(merged, packed[i])]
+        for i in absorbed:
+            merged = _merge(merged, packed[i])
+        cost = count(merged["text"]) if len(merged["text"]) != len(packed[at]["text"]) else costs[at]
+        delta = cost - costs[at] - sum(costs[i] for i in absorbed)
+        if used + delta > max_tokens:
+            break
+        packed[at], costs[at] = merged, cost
+        for i in reversed(absorbed):
+            del packed[i], costs[i]
+        used += delta
+    return packed
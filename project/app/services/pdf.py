@@ -0,0 +1,31 @@
+from typing import Iterator, List, Optional
+
+# Kept free of app.config / model imports: this module is loaded in the
+# PDF worker processes, which should start fast and stay small. PyMuPDF
+# itself is imported on first use, so the API process never pays for it.
+
+
+def iter_pdf_pages(path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Plain text of pages [start, stop) of the PDF at ``path``, one page at a time"""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        for number in range(start, min(stop if stop is not None else doc.page_count, doc.page_count)):
+            yield doc.load_page(number).get_text("text")
+
+
+def extract_pdf_pages(path: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    """Page texts of one page range; the unit of work sent to a PDF worker"""
+    return list(iter_pdf_pages(path, start, stop))
+
+
+def pdf_page_count(path: str) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def extract_pdf_text(path: str) -> str:
+    """Extract plain text from a PDF file, one page per line block"""
+    return "\n".join(iter_pdf_pages(path)).strip()
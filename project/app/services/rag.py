@@ -1,42 +1,317 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Optional, Sequence, Tuple
+import asyncio
 import time
+import numpy as np
+from app.services.admission import REQUEST_GATE, SingleFlight
+from app.services.cache import build_cache, content_key
 from app.services.llm import MODEL_NAME, get_llm_client
+from app.services.metrics import record
+from app.services.packing import pack_contexts
+from app.services.semantic_cache import SemanticCache
 from app.vectorstores.faiss_store import HR_INDEX
-from app.services.embeddings import embeddings
+from app.services.embeddings import embedding_dispatcher
+from app.services.executors import run_in_stage
+from app.services.streaming import StreamEvent
 from app.config import settings
 
+NO_CONTEXT_ANSWER = "I couldn't find any relevant information in the HR policies to answer your question."
+
+
+def normalize_query(query: str) -> str:
+    """Cache-key form of a question: case, whitespace and trailing punctuation folded"""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Dict[str, Any]]], rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """Merge ranked hit lists by sum of 1 / (rrf_k + rank); hits are matched by chunk id.
+
+    The fused hit keeps its first occurrence's fields, with ``score`` replaced
+    by the fused score.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    scores: Dict[Any, float] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, 1):
+            key = hit.get("id", (hit["meta"].get("source"), hit["meta"].get("chunk")))
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            fused.setdefault(key, hit)
+    order = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [{**fused[key], "score": scores[key]} for key in order]
+
+
 class RAGService:
     """Core RAG service for HR policy question answering"""
     
     def __init__(self):
         self.llm_client = get_llm_client()
+        # Answers are keyed by the HR index generation, so re-ingesting
+        # policies invalidates them without an explicit flush
+        self.cache = build_cache(
+            settings.answer_cache_size,
+            settings.answer_cache_ttl_seconds,
+            settings.answer_cache_backend,
+            settings.cache_dir / "answers",
+        ) if settings.answer_cache_enabled else None
+        # Paraphrases answered from the same chunks reuse the stored answer
+        self.semantic_cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_size,
+        ) if settings.semantic_cache_enabled else None
+        # Identical questions asked at the same time share one computation
+        self.flights = SingleFlight()
     
-    async def answer_question(self, query: str, top_k: 'Optional[int]' = None) -> Dict[str, Any]:
-        """Main RAG pipeline: retrieve -> synthesize -> return"""
+    async def answer_question(
+        self, query: str, top_k: 'Optional[int]' = None, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Main RAG pipeline: cache -> retrieve -> synthesize -> return"""
         start_time = time.time()
+        timings: Dict[str, float] = {}
         
         # Use default or provided top_k
         top_k = top_k or settings.top_k_retrieval
-    # Caching removed for simplicity; always compute fresh answer
         
-        # Step 1: Retrieve relevant contexts
-        contexts = await self._retrieve_contexts(query, top_k)
+        t0 = time.perf_counter()
+        key = (await self._cache_keys([query], top_k, filters))[0]
+        cached = self.cache.get(key) if key else None
+        record("cache_lookup", t0, timings)
+        if cached is not None:
+            return self._response({**cached, "cached": True}, start_time, timings)
         
-        if not contexts:
-            response = {
-                "answer": "I couldn't find any relevant information in the HR policies to answer your question.",
-                "contexts": [],
-                "sources": [],
-                "cached": False,
-                "latency_ms": int((time.time() - start_time) * 1000)
-            }
-            return response
-        
-        # Step 2: Generate answer using LLM
-        answer = await self._synthesize_answer(query, contexts)
+        # Misses for the same question join the one already in flight
+        flight = key or content_key("hr_answer", normalize_query(query), top_k, filters or {})
+        (payload, reused, stages), _ = await self.flights.run(
+            flight, lambda: self._answer_uncached(query, top_k, filters, key)
+        )
+        return self._response({**payload, "cached": reused}, start_time, {**timings, **stages})
+
+    @staticmethod
+    def _response(result: Dict[str, Any], start_time: float, timings: Dict[str, float]) -> Dict[str, Any]:
+        result["latency_ms"] = int((time.time() - start_time) * 1000)
+        if settings.debug_timings:
+            result["timings"] = timings
+        return result
+
+    async def _answer_uncached(
+        self, query: str, top_k: int, filters: Optional[Dict[str, Any]], key: Optional[str]
+    ) -> Tuple[Dict[str, Any], bool, Dict[str, float]]:
+        """Retrieve and synthesize under admission control: (payload, semantic hit, timings)"""
+        timings: Dict[str, float] = {}
+        t0 = time.perf_counter()
+        async with REQUEST_GATE.admit():
+            record("admission", t0, timings)
+            # Step 1: Retrieve relevant contexts
+            embedding = self._embed_query(query)
+            contexts = await self._retrieve_contexts(query, top_k, timings, filters, embedding)
+            
+            # Step 2: Generate answer using LLM (failures are answered, not cached)
+            answer = NO_CONTEXT_ANSWER
+            failed = reused = False
+            if contexts:
+                try:
+                    answer, reused = await self._synthesize_cached(query, contexts, embedding, timings)
+                except Exception as e:
+                    answer = f"I encountered an error while processing your question: {str(e)}"
+                    failed = True
+            elif embedding is not None:
+                embedding.cancel()
         
         # Step 3: Prepare response
-        sources = [
+        payload = {
+            "answer": answer,
+            "contexts": [ctx["text"] for ctx in contexts],
+            "sources": self._format_sources(contexts),
+        }
+        if key and not failed:
+            self.cache.set(key, payload)
+        return payload, reused, timings
+
+    async def answer_batch(
+        self, queries: List[str], top_k: 'Optional[int]' = None, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Answer many questions at once: one embedding batch, one multi-query
+        search, then LLM synthesis fanned out under ``batch_llm_concurrency``.
+
+        A failed synthesis is reported on its item (``error``) instead of
+        failing the batch.
+        """
+        start = time.perf_counter()
+        top_k = top_k or settings.top_k_retrieval
+        keys = await self._cache_keys(queries, top_k, filters)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                results[i] = {"query": queries[i], **cached, "cached": True, "error": None}
+
+        # Only cache misses are retrieved and synthesized
+        misses = [i for i, item in enumerate(results) if item is None]
+        if misses:
+            async with REQUEST_GATE.admit():
+                await self._answer_misses(queries, misses, keys, results, top_k, filters)
+        return {
+            "results": results,
+            "failed": sum(1 for item in results if item["error"]),
+            "latency_ms": int((time.perf_counter() - start) * 1000),
+        }
+
+    async def _answer_misses(
+        self,
+        queries: List[str],
+        misses: List[int],
+        keys: List[Optional[str]],
+        results: List[Optional[Dict[str, Any]]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+    ) -> None:
+        """Fill ``results[i]`` for every cache miss ``i`` of a batch"""
+        miss_queries = [queries[i] for i in misses]
+        embeddings = None
+        if (settings.retrieval_mode != "lexical" or self.semantic_cache is not None):
+            t0 = time.perf_counter()
+            embeddings = await embedding_dispatcher.embed(miss_queries)
+            record("embed", t0)
+        batch_contexts = await self._retrieve_contexts_batch(miss_queries, top_k, filters, embeddings)
+        slots = asyncio.Semaphore(max(1, settings.batch_llm_concurrency))
+
+        async def answer_one(j: int, contexts: List[Dict[str, Any]]) -> None:
+            i = misses[j]
+            item = {
+                "query": queries[i],
+                "answer": NO_CONTEXT_ANSWER,
+                "contexts": [ctx["text"] for ctx in contexts],
+                "sources": self._format_sources(contexts),
+                "cached": False,
+                "error": None,
+            }
+            if contexts:
+                try:
+                    async with slots:
+                        item["answer"], item["cached"] = await self._synthesize_cached(
+                            queries[i], contexts, embeddings[j] if embeddings is not None else None
+                        )
+                except Exception as e:
+                    item["answer"] = None
+                    item["error"] = str(e)
+            if keys[i] and item["error"] is None:
+                self.cache.set(keys[i], {f: item[f] for f in ("answer", "contexts", "sources")})
+            results[i] = item
+
+        await asyncio.gather(*(answer_one(j, c) for j, c in enumerate(batch_contexts)))
+
+    async def stream_answer(
+        self, query: str, top_k: 'Optional[int]' = None, filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Streaming RAG pipeline: sources first, then token deltas, then timings"""
+        start = time.perf_counter()
+        top_k = top_k or settings.top_k_retrieval
+        timings: Dict[str, float] = {}
+
+        key = (await self._cache_keys([query], top_k, filters))[0]
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            yield "sources", {"contexts": cached["contexts"], "sources": cached["sources"]}
+            yield "delta", {"text": cached["answer"]}
+            yield "done", {"cached": True, "latency_ms": int((time.perf_counter() - start) * 1000), "timings": timings}
+            return
+
+        async with REQUEST_GATE.admit():
+            embedding = self._embed_query(query)
+            contexts = await self._retrieve_contexts(query, top_k, timings, filters, embedding)
+            payload = {
+                "contexts": [ctx["text"] for ctx in contexts],
+                "sources": self._format_sources(contexts),
+            }
+            yield "sources", payload
+
+            reused = self._semantic_get(await embedding, contexts) if contexts and embedding is not None else None
+            if not contexts:
+                if embedding is not None:
+                    embedding.cancel()
+                answer = NO_CONTEXT_ANSWER
+                yield "delta", {"text": answer}
+            elif reused is not None:
+                answer = reused
+                yield "delta", {"text": answer}
+            else:
+                parts: List[str] = []
+                llm_start = time.perf_counter()
+                async for delta in self.llm_client.stream_response(self._build_messages(query, contexts)):
+                    if "first_token_ms" not in timings:
+                        record("first_token", start, timings)
+                    parts.append(delta)
+                    yield "delta", {"text": delta}
+                record("llm", llm_start, timings)
+                answer = "".join(parts).strip()
+                if embedding is not None:
+                    self._semantic_set(await embedding, contexts, answer)
+
+            # Only a stream that ran to completion is cached
+            if key:
+                self.cache.set(key, {**payload, "answer": answer})
+            yield "done", {
+                "cached": reused is not None,
+                "latency_ms": int((time.perf_counter() - start) * 1000),
+                "timings": timings,
+            }
+
+    async def _cache_keys(
+        self, queries: Sequence[str], top_k: int, filters: Optional[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """Answer-cache keys (None when caching is off) for the current HR index generation"""
+        if self.cache is None:
+            return [None] * len(queries)
+        # Pick up a newly published index first, so stale answers are never served
+        await run_in_stage("search", HR_INDEX.refresh)
+        generation = HR_INDEX.generation
+        return [
+            content_key("hr_answer", normalize_query(query), top_k, MODEL_NAME, generation,
+                        filters or {}, settings.retrieval_mode)
+            for query in queries
+        ]
+
+    def _embed_query(self, query: str) -> 'Optional[asyncio.Future]':
+        """Start embedding ``query`` if dense retrieval or the semantic cache needs it"""
+        if settings.retrieval_mode == "lexical" and self.semantic_cache is None:
+            return None
+        return asyncio.ensure_future(embedding_dispatcher.embed_one(query))
+
+    async def _synthesize_cached(
+        self,
+        query: str,
+        contexts: List[Dict[str, Any]],
+        embedding: Any = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[str, bool]:
+        """``_synthesize_answer`` behind the semantic cache: (answer, reused)"""
+        if embedding is not None and not isinstance(embedding, np.ndarray):
+            embedding = await embedding
+        if embedding is not None:
+            reused = self._semantic_get(embedding, contexts)
+            if reused is not None:
+                return reused, True
+        answer = await self._synthesize_answer(query, contexts, timings)
+        if embedding is not None:
+            self._semantic_set(embedding, contexts, answer)
+        return answer, False
+
+    @staticmethod
+    def _context_ids(contexts: List[Dict[str, Any]]) -> List[Any]:
+        return [chunk_id for ctx in contexts for chunk_id in ctx["ids"]]
+
+    def _semantic_get(self, embedding: np.ndarray, contexts: List[Dict[str, Any]]) -> Optional[str]:
+        if self.semantic_cache is None:
+            return None
+        return self.semantic_cache.get(embedding, self._context_ids(contexts), MODEL_NAME)
+
+    def _semantic_set(self, embedding: np.ndarray, contexts: List[Dict[str, Any]], answer: str) -> None:
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(embedding, self._context_ids(contexts), answer, MODEL_NAME)
+
+    @staticmethod
+    def _format_sources(contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not settings.include_sources:
+            return []
+        return [
             {
                 "source": ctx["meta"]["source"],
                 "chunk": ctx["meta"]["chunk"],
@@ -44,40 +319,146 @@ class RAGService:
             }
             for ctx in contexts
         ]
-        
-        response = {
-            "answer": answer,
-            "contexts": [ctx["text"] for ctx in contexts],
-            "sources": sources if settings.include_sources else [],
-            "cached": False,
-            "latency_ms": int((time.time() - start_time) * 1000)
-        }
-        return response
     
-    async def _retrieve_contexts(self, query: str, top_k: int) -> List[Dict[str, Any]]:
-        """Retrieve and rank relevant document chunks"""
-        # Ensure HR index is loaded
-        HR_INDEX.load()
-        # Always compute fresh embedding (no embedding cache)
-        query_embedding = embeddings.embed_one(query)
-
-        # Search for similar chunks
-        results = HR_INDEX.search(query_embedding, k=top_k)
-
-        # Filter and prepare contexts
-        contexts: List[Dict[str, Any]] = []
-        total_chars = 0
-
-        for result in results:
-            if total_chars + len(result["text"]) > settings.max_context_length:
-                break
-            contexts.append(result)
-            total_chars += len(result["text"])
+    async def _retrieve_contexts(
+        self,
+        query: str,
+        top_k: int,
+        timings: Optional[Dict[str, float]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        embedding: 'Optional[Awaitable[np.ndarray]]' = None,
+    ) -> List[Dict[str, Any]]:
+        """Retrieve and rank relevant document chunks, optionally only those
+        whose metadata matches ``filters`` (e.g. ``{"source": "leave.pdf"}``)"""
+        timings = timings if timings is not None else {}
+        mode = settings.retrieval_mode
+        candidates = max(top_k, settings.hybrid_candidates) if mode == "hybrid" else top_k
 
+        # Dense and lexical retrieval run concurrently, then get fused by rank
+        retrievers = []
+        if mode != "lexical":
+            retrievers.append(self._dense_search(query, candidates, timings, filters, embedding))
+        if mode != "dense":
+            retrievers.append(self._lexical_search(query, candidates, timings, filters))
+        rankings = await asyncio.gather(*retrievers)
+        t0 = time.perf_counter()
+        contexts = self._pack_contexts(self._fuse(rankings, top_k))
+        record("pack", t0, timings)
         return contexts
+
+    async def _retrieve_contexts_batch(
+        self,
+        queries: List[str],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+        embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """``_retrieve_contexts`` for many queries with one embed and one search call"""
+        mode = settings.retrieval_mode
+        candidates = max(top_k, settings.hybrid_candidates) if mode == "hybrid" else top_k
+        retrievers = []
+        if mode != "lexical":
+            retrievers.append(self._dense_search_batch(queries, candidates, filters, embeddings))
+        if mode != "dense":
+            retrievers.append(run_in_stage("search", self._search_lexical_batch, queries, candidates, filters))
+        batch_rankings = await asyncio.gather(*retrievers)
+        return [
+            self._pack_contexts(self._fuse([rankings[i] for rankings in batch_rankings], top_k))
+            for i in range(len(queries))
+        ]
+
+    @staticmethod
+    def _fuse(rankings: Sequence[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        if len(rankings) == 1:
+            return rankings[0][:top_k]
+        return reciprocal_rank_fusion(rankings, settings.rrf_k)[:top_k]
+
+    @staticmethod
+    def _pack_contexts(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep results in rank order, merging overlapping chunks, until the
+        context token budget is used up"""
+        return pack_contexts(results, settings.max_context_tokens)
     
-    async def _synthesize_answer(self, query: str, contexts: List[Dict[str, Any]]) -> str:
+    async def _dense_search(
+        self,
+        query: str,
+        k: int,
+        timings: Dict[str, float],
+        filters: Optional[Dict[str, Any]],
+        embedding: 'Optional[Awaitable[np.ndarray]]' = None,
+    ) -> List[Dict[str, Any]]:
+        # Always compute fresh embedding (batched with concurrent queries)
+        t0 = time.perf_counter()
+        query_embedding = await (embedding if embedding is not None else embedding_dispatcher.embed_one(query))
+        record("embed", t0, timings)
+
+        # Search for similar chunks (off the event loop)
+        t0 = time.perf_counter()
+        results = await run_in_stage("search", self._search, query_embedding, k, filters)
+        record("search", t0, timings)
+        return results
+
+    async def _lexical_search(
+        self, query: str, k: int, timings: Dict[str, float], filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        results = await run_in_stage("search", self._search_lexical, query, k, filters)
+        record("lexical", t0, timings)
+        return results
+
+    async def _dense_search_batch(
+        self,
+        queries: List[str],
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        query_embeddings: Optional[np.ndarray] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        if query_embeddings is None:
+            query_embeddings = await embedding_dispatcher.embed(queries)
+        return await run_in_stage("search", self._search_batch, query_embeddings, k, filters)
+
+    @staticmethod
+    def _search_batch(query_embeddings, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        HR_INDEX.refresh()
+        return HR_INDEX.search_batch(query_embeddings, k=top_k, filters=filters)
+
+    @staticmethod
+    def _search_lexical_batch(
+        queries: List[str], top_k: int, filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        HR_INDEX.refresh()
+        return [HR_INDEX.lexical_search(query, k=top_k, filters=filters) for query in queries]
+
+    @staticmethod
+    def _search_lexical(query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 counterpart of ``_search``; runs in the search thread pool"""
+        HR_INDEX.refresh()
+        return HR_INDEX.lexical_search(query, k=top_k, filters=filters)
+
+    @staticmethod
+    def _search(query_embedding, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Blocking part of retrieval; runs in the search thread pool"""
+        # Pick up a newly published HR index generation (no-op otherwise)
+        HR_INDEX.refresh()
+        return HR_INDEX.search(query_embedding, k=top_k, filters=filters)
+
+    async def _synthesize_answer(
+        self, query: str, contexts: List[Dict[str, Any]], timings: Optional[Dict[str, float]] = None
+    ) -> str:
         """Use LLM to synthesize answer from retrieved contexts"""
+        t0 = time.perf_counter()
+        messages = self._build_messages(query, contexts)
+        record("prompt", t0, timings)
+
+        # Generate response (errors propagate so callers can report them)
+        t0 = time.perf_counter()
+        answer = await self.llm_client.generate_response(messages)
+        record("llm", t0, timings)
+        return answer.strip()
+
+    @staticmethod
+    def _build_messages(query: str, contexts: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for answer synthesis"""
         
         # Build context string
         context_parts = []
@@ -110,13 +491,7 @@ Please provide a clear, helpful answer based on the context above."""
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        # Generate response
-        try:
-            answer = await self.llm_client.generate_response(messages)
-            return answer.strip()
-        except Exception as e:
-            return f"I encountered an error while processing your question: {str(e)}"
+        return messages
 
 # Global RAG service instance
 rag_service = RAGService()
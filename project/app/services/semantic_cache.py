@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+import faiss  # type: ignore
+
+# Best-similarity buckets reported by stats(), for tuning the threshold
+_HISTOGRAM_EDGES = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98)
+
+
+class SemanticCache:
+    """Answers of past queries, found again by embedding similarity.
+
+    Query embeddings live in a small exact inner-product FAISS index (vectors
+    are L2-normalised, so scores are cosine similarities). A lookup is a hit
+    only if a stored query is at least ``threshold`` similar *and* was
+    answered from the same set of retrieved chunks, so a paraphrase reuses
+    an answer only when the evidence is identical. ``scope`` separates
+    answers that must never be shared (e.g. different models).
+
+    Bounded to ``max_entries`` with LRU eviction; thread-safe.
+    """
+
+    def __init__(self, dim: Optional[int] = None, threshold: float = 0.92, max_entries: int = 2048,
+                 probe: int = 4) -> None:
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.probe = max(1, probe)
+        self._dim = dim
+        self._index: Optional[faiss.Index] = None
+        self._entries: "OrderedDict[int, Tuple[Hashable, Tuple[Any, ...], Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.context_mismatches = 0
+        self._histogram = [0] * (len(_HISTOGRAM_EDGES) + 1)
+
+    @staticmethod
+    def _normalized(embedding: np.ndarray) -> np.ndarray:
+        vec = np.array(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vec)
+        return vec
+
+    def get(self, embedding: np.ndarray, context_ids: Sequence[Any], scope: Hashable = None) -> Optional[Any]:
+        """Stored value for a similar query answered from ``context_ids``, else None"""
+        signature = tuple(sorted(context_ids))
+        vec = self._normalized(embedding)
+        with self._lock:
+            if self._index is None or not self._entries:
+                self.misses += 1
+                self._histogram[0] += 1
+                return None
+            D, I = self._index.search(vec, min(self.probe, len(self._entries)))
+            best = float(D[0][0]) if I[0][0] >= 0 else -1.0
+            self._histogram[int(np.searchsorted(_HISTOGRAM_EDGES, best, side="right"))] += 1
+            similar = False
+            for score, entry_id in zip(D[0], I[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry[0] != scope:
+                    continue
+                similar = True
+                if entry[1] == signature:
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    return entry[2]
+            if similar:
+                self.context_mismatches += 1
+            self.misses += 1
+            return None
+
+    def set(self, embedding: np.ndarray, context_ids: Sequence[Any], value: Any, scope: Hashable = None) -> None:
+        vec = self._normalized(embedding)
+        with self._lock:
+            if self._index is None:
+                self._dim = vec.shape[1]
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(self._dim))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vec, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = (scope, tuple(sorted(context_ids)), value)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if evicted:
+                self._index.remove_ids(np.asarray(evicted, dtype=np.int64))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._index is not None:
+                self._index.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        labels = [f"<{_HISTOGRAM_EDGES[0]}"] + [f">={edge}" for edge in _HISTOGRAM_EDGES]
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "context_mismatches": self.context_mismatches,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "best_similarity": dict(zip(labels, self._histogram)),
+        }
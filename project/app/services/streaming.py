@@ -0,0 +1,62 @@
+import json
+from typing import Any, AsyncGenerator, AsyncIterator, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from app.services.admission import AdmissionGate
+
+# (event name, JSON-serialisable payload) pairs produced by the services
+StreamEvent = Tuple[str, Any]
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class EventStreamResponse(StreamingResponse):
+    """``StreamingResponse`` that closes its event stream as soon as the
+    response ends, even when the client disconnects mid-stream.
+
+    Service streams hold resources across ``yield`` (an admission slot, an
+    upstream LLM call); without this they would be released only when the
+    abandoned generator is garbage-collected.
+    """
+
+    def __init__(self, events: AsyncGenerator[StreamEvent, None], **kwargs: Any) -> None:
+        self.events = events
+
+        async def body() -> AsyncIterator[str]:
+            try:
+                async for event, data in events:
+                    yield sse_event(event, data)
+            except Exception as e:
+                yield sse_event("error", {"detail": str(e)})
+
+        super().__init__(body(), **kwargs)
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            await self.events.aclose()
+
+
+def sse_response(
+    events: AsyncGenerator[StreamEvent, None], gate: Optional[AdmissionGate] = None
+) -> StreamingResponse:
+    """Wrap a service event stream in a text/event-stream response.
+
+    Failures after the headers are sent cannot change the status code, so
+    they are reported to the client as a final ``error`` event. With
+    ``gate``, load is shed (``AdmissionRejected``, a 429) before the stream
+    opens and the status code is fixed.
+    """
+    if gate is not None:
+        gate.check()
+    return EventStreamResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
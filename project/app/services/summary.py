@@ -1,70 +1,244 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import asyncio
 import time
-from app.services.llm import get_llm_client
+from app.services.admission import REQUEST_GATE, SingleFlight
+from app.services.cache import LRUCache, content_key
+from app.services.chunking import anchored_chunks, is_anchor
+from app.services.llm import MODEL_NAME, get_llm_client
+from app.services.metrics import record
+from app.services.streaming import StreamEvent
 from app.config import settings
 
+SUMMARY_SYSTEM_PROMPT = """You are an expert meeting summarizer. Create concise, structured summaries of meeting transcripts.
+
+SUMMARY FORMAT:
+## Meeting Overview
+[Brief 1-2 sentence overview]
+
+## Key Discussions
+[Main topics and decisions, bullet points]
+
+## Action Items
+[Who needs to do what, with deadlines if mentioned]
+
+## Next Steps
+[Follow-up meetings, decisions needed, etc.]
+
+Keep summaries professional, actionable, and well-organized."""
+
+# Map/reduce prompts are title- and position-free on purpose: a chunk's notes
+# only depend on its own text, so unchanged chunks hit the cache on re-upload.
+MAP_SYSTEM_PROMPT = """You are condensing one excerpt of a longer meeting transcript.
+Write compact bullet-point notes covering decisions, key discussion points,
+action items (with owners and deadlines if mentioned) and open questions.
+Do not add information that is not in the excerpt."""
+
+REDUCE_SYSTEM_PROMPT = """You are merging bullet-point notes taken from consecutive excerpts of one meeting.
+Combine them into a single set of compact notes, removing duplicates while keeping
+every decision, action item (with owner and deadline) and open question."""
+
+
+class SummaryFailed(RuntimeError):
+    """Raised when the LLM could not produce a summary; the API answers 502."""
+
+
 class SummaryService:
-    """LLM-powered meeting summarization service"""
-    
+    """LLM-powered meeting summarization service
+
+    Short transcripts are summarized in one pass. Longer ones are split with
+    ``anchored_chunks``, summarized per chunk concurrently (map), and merged
+    in one or more reduce passes. Every LLM completion is cached by a hash of
+    its exact prompt, and chunk and reduce-group boundaries are anchored on
+    content rather than offsets, so re-summarizing an edited transcript only
+    pays for the chunks around the edit.
+    """
+
     def __init__(self):
         self.llm_client = get_llm_client()
-    
+        self.cache = LRUCache(settings.summary_cache_size, settings.summary_cache_ttl_seconds)
+        # The same transcript submitted twice at once is summarized once
+        self.flights = SingleFlight()
+
     async def summarize_text(self, text: str, meeting_title: str = "Meeting") -> Dict[str, Any]:
         """Summarize meeting text using LLM"""
         start_time = time.time()
-        
-    # Caching removed for simplicity; always compute fresh summary
-        
-        # Generate summary using LLM
-        summary = await self._generate_summary(text, meeting_title)
-        
+        (summary, stats, timings), _ = await self.flights.run(
+            content_key("summary", MODEL_NAME, meeting_title, text),
+            lambda: self._summarize_admitted(text, meeting_title),
+        )
+
         response = {
             "summary": summary,
             "meeting_title": meeting_title,
             "text_length": len(text),
-            "cached": False,
+            "cached": stats["llm_calls"] == 0 and stats["cache_hits"] > 0,
             "latency_ms": int((time.time() - start_time) * 1000)
         }
-        
+        if settings.debug_timings:
+            response["timings"] = timings
+
         return response
-    
-    async def _generate_summary(self, text: str, meeting_title: str) -> str:
-        """Generate meeting summary using LLM"""
-        
-        system_prompt = """You are an expert meeting summarizer. Create concise, structured summaries of meeting transcripts.
 
-SUMMARY FORMAT:
-## Meeting Overview
-[Brief 1-2 sentence overview]
+    async def _summarize_admitted(
+        self, text: str, meeting_title: str
+    ) -> Tuple[str, Dict[str, int], Dict[str, float]]:
+        stats = self._new_stats()
+        timings: Dict[str, float] = {}
+        t0 = time.perf_counter()
+        async with REQUEST_GATE.admit():
+            record("admission", t0, timings)
+            # Generate summary using LLM
+            summary = await self._generate_summary(text, meeting_title, stats, timings)
+        return summary, stats, timings
 
-## Key Discussions
-[Main topics and decisions, bullet points]
+    async def stream_summary(self, text: str, meeting_title: str = "Meeting") -> AsyncIterator[StreamEvent]:
+        """Stream a summary as token deltas, finishing with latency and timings"""
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        stats = self._new_stats()
+        yield "start", {"meeting_title": meeting_title, "text_length": len(text)}
 
-## Action Items
-[Who needs to do what, with deadlines if mentioned]
+        async with REQUEST_GATE.admit():
+            # Map/reduce passes (if any) run first; only the final pass streams
+            messages = await self._final_messages(text, meeting_title, stats)
+            record("prepare", start, timings)
+            key = self._cache_key(messages)
+            cached_summary = self.cache.get(key)
+            if cached_summary is not None:
+                stats["cache_hits"] += 1
+                record("first_token", start, timings)
+                yield "delta", {"text": cached_summary}
+            else:
+                stats["llm_calls"] += 1
+                parts: List[str] = []
+                llm_start = time.perf_counter()
+                async for delta in self.llm_client.stream_response(messages):
+                    if "first_token_ms" not in timings:
+                        record("first_token", start, timings)
+                    parts.append(delta)
+                    yield "delta", {"text": delta}
+                record("llm", llm_start, timings)
+                self.cache.set(key, "".join(parts).strip())
 
-## Next Steps
-[Follow-up meetings, decisions needed, etc.]
+            yield "done", {
+                "cached": stats["llm_calls"] == 0,
+                "latency_ms": int((time.perf_counter() - start) * 1000),
+                "timings": timings,
+                "chunks": stats["chunks"],
+            }
 
-Keep summaries professional, actionable, and well-organized."""
-        
+    async def _generate_summary(
+        self,
+        text: str,
+        meeting_title: str,
+        stats: Dict[str, int],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """Generate meeting summary using LLM; raises ``SummaryFailed`` if any pass fails"""
+        try:
+            t0 = time.perf_counter()
+            messages = await self._final_messages(text, meeting_title, stats)
+            record("prepare", t0, timings)
+            t0 = time.perf_counter()
+            summary = await self._complete(messages, stats)
+            record("summary_final", t0, timings)
+        except Exception as e:
+            raise SummaryFailed(f"Error generating summary: {str(e)}") from e
+        if not summary:
+            raise SummaryFailed("Error generating summary: the model returned no text")
+        return summary
+
+    async def _final_messages(self, text: str, meeting_title: str, stats: Dict[str, int]) -> List[Dict[str, str]]:
+        """Messages for the final summary pass, running map/reduce first if needed"""
+        if len(text) <= settings.summary_single_pass_chars:
+            return self._build_messages(text, meeting_title)
+
+        chunks = anchored_chunks(text, settings.summary_chunk_size, settings.summary_chunk_overlap)
+        stats["chunks"] = len(chunks)
+        slots = asyncio.Semaphore(settings.summary_map_concurrency)
+
+        async def condense(system_prompt: str, content: str) -> str:
+            async with slots:
+                return await self._complete(
+                    [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}],
+                    stats,
+                )
+
+        # Map: notes per chunk, concurrently under the cap
+        notes = list(await asyncio.gather(*(condense(MAP_SYSTEM_PROMPT, chunk) for chunk in chunks)))
+
+        # Reduce: merge neighbouring notes until they fit in a single pass
+        while len("\n\n".join(notes)) > settings.summary_single_pass_chars and len(notes) > 1:
+            groups = self._group_notes(notes, settings.summary_single_pass_chars)
+            notes = list(await asyncio.gather(*(
+                condense(REDUCE_SYSTEM_PROMPT, "\n\n".join(group)) if len(group) > 1 else _done(group[0])
+                for group in groups
+            )))
+
+        return self._build_messages("\n\n".join(notes), meeting_title, from_notes=True)
+
+    @staticmethod
+    def _group_notes(notes: List[str], budget: int) -> List[List[str]]:
+        """Pack consecutive notes into groups under ``budget`` chars (min two per
+        group), ending a group early after an ``is_anchor`` note so unchanged
+        notes keep landing in the same (cached) reduce prompts"""
+        groups: List[List[str]] = []
+        current: List[str] = []
+        size = 0
+        for note in notes:
+            if len(current) >= 2 and size + len(note) > budget:
+                groups.append(current)
+                current, size = [], 0
+            current.append(note)
+            size += len(note) + 2
+            if len(current) >= 2 and is_anchor(note, budget / 2):
+                groups.append(current)
+                current, size = [], 0
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _complete(self, messages: List[Dict[str, str]], stats: Dict[str, int]) -> str:
+        """One LLM completion, served from the content-hash cache when possible"""
+        key = self._cache_key(messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            stats["cache_hits"] += 1
+            return cached
+        stats["llm_calls"] += 1
+        result = (await self.llm_client.generate_response(messages)).strip()
+        self.cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _cache_key(messages: List[Dict[str, str]]) -> str:
+        return content_key(MODEL_NAME, settings.llm_temperature, settings.max_tokens, messages)
+
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        return {"llm_calls": 0, "cache_hits": 0, "chunks": 1}
+
+    @staticmethod
+    def _build_messages(text: str, meeting_title: str, from_notes: bool = False) -> List[Dict[str, str]]:
+        """Build the chat messages for the final summary pass"""
+
+        content_label = "Meeting Notes (condensed from a long transcript)" if from_notes else "Meeting Content"
         user_prompt = f"""Meeting Title: {meeting_title}
 
-Meeting Content:
+{content_label}:
 {text}
 
 Please provide a structured summary following the format above."""
-        
+
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt}
         ]
-        
-        try:
-            summary = await self.llm_client.generate_response(messages)
-            return summary.strip()
-        except Exception as e:
-            return f"Error generating summary: {str(e)}"
+        return messages
+
+
+async def _done(value: str) -> str:
+    return value
 
 # Global summary service instance
 summary_service = SummaryService()
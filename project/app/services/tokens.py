@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.config import settings
+
+# Rough chars-per-token of English BPE vocabularies, used without tiktoken
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str) -> Optional[Any]:
+    try:
+        import tiktoken  # optional: exact counts for OpenAI-style BPE models
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def load_tokenizer() -> bool:
+    """Load the context tokenizer ahead of the first request (tiktoken reads
+    or downloads its BPE ranks on first use); False if falling back to estimates"""
+    return _encoding(settings.context_tokenizer) is not None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens in ``text`` (tiktoken when installed, else an estimate)"""
+    encoding = _encoding(settings.context_tokenizer)
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode_ordinary(text))
@@ -0,0 +1,207 @@
+import asyncio
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, List, Optional
+
+from fastapi import Request
+
+from app.config import settings
+from app.services.executors import run_in_stage
+from app.services.metrics import record
+from app.services.pdf import extract_pdf_pages, pdf_page_count
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Room for the multipart framing and the small text fields next to the file
+_FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds ``max_file_size_mb``; the API answers 413."""
+
+    def __init__(self, limit_mb: int) -> None:
+        super().__init__(f"File exceeds the {limit_mb} MB upload limit")
+
+
+class InvalidUpload(ValueError):
+    """Raised for a malformed or incomplete upload form; the API answers 400."""
+
+
+class UploadForm:
+    """A multipart form received by ``receive_upload_form``. ``path`` is the
+    spooled file (the caller deletes it), ``fields`` the other form values."""
+
+    __slots__ = ("path", "filename", "fields")
+
+    def __init__(self, path: Path, filename: str, fields: Dict[str, str]) -> None:
+        self.path = path
+        self.filename = filename
+        self.fields = fields
+
+
+class _FormSpooler:
+    """``MultipartParser`` callbacks writing one file part straight to a temp file"""
+
+    def __init__(self, file_field: str, suffix: str, limit: int) -> None:
+        self.file_field = file_field
+        self.suffix = suffix
+        self.limit = limit
+        self.path: Optional[Path] = None
+        self.filename = ""
+        self.fields: Dict[str, str] = {}
+        self._out: Optional[BinaryIO] = None
+        self._written = 0
+        self._field: Optional[str] = None
+        self._value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self.complete = False
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._field = None
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if filename is None:
+            self._field = name
+        elif name == self.file_field and self.path is None:
+            fd, tmp = tempfile.mkstemp(prefix="onedesk-upload-", suffix=self.suffix)
+            self.path = Path(tmp)
+            self.filename = filename.decode("utf-8", "replace")
+            self._out = os.fdopen(fd, "wb")
+        # any other file part is skipped
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._out is not None:
+            self._written += end - start
+            if self._written > self.limit:
+                raise UploadTooLarge(settings.max_file_size_mb)
+            self._out.write(data[start:end])
+        elif self._field is not None:
+            self._value += data[start:end]
+            if len(self._value) > _FORM_OVERHEAD:
+                raise InvalidUpload(f"Form field {self._field!r} is too large")
+
+    def on_part_end(self) -> None:
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        elif self._field is not None:
+            self.fields[self._field] = self._value.decode("utf-8", "replace")
+            self._field = None
+
+    def on_end(self) -> None:
+        self.complete = True
+
+    def discard(self) -> None:
+        if self._out is not None:
+            self._out.close()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+async def receive_upload_form(request: Request, file_field: str, suffix: str = "") -> UploadForm:
+    """Stream a multipart request body to disk, enforcing ``max_file_size_mb``.
+
+    Runs before anything is read: an oversized ``Content-Length`` is
+    rejected outright, and bodies without one are cut off as soon as they
+    pass the limit. The ``file_field`` part is written straight to a temp
+    file as it arrives, with no second copy. Malformed forms, and bodies that
+    end before the closing boundary, raise ``InvalidUpload``.
+    """
+    limit = settings.max_file_size_mb * 1024 * 1024
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit + _FORM_OVERHEAD:
+        raise UploadTooLarge(settings.max_file_size_mb)
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise InvalidUpload("Expected a multipart/form-data upload")
+
+    spooler = _FormSpooler(file_field, suffix, limit)
+    callbacks = {
+        name: getattr(spooler, name)
+        for name in ("on_part_begin", "on_part_data", "on_part_end", "on_header_field",
+                     "on_header_value", "on_header_end", "on_headers_finished", "on_end")
+    }
+    parser = MultipartParser(params[b"boundary"], callbacks)
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit + _FORM_OVERHEAD:
+                raise UploadTooLarge(settings.max_file_size_mb)
+            parser.write(chunk)
+        parser.finalize()
+        if not spooler.complete:
+            # A dropped connection must not pass a truncated file downstream
+            raise InvalidUpload("Upload form ended before its closing boundary")
+    except (UploadTooLarge, InvalidUpload):
+        spooler.discard()
+        raise
+    except ValueError as e:  # python-multipart's parse errors
+        spooler.discard()
+        raise InvalidUpload(f"Malformed multipart form: {e}") from e
+    except BaseException:
+        spooler.discard()
+        raise
+    if spooler.path is None:
+        raise InvalidUpload(f"Missing file field {file_field!r}")
+    return UploadForm(spooler.path, spooler.filename, spooler.fields)
+
+
+async def iter_pdf_text(path: Path) -> AsyncIterator[str]:
+    """Page texts of a PDF on disk, in order.
+
+    Small documents are parsed by one PDF worker; larger ones are split into
+    at most two page ranges per worker and parsed in parallel. Workers open
+    the file themselves, so the PDF bytes never pass through this process.
+    """
+    pages = await run_in_stage("pdf", pdf_page_count, str(path))
+    per_task = max(settings.pdf_pages_per_task, -(-pages // (2 * settings.pdf_workers)))
+    ranges = [(start, min(start + per_task, pages)) for start in range(0, pages, per_task)]
+    tasks: List["asyncio.Future[List[str]]"] = [
+        asyncio.ensure_future(run_in_stage("pdf", extract_pdf_pages, str(path), start, stop))
+        for start, stop in ranges
+    ]
+    try:
+        for task in tasks:
+            for page in await task:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def read_pdf_text(path: Path) -> str:
+    """Text of a spooled PDF, pages joined by newlines as they are extracted"""
+    t0 = time.perf_counter()
+    buf = io.StringIO()
+    async for page in iter_pdf_text(path):
+        if buf.tell():
+            buf.write("\n")
+        buf.write(page)
+    text = buf.getvalue()
+    buf.close()
+    record("pdf_extract", t0)
+    return text.strip()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Load state and timing of each component warmed up at startup.
+
+    A component is ``pending`` until warm-up reaches it, then ``loading``,
+    then ``ready``, ``missing`` (nothing on disk yet, e.g. an index that was
+    never built) or ``failed`` (retried by ``warm_up``). The service is ready once no required
+    component is still pending, loading or failed; optional ones are only
+    reported.
+    """
+
+    def __init__(self) -> None:
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._started = time.perf_counter()
+
+    def register(self, name: str, required: bool = True) -> None:
+        self._components[name] = {"state": "pending", "required": required, "ms": None, "error": None}
+
+    def mark(self, name: str, state: str, ms: Optional[float] = None, error: Optional[str] = None) -> None:
+        self._components[name].update(state=state, ms=ms, error=error)
+
+    @property
+    def ready(self) -> bool:
+        return all(c["state"] in ("ready", "missing") for c in self._components.values() if c["required"])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.perf_counter() - self._started, 1),
+            "components": {name: dict(c) for name, c in self._components.items()},
+        }
+
+
+async def warm_up(
+    readiness: Readiness,
+    steps: List[Tuple[str, Callable[[], Any]]],
+    retry_seconds: float = 0.0,
+    max_retry_seconds: float = 60.0,
+) -> None:
+    """Run blocking warm-up steps one by one in a worker thread, recording
+    per-step timings, then log the breakdown. A failed step is reported and
+    skipped; requests needing it load it lazily meanwhile. With
+    ``retry_seconds`` failed steps are retried with exponential backoff until
+    they succeed, so a transient failure (model download, unreadable index
+    mid-publish) does not keep ``/readyz`` at 503 for the process lifetime."""
+    total = time.perf_counter()
+    failed = [(name, step) for name, step in steps if not await _run_step(readiness, name, step)]
+    breakdown = ", ".join(
+        f"{name}={c['ms']}ms ({c['state']})" for name, c in readiness.report()["components"].items()
+    )
+    logger.info("warm-up finished in %.0f ms: %s", (time.perf_counter() - total) * 1000, breakdown)
+    delay = retry_seconds
+    while failed and delay > 0:
+        await asyncio.sleep(delay)
+        failed = [(name, step) for name, step in failed if not await _run_step(readiness, name, step)]
+        delay = min(delay * 2, max_retry_seconds)
+    for name, _ in failed:
+        logger.warning("warm-up step %s still failing; not retrying", name)
+
+
+async def _run_step(readiness: Readiness, name: str, step: Callable[[], Any]) -> bool:
+    """Run one step and record its state; False if it raised"""
+    readiness.mark(name, "loading")
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(step)
+    except Exception as e:
+        readiness.mark(name, "failed", round((time.perf_counter() - t0) * 1000, 1), str(e))
+        logger.exception("warm-up step %s failed", name)
+        return False
+    # A step may return False for "nothing to load yet" (e.g. no index built)
+    state = "ready" if result is not False else "missing"
+    readiness.mark(name, state, round((time.perf_counter() - t0) * 1000, 1))
+    return True
@@ -0,0 +1,101 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import faiss  # type: ignore
+
+from app.vectorstores.faiss_store import build_index, search_params
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real embedding spaces than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 100), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, noise: float = 0.05, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of stored vectors, so every query has real neighbours"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(vectors.shape[0], min(n_queries, vectors.shape[0]), replace=False)
+    queries = vectors[rows] + noise * rng.standard_normal((len(rows), vectors.shape[1])).astype(np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def evaluate_factories(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    factories: Sequence[str],
+    k: int = 10,
+    nprobes: Sequence[int] = (),
+    ef_searches: Sequence[int] = (),
+    train_sample: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Recall@k and latency of each index type against the exact flat baseline.
+
+    Every factory is built and trained on ``vectors``, then each runtime knob
+    (nprobe for IVF, efSearch for HNSW) is swept. Latency is measured one
+    query at a time, as the API issues them; QPS uses one batched call.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    flat = faiss.IndexFlatIP(vectors.shape[1])
+    flat.add(vectors)
+    _, truth = flat.search(queries, k)
+
+    rows: List[Dict[str, Any]] = []
+    for factory in ["Flat", *[f for f in factories if f != "Flat"]]:
+        t0 = time.perf_counter()
+        index = build_index(factory, vectors, train_sample, id_mapped=False)
+        train_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.add(vectors)
+        add_s = time.perf_counter() - t0
+        size_bytes = int(faiss.serialize_index(index).nbytes)
+
+        if faiss.try_extract_index_ivf(index) is not None:
+            knobs = [("nprobe", n) for n in (nprobes or [None])]
+        elif isinstance(index, faiss.IndexHNSW):
+            knobs = [("efSearch", e) for e in (ef_searches or [None])]
+        else:
+            knobs = [(None, None)]
+
+        for knob, value in knobs:
+            params = search_params(
+                index,
+                nprobe=value if knob == "nprobe" else None,
+                ef_search=value if knob == "efSearch" else None,
+            )
+            latencies: List[float] = []
+            found = np.empty_like(truth)
+            for i in range(queries.shape[0]):
+                t0 = time.perf_counter()
+                _, I = index.search(queries[i:i + 1], k, params=params)
+                latencies.append(time.perf_counter() - t0)
+                found[i] = I[0]
+            t0 = time.perf_counter()
+            index.search(queries, k, params=params)
+            batch_s = time.perf_counter() - t0
+
+            hits = sum(len(set(found[i]) & set(truth[i])) for i in range(truth.shape[0]))
+            rows.append({
+                "factory": factory,
+                "index_type": type(index).__name__,
+                "knob": knob,
+                "value": value if value is not None else (getattr(params, knob, None) if knob else None),
+                f"recall@{k}": round(hits / truth.size, 4),
+                "p50_ms": _percentile_ms(latencies, 50),
+                "p95_ms": _percentile_ms(latencies, 95),
+                "batch_qps": round(queries.shape[0] / batch_s, 1) if batch_s > 0 else None,
+                "train_s": round(train_s, 3),
+                "add_s": round(add_s, 3),
+                "size_mb": round(size_bytes / 2 ** 20, 2),
+            })
+    return rows
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import io
+import math
+import re
+import struct
+import unicodedata
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Words (any script) plus joined codes such as "hr-101", "w-4" or "form_12b";
+# a joined code is also indexed as its parts so "HR 101" still matches it.
+_TOKEN_RE = re.compile(r"[^\W_]+(?:[-_/.][^\W_]+)*")
+_SPLIT_RE = re.compile(r"[-_/.]")
+
+# Stored with each index; files built by another tokenizer are rebuilt on load
+TOKENIZER_VERSION = 2
+
+# More blocks than this are merged into one on the next extend
+_MAX_BLOCKS = 8
+
+
+def _mapped_npz(path: Path) -> Dict[str, np.ndarray]:
+    """Arrays of an uncompressed ``.npz`` (``np.savez``) as read-only memory
+    maps into the file, so processes loading the same file share its pages"""
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        zf = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{path.name}: {e}") from e
+    with zf, open(path, "rb") as fh:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path.name}: compressed member {info.filename} cannot be mapped")
+            # Data follows the local header, whose extra field may differ from the central one
+            fh.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", fh.read(4))
+            fh.seek(info.header_offset + 30 + name_len + extra_len)
+            fmt = np.lib.format
+            version = fmt.read_magic(fh)
+            read_header = fmt.read_array_header_1_0 if version == (1, 0) else fmt.read_array_header_2_0
+            shape, fortran, dtype = read_header(fh)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if not int(np.prod(shape)):
+                arrays[name] = np.empty(shape, dtype=dtype)
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=fh.tell(), shape=shape,
+                                     order="F" if fortran else "C")
+    return arrays
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    # NFKC folds PDF ligatures and composes accents; casefold also maps "ß" to "ss"
+    for token in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).casefold()):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(_SPLIT_RE.split(token))
+    return tokens
+
+
+def _member(values: np.ndarray, sorted_ids: np.ndarray) -> np.ndarray:
+    """Mask of ``values`` present in the sorted array ``sorted_ids``"""
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[pos] == values
+
+
+def _sum_by_row(rows: np.ndarray, weights: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(distinct rows, summed weights); sorts short posting runs, bincounts long ones"""
+    if len(rows) * 8 > n:
+        scores = np.bincount(rows, weights=weights, minlength=n)
+        matched = np.flatnonzero(scores)  # every BM25 contribution is > 0
+        return matched, scores[matched]
+    order = np.argsort(rows)
+    rows = rows[order]
+    starts = np.concatenate(([0], np.flatnonzero(rows[1:] != rows[:-1]) + 1))
+    return rows[starts], np.add.reduceat(weights[order], starts)
+
+
+class _Postings:
+    """One immutable CSR block: for term t, rows[offsets[t]:offsets[t + 1]] are
+    the documents containing it and tfs the matching term frequencies."""
+
+    __slots__ = ("terms", "offsets", "rows", "tfs", "doc_len", "ids")
+
+    def __init__(
+        self,
+        terms: Dict[str, int],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        tfs: np.ndarray,
+        doc_len: np.ndarray,
+        ids: np.ndarray,
+    ) -> None:
+        self.terms = terms
+        self.offsets = offsets
+        self.rows = rows
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.ids = ids
+
+    @classmethod
+    def build(cls, texts: Sequence[str], ids: Sequence[int]) -> "_Postings":
+        terms: Dict[str, int] = {}
+        term_ids: List[int] = []
+        rows: List[int] = []
+        tfs: List[int] = []
+        doc_len = np.zeros(len(texts), dtype=np.uint32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len[row] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(terms.setdefault(term, len(terms)))
+                rows.append(row)
+                tfs.append(tf)
+        return cls._from_triples(
+            terms,
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(rows, dtype=np.int32),
+            np.minimum(np.asarray(tfs, dtype=np.int64), 0xFFFF).astype(np.uint16),
+            doc_len,
+            np.asarray(ids, dtype=np.int64),
+        )
+
+    @classmethod
+    def _from_triples(cls, terms, term_ids, rows, tfs, doc_len, ids) -> "_Postings":
+        order = np.argsort(term_ids, kind="stable")
+        counts = np.bincount(term_ids, minlength=len(terms))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(terms, offsets, rows[order], tfs[order], doc_len, ids)
+
+    def _term_ids(self) -> np.ndarray:
+        """Term id of every posting"""
+        return np.repeat(np.arange(len(self.terms), dtype=np.int64), np.diff(self.offsets))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def df(self, term: str) -> int:
+        t = self.terms.get(term)
+        return 0 if t is None else int(self.offsets[t + 1] - self.offsets[t])
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        t = self.terms.get(term)
+        if t is None:
+            return None
+        lo, hi = self.offsets[t], self.offsets[t + 1]
+        return self.rows[lo:hi], self.tfs[lo:hi]
+
+    def select(self, keep: np.ndarray) -> "_Postings":
+        """Block restricted to the rows where ``keep`` is True"""
+        new_row = np.cumsum(keep) - 1
+        mask = keep[self.rows]
+        return _Postings._from_triples(
+            self.terms,
+            self._term_ids()[mask],
+            new_row[self.rows[mask]].astype(np.int32),
+            self.tfs[mask],
+            self.doc_len[keep],
+            self.ids[keep],
+        )
+
+    @staticmethod
+    def merge(blocks: Sequence["_Postings"]) -> "_Postings":
+        terms: Dict[str, int] = {}
+        term_ids, rows = [], []
+        base = 0
+        for block in blocks:
+            remap = np.fromiter(
+                (terms.setdefault(term, len(terms)) for term in block.terms),
+                dtype=np.int64,
+                count=len(block.terms),
+            )
+            term_ids.append(remap[block._term_ids()])
+            rows.append(block.rows + base)
+            base += len(block)
+        return _Postings._from_triples(
+            terms,
+            np.concatenate(term_ids),
+            np.concatenate(rows).astype(np.int32),
+            np.concatenate([block.tfs for block in blocks]),
+            np.concatenate([block.doc_len for block in blocks]),
+            np.concatenate([block.ids for block in blocks]),
+        )
+
+
+class BM25Stats:
+    """Collection statistics that BM25 scores are relative to: document count,
+    total document length and per-term document frequencies. Indices that
+    are searched together (segments) add theirs up and score against the
+    sum, so their scores are comparable."""
+
+    __slots__ = ("n", "total_len", "df")
+
+    def __init__(self, n: int = 0, total_len: int = 0, df: Optional[Dict[str, int]] = None) -> None:
+        self.n = n
+        self.total_len = total_len
+        self.df = df if df is not None else {}
+
+    def __add__(self, other: "BM25Stats") -> "BM25Stats":
+        df = dict(self.df)
+        for term, count in other.df.items():
+            df[term] = df.get(term, 0) + count
+        return BM25Stats(self.n + other.n, self.total_len + other.total_len, df)
+
+
+class BM25Index:
+    """Immutable Okapi BM25 index over chunk texts, keyed by chunk id.
+
+    Posting lists are flat numpy arrays (CSR: term offsets, doc rows, term
+    frequencies), so a query is a few array slices and one ``bincount`` per
+    block. ``extended`` appends a new block for the added chunks instead of
+    rebuilding; blocks are merged once there are more than a handful.
+    Deleted chunks are excluded at query time or dropped by ``select``.
+    """
+
+    def __init__(self, blocks: Tuple[_Postings, ...] = ()) -> None:
+        self.blocks = tuple(block for block in blocks if len(block))
+        self._n = sum(len(block) for block in self.blocks)
+        self._total_len = sum(int(block.doc_len.sum()) for block in self.blocks)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def extended(self, texts: Sequence[str], ids: Sequence[int]) -> "BM25Index":
+        blocks = self.blocks + (_Postings.build(texts, ids),)
+        if len(blocks) > _MAX_BLOCKS:
+            blocks = (_Postings.merge(blocks),)
+        return BM25Index(blocks)
+
+    def compacted(self) -> "BM25Index":
+        if len(self.blocks) <= 1:
+            return self
+        return BM25Index((_Postings.merge(self.blocks),))
+
+    def select(self, keep_ids: np.ndarray) -> "BM25Index":
+        """Index restricted to ``keep_ids``"""
+        return BM25Index(tuple(block.select(np.isin(block.ids, keep_ids)) for block in self.blocks))
+
+    def stats(self, query: str) -> BM25Stats:
+        """This index's ``BM25Stats`` for the terms of ``query``"""
+        df = {term: sum(block.df(term) for block in self.blocks) for term in set(tokenize(query))}
+        return BM25Stats(self._n, self._total_len, df)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        k1: float = 1.2,
+        b: float = 0.75,
+        exclude: Optional[np.ndarray] = None,
+        allow: Optional[np.ndarray] = None,
+        stats: Optional[BM25Stats] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, chunk ids) of the top ``k`` matches, best first. ``stats``
+        (from ``stats()`` summed over several indices) replaces this index's own."""
+        terms = set(tokenize(query))
+        if not terms or not self._n:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        if stats is None:
+            stats = self.stats(query)
+        avgdl = stats.total_len / stats.n if stats.n else 1.0
+        idf = {}
+        for term in terms:
+            df = stats.df.get(term, 0)
+            if df:
+                idf[term] = math.log(1.0 + (stats.n - df + 0.5) / (df + 0.5))
+
+        all_scores, all_ids = [], []
+        for block in self.blocks:
+            rows, contribs = [], []
+            for term, weight in idf.items():
+                hit = block.postings(term)
+                if hit is None:
+                    continue
+                r, tf = hit
+                tf = tf.astype(np.float32)
+                norm = k1 * (1.0 - b + b * block.doc_len[r] / avgdl)
+                rows.append(r)
+                contribs.append(weight * tf * (k1 + 1.0) / (tf + norm))
+            if not rows:
+                continue
+            matched, scores = _sum_by_row(np.concatenate(rows), np.concatenate(contribs), len(block))
+            all_scores.append(scores)
+            all_ids.append(block.ids[matched])
+        if not all_ids:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        scores = np.concatenate(all_scores)
+        ids = np.concatenate(all_ids)
+        if exclude is not None and len(exclude):
+            keep = ~_member(ids, exclude)
+            scores, ids = scores[keep], ids[keep]
+        if allow is not None:
+            keep = _member(ids, allow)
+            scores, ids = scores[keep], ids[keep]
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, ids = scores[top], ids[top]
+        order = np.argsort(-scores, kind="stable")
+        return scores[order].astype(np.float32), ids[order]
+
+    # ---- persistence ------------------------------------------------------
+    def to_bytes(self, generation: int) -> bytes:
+        block = _Postings.merge(self.blocks) if len(self.blocks) > 1 else (
+            self.blocks[0] if self.blocks else _Postings.build([], [])
+        )
+        terms = sorted(block.terms, key=block.terms.__getitem__)
+        buf = io.BytesIO()
+        np.savez(
+            buf,
+            generation=np.asarray([generation], dtype=np.int64),
+            tokenizer=np.asarray([TOKENIZER_VERSION], dtype=np.int64),
+            terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            offsets=block.offsets,
+            rows=block.rows,
+            tfs=block.tfs,
+            doc_len=block.doc_len,
+            ids=block.ids,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = False) -> Tuple["BM25Index", int]:
+        """(index, generation) from a file written with ``to_bytes``. With
+        ``mmap`` the posting arrays stay in the file (memory-mapped); only the
+        term dictionary is built in memory. Raises ``ValueError`` for files
+        written by another ``TOKENIZER_VERSION``."""
+        if mmap:
+            data = _mapped_npz(path)
+        else:
+            with np.load(path) as npz:
+                data = {name: npz[name] for name in npz.files}
+        if "tokenizer" not in data or int(data["tokenizer"][0]) != TOKENIZER_VERSION:
+            raise ValueError(f"{path} was built by another tokenizer")
+        blob = data["terms"].tobytes().decode("utf-8")
+        terms_list = blob.split("\n") if blob else []
+        block = _Postings(
+            {term: i for i, term in enumerate(terms_list)},
+            data["offsets"],
+            data["rows"],
+            data["tfs"],
+            data["doc_len"],
+            data["ids"],
+        )
+        return cls((block,)), int(data["generation"][0])
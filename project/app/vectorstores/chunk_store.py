@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# On-disk layout (little endian):
+#   MAGIC (8) | generation u64 | count u64
+#   chunk ids i64[count]  (v2 only; ascending)
+#   text offsets u64[count + 1] | meta offsets u64[count + 1]
+#   texts blob (UTF-8, concatenated) | metas blob (compact JSON, concatenated)
+# Offsets are relative to the start of their blob, so row i's text is
+# texts_blob[toff[i]:toff[i + 1]]. Nothing is decoded until a row is read.
+# v1 files (no ids section) are still readable; their ids are 0..count-1.
+MAGIC = b"ODCHUNK2"
+MAGIC_V1 = b"ODCHUNK1"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def _encode_meta(meta: Dict[str, Any]) -> bytes:
+    return json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class MappedChunks:
+    """Read-only, memory-mapped view of a chunk store file."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"{path} is not a chunk store")
+        n = self.count + 1
+        pos = _HEADER.size
+        if magic == MAGIC:
+            self.ids = np.frombuffer(self._mm, dtype="<i8", count=self.count, offset=pos)
+            pos += 8 * self.count
+        else:
+            self.ids = np.arange(self.count, dtype=np.int64)
+        self._toff = np.frombuffer(self._mm, dtype="<u8", count=n, offset=pos)
+        self._moff = np.frombuffer(self._mm, dtype="<u8", count=n, offset=pos + 8 * n)
+        self._tbase = pos + 16 * n
+        self._mbase = self._tbase + int(self._toff[-1])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def text_bytes(self, i: int) -> bytes:
+        return self._mm[self._tbase + int(self._toff[i]):self._tbase + int(self._toff[i + 1])]
+
+    def meta_bytes(self, i: int) -> bytes:
+        return self._mm[self._mbase + int(self._moff[i]):self._mbase + int(self._moff[i + 1])]
+
+    def text(self, i: int) -> str:
+        return self.text_bytes(i).decode("utf-8")
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        return json.loads(self.meta_bytes(i))
+
+
+class ChunkTable:
+    """Chunk ids+texts+metas: an optional mmap'd base plus an in-memory tail.
+
+    Rows are kept in ascending id order, so ``row_of`` is a binary search.
+    Tables are treated as immutable; ``extended`` and ``select`` return new
+    tables, which lets the index swap state without copying the mapped base.
+    """
+
+    def __init__(
+        self,
+        base: Optional[MappedChunks] = None,
+        texts: Optional[List[str]] = None,
+        metas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[int]] = None,
+    ) -> None:
+        self.base = base
+        self._texts = texts if texts is not None else []
+        self._metas = metas if metas is not None else []
+        self._nbase = len(base) if base is not None else 0
+        self._ids = ids if ids is not None else list(range(self._nbase, self._nbase + len(self._texts)))
+
+    def __len__(self) -> int:
+        return self._nbase + len(self._texts)
+
+    def ids(self) -> np.ndarray:
+        base = self.base.ids if self.base is not None else np.zeros(0, dtype=np.int64)
+        return np.concatenate([base, np.asarray(self._ids, dtype=np.int64)])
+
+    def last_id(self) -> int:
+        """Largest id in the table, or -1 when empty"""
+        if self._ids:
+            return self._ids[-1]
+        return int(self.base.ids[-1]) if self._nbase else -1
+
+    def row_of(self, chunk_id: int) -> int:
+        """Row holding ``chunk_id``, or -1"""
+        if self._nbase and chunk_id <= self.base.ids[-1]:  # type: ignore[union-attr]
+            row = int(np.searchsorted(self.base.ids, chunk_id))  # type: ignore[union-attr]
+            return row if self.base.ids[row] == chunk_id else -1  # type: ignore[union-attr]
+        row = bisect.bisect_left(self._ids, chunk_id)
+        if row < len(self._ids) and self._ids[row] == chunk_id:
+            return self._nbase + row
+        return -1
+
+    def chunk_id(self, i: int) -> int:
+        if i < self._nbase:
+            return int(self.base.ids[i])  # type: ignore[union-attr]
+        return self._ids[i - self._nbase]
+
+    def text(self, i: int) -> str:
+        if i < self._nbase:
+            return self.base.text(i)  # type: ignore[union-attr]
+        return self._texts[i - self._nbase]
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        if i < self._nbase:
+            return self.base.meta(i)  # type: ignore[union-attr]
+        return self._metas[i - self._nbase]
+
+    def iter_metas(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.meta(i)
+
+    def iter_raw(self) -> Iterator[Tuple[bytes, bytes]]:
+        """(text, meta) as encoded bytes; base rows are copied without decoding"""
+        for i in range(self._nbase):
+            yield self.base.text_bytes(i), self.base.meta_bytes(i)  # type: ignore[union-attr]
+        for text, meta in zip(self._texts, self._metas):
+            yield text.encode("utf-8"), _encode_meta(meta)
+
+    def extended(
+        self, texts: Sequence[str], metas: Sequence[Dict[str, Any]], ids: Sequence[int]
+    ) -> "ChunkTable":
+        if len(ids) and ids[0] <= self.last_id():
+            raise ValueError("chunk ids must be appended in ascending order")
+        return ChunkTable(self.base, self._texts + list(texts), self._metas + list(metas), self._ids + list(ids))
+
+    def select(self, rows: Iterable[int]) -> "ChunkTable":
+        rows = list(rows)
+        return ChunkTable(
+            None,
+            [self.text(i) for i in rows],
+            [self.meta(i) for i in rows],
+            [self.chunk_id(i) for i in rows],
+        )
+
+
+class ColumnView(Sequence):
+    """Lazy list-like view over one column of a ChunkTable"""
+
+    def __init__(self, table: ChunkTable, column: str) -> None:
+        self._get = table.text if column == "text" else table.meta
+        self._len = len(table)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(self._len))]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return self._get(i)
+
+
+def write_chunk_store(path: Path, table: ChunkTable, generation: int) -> None:
+    """Stream ``table`` to ``path`` via a temp file + rename."""
+    count = len(table)
+    n = count + 1
+    toff = np.zeros(n, dtype="<u8")
+    moff = np.zeros(n, dtype="<u8")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    blob_start = _HEADER.size + 8 * count + 16 * n
+    meta_tmp = path.with_name(f".{path.name}.{os.getpid()}.metas.tmp")
+    with open(tmp, "wb") as out, open(meta_tmp, "w+b") as metas_out:
+        out.write(_HEADER.pack(MAGIC, generation, count))
+        out.seek(blob_start)
+        tpos = mpos = 0
+        for i, (text, meta) in enumerate(table.iter_raw(), 1):
+            out.write(text)
+            metas_out.write(meta)
+            tpos += len(text)
+            mpos += len(meta)
+            toff[i] = tpos
+            moff[i] = mpos
+        metas_out.seek(0)
+        while True:
+            block = metas_out.read(1 << 20)
+            if not block:
+                break
+            out.write(block)
+        out.seek(_HEADER.size)
+        out.write(table.ids().astype("<i8").tobytes())
+        out.write(toff.tobytes())
+        out.write(moff.tobytes())
+        out.flush()
+        os.fsync(out.fileno())
+    meta_tmp.unlink()
+    os.replace(tmp, path)
+
+
+def read_generation(path: Path) -> Optional[int]:
+    """Generation recorded in a chunk store header, without mapping the file"""
+    try:
+        with open(path, "rb") as fh:
+            magic, generation, _ = _HEADER.unpack(fh.read(_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+    return generation if magic in (MAGIC, MAGIC_V1) else None
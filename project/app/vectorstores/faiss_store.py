@@ -1,102 +1,1282 @@
 from __future__ import annotations
 
+import functools
+import heapq
 import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
 
 import numpy as np
 import faiss  # type: ignore
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single worker
+    fcntl = None  # type: ignore[assignment]
+
 from app.config import settings
+from app.services.metrics import INDEX_OP_SECONDS
+from app.vectorstores.bm25 import BM25Index, BM25Stats
+from app.vectorstores.chunk_store import ChunkTable, ColumnView, MappedChunks, write_chunk_store
+
+logger = logging.getLogger(__name__)
+
+
+class _IndexState:
+    """Immutable snapshot of an index, its chunk table and its tombstones.
+
+    Readers grab the current state once and work on it; writers build a new
+    state and swap the reference, so a search never sees a half-updated index.
+    ``dirty`` marks index/chunk changes not yet written by ``save()``; a
+    tombstone-only change just rewrites the small commit record.
+
+    ``postings`` caches per-field inverted indices over the metas (value ->
+    chunk ids, tombstoned ids included), built the first time a field is
+    filtered on and carried forward by ``add``. ``lexical`` is the BM25
+    index over the chunk texts, always in step with ``chunks``.
+
+    ``mapped`` marks an index read with ``index_mmap``: its codes are views
+    of the file, so writers must copy it first (``_writable_index``).
+    """
+
+    __slots__ = ("index", "chunks", "dim", "generation", "tombstones", "tombstone_ids",
+                 "selector", "next_id", "dirty", "postings", "lexical", "mapped")
+
+    def __init__(
+        self,
+        index: Optional[faiss.Index] = None,
+        chunks: Optional[ChunkTable] = None,
+        dim: Optional[int] = None,
+        generation: int = 0,
+        tombstones: FrozenSet[int] = frozenset(),
+        next_id: int = 0,
+        dirty: bool = False,
+        postings: Optional[Dict[str, Dict[Any, List[int]]]] = None,
+        lexical: Optional[BM25Index] = None,
+        mapped: bool = False,
+    ) -> None:
+        self.index = index
+        self.chunks = chunks if chunks is not None else ChunkTable()
+        self.dim = dim
+        self.generation = generation
+        self.tombstones = tombstones
+        self.tombstone_ids = np.fromiter(sorted(tombstones), dtype=np.int64, count=len(tombstones))
+        self.selector = _exclude_selector(self.tombstone_ids)
+        self.next_id = max(next_id, self.chunks.last_id() + 1)
+        self.dirty = dirty
+        self.postings = dict(postings) if postings else {}
+        self.lexical = lexical if lexical is not None else BM25Index()
+        self.mapped = mapped
+
+    @property
+    def live_count(self) -> int:
+        return len(self.chunks) - len(self.tombstones)
+
+    def field_postings(self, field: str) -> Dict[Any, List[int]]:
+        table = self.postings.get(field)
+        if table is None:
+            table = {}
+            for row, meta in enumerate(self.chunks.iter_metas()):
+                _post(table, meta.get(field), self.chunks.chunk_id(row))
+            self.postings[field] = table
+        return table
+
+    def matching_ids(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Sorted live ids whose metas match every field of ``filters``.
+
+        A list value matches any of its items; a meta holding a list matches
+        if any of its items does.
+        """
+        result: Optional[np.ndarray] = None
+        for field, wanted in filters.items():
+            table = self.field_postings(field)
+            values = wanted if isinstance(wanted, (list, tuple, set, frozenset)) else [wanted]
+            ids: List[int] = []
+            for value in values:
+                if _hashable(value):
+                    ids.extend(table.get(value, ()))
+            found = np.unique(np.asarray(ids, dtype=np.int64))
+            result = found if result is None else np.intersect1d(result, found, assume_unique=True)
+            if not len(result):
+                return result
+        if result is None:
+            result = self.chunks.ids()
+        if len(self.tombstone_ids):
+            result = result[~np.isin(result, self.tombstone_ids, assume_unique=True)]
+        return result
+
+
+def _hashable(value: Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _post(table: Dict[Any, List[int]], value: Any, chunk_id: int) -> None:
+    for item in value if isinstance(value, list) else (value,):
+        if _hashable(item):
+            table.setdefault(item, []).append(chunk_id)
+
+
+def _id_selector(ids: np.ndarray) -> Tuple[Any, ...]:
+    """FAISS selector accepting only ``ids``"""
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    return (faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids)),)
+
+
+def _exclude_selector(ids: np.ndarray) -> Optional[Tuple[Any, ...]]:
+    """FAISS selector that skips ``ids``; the tuple keeps the wrapped selector alive"""
+    if not len(ids):
+        return None
+    batch = _id_selector(ids)[0]
+    return (faiss.IDSelectorNot(batch), batch)
+
+
+def _inner(index: faiss.Index) -> faiss.Index:
+    """The index wrapped by an ID map (or ``index`` itself)"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def takes_selector(index: faiss.Index) -> bool:
+    """Whether searches on ``index`` accept an ID selector, which filters and
+    tombstones rely on (bare PQ, fast-scan, refine and NSG indices do not)"""
+    index = _inner(index)
+    while isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return isinstance(index, (faiss.IndexFlat, faiss.IndexScalarQuantizer, faiss.IndexHNSW, faiss.IndexIVF))
+
+
+def build_index(
+    factory: str,
+    vectors: np.ndarray,
+    train_sample: Optional[int] = None,
+    id_mapped: bool = True,
+) -> faiss.Index:
+    """Create an empty inner-product index from a FAISS factory string.
+
+    Index types that need training (IVF, PQ, SQ) are trained on a random
+    sample of ``vectors``. If there are too few vectors to train, a flat
+    index is returned instead; ``rebuild_index()`` can switch over later.
+    With ``id_mapped`` the index is wrapped in ``IDMap2`` so vectors carry
+    stable chunk ids (``add_with_ids``) instead of positions; such indices
+    must take an ID selector, so other types raise ``ValueError``.
+    """
+    dim = vectors.shape[1]
+    prefix = "IDMap2," if id_mapped else ""
+    index = faiss.index_factory(dim, prefix + factory, faiss.METRIC_INNER_PRODUCT)
+    if id_mapped and not takes_selector(index):
+        raise ValueError(
+            f"FAISS index {factory!r} cannot restrict searches to live or filtered chunks; "
+            "use a Flat, SQ, HNSW or IVF index"
+        )
+    if index.is_trained:
+        return index
+    sample_size = train_sample or settings.faiss_train_sample
+    sample = vectors
+    if vectors.shape[0] > sample_size:
+        rows = np.random.default_rng(0).choice(vectors.shape[0], sample_size, replace=False)
+        sample = vectors[np.sort(rows)]
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and sample.shape[0] < ivf.nlist:
+        logger.warning("%d vectors cannot train %r; using a flat index for now", sample.shape[0], factory)
+        return faiss.index_factory(dim, prefix + "Flat", faiss.METRIC_INNER_PRODUCT)
+    try:
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    except RuntimeError as e:
+        logger.warning("training %r failed (%s); using a flat index for now", factory, e)
+        return faiss.index_factory(dim, prefix + "Flat", faiss.METRIC_INNER_PRODUCT)
+    if id_mapped and ivf is not None:
+        # Lets filtered searches reconstruct candidate vectors by id
+        faiss.extract_index_ivf(index).make_direct_map()
+    return index
+
+
+def search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    sel: Optional[Any] = None,
+) -> Optional[faiss.SearchParameters]:
+    """Per-query knobs for IVF (nprobe) and HNSW (efSearch) indices, plus an
+    optional ID selector restricting which vectors may be returned"""
+    if faiss.try_extract_index_ivf(index) is not None:
+        return faiss.SearchParametersIVF(nprobe=nprobe or settings.faiss_nprobe, sel=sel)
+    if isinstance(_inner(index), faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=ef_search or settings.faiss_ef_search, sel=sel)
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+    return None
+
+
+def all_vectors(index: faiss.Index) -> np.ndarray:
+    """Reconstruct every stored vector in insertion order (lossy for PQ/SQ codes)"""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        index = faiss.clone_index(index)
+        faiss.extract_index_ivf(index).make_direct_map()
+    return _inner(index).reconstruct_n(0, index.ntotal)
+
+
+def _read_index(path: Path) -> Tuple[faiss.Index, bool]:
+    """Read an index file; returns (index, memory-mapped).
+
+    With ``index_mmap`` the flat codes (Flat, SQ, PQ, HNSW storage, IVF
+    quantizers) are mapped read-only from the file instead of copied, so
+    every process serving the same snapshot shares one copy in the page
+    cache. Needs a faiss build with ``IO_FLAG_MMAP_IFC``, see ``_check_mmap_support``.
+    """
+    if settings.index_mmap:
+        return faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY), True
+    return faiss.read_index(str(path)), False
+
+
+def _check_mmap_support() -> None:
+    """Refuse ``index_mmap`` on a faiss build that cannot map indices.
+
+    Falling back to private copies would silently multiply resident memory
+    by the number of workers, which is exactly what the setting is for.
+    """
+    if settings.index_mmap and not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        raise RuntimeError(
+            f"INDEX_MMAP needs faiss with IO_FLAG_MMAP_IFC (faiss-cpu>=1.15); installed: {faiss.__version__}"
+        )
+
+
+def _writable_index(state: _IndexState) -> faiss.Index:
+    """A private copy of ``state.index`` to modify. ``clone_index`` of a mapped
+    index would still view the read-only file, so that one is deserialized."""
+    if state.mapped:
+        return faiss.deserialize_index(faiss.serialize_index(state.index))
+    return faiss.clone_index(state.index)
+
+
+@contextmanager
+def interprocess_lock(path: Path, blocking: bool = True) -> Iterator[bool]:
+    """Exclusive ``flock`` on ``path``, held by one process on the host at a
+    time (worker processes of one server included). Yields False at once if
+    ``blocking`` is off and another process holds it."""
+    if fcntl is None:
+        yield True
+        return
+    with open(path, "a") as fh:
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def _with_ids(index: faiss.Index, vectors: np.ndarray, ids: np.ndarray) -> faiss.Index:
+    """Empty ``index``'s trained structure, refilled with ``vectors`` under ``ids``"""
+    index = faiss.clone_index(index)
+    index.reset()
+    if not isinstance(index, faiss.IndexIDMap):
+        index = faiss.IndexIDMap2(index)
+    if len(ids):
+        index.add_with_ids(np.ascontiguousarray(vectors), ids)
+    return index
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _timed(op: str) -> Callable[[_F], _F]:
+    """Observe the wrapped index method in ``INDEX_OP_SECONDS`` (named indices only)"""
+    def wrap(fn: _F) -> _F:
+        @functools.wraps(fn)
+        def timed(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if self.name is None:
+                return fn(self, *args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                INDEX_OP_SECONDS.labels(self.name, op).observe(time.perf_counter() - t0)
+        return timed  # type: ignore[return-value]
+    return wrap
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write to a temp file next to ``path`` and rename it into place."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
 
 
 class SimpleFaissIndex:
-    """Minimal FAISS IP index with simple JSON sidecar for texts+metas."""
+    """FAISS IP index with a memory-mapped chunk store for texts+metas.
 
-    def __init__(self, index_path: Path, meta_path: Path) -> None:
+    The index type comes from a FAISS factory string (``Flat``, ``HNSW32``,
+    ``IVF1024,Flat``, ``IVF1024,PQ32``, ``SQ8``...), see ``build_index``,
+    always wrapped in an ``IDMap2`` so every chunk has a stable 64-bit id.
+
+    Texts and metas live in a binary ``.chunks`` file (ids, offset arrays
+    plus contiguous UTF-8/JSON blobs, see ``chunk_store``) that is mmap'd on
+    load; ``search()`` decodes only the rows it returns. A legacy
+    ``*.meta.json`` sidecar is migrated to the chunk store the first time it
+    is loaded.
+
+    ``delete(source)`` only tombstones chunk ids: searches exclude them with
+    a FAISS ID selector and ``save()`` just rewrites the commit record. Once
+    tombstones exceed ``tombstone_compact_ratio`` of the index, ``save()``
+    compacts, rewriting the index from the surviving vectors (no re-embedding).
+
+    Every ``save()`` bumps a generation number that is written, together
+    with the tombstones, to a small ``.gen`` commit record after the index
+    and chunk store are in place. ``refresh()`` only stats that record, so
+    callers can invoke it per request and pay for a reload only when another
+    process has published a new generation.
+    """
+
+    def __init__(
+        self, index_path: Path, meta_path: Path, factory: Optional[str] = None, name: Optional[str] = None
+    ) -> None:
+        # Label for index op metrics; segments leave it unset, their parent reports
+        _check_mmap_support()
+        self.name = name
+        self.factory = factory or settings.faiss_index_factory
         self.index_path = index_path
-        self.meta_path = meta_path
-        self.index: Optional[faiss.Index] = None
-        self.texts: List[str] = []
-        self.metas: List[Dict[str, Any]] = []
-        self.dim: Optional[int] = None
+        self.meta_path = meta_path  # legacy JSON sidecar, read only for migration
+        self.chunks_path = index_path.with_suffix(".chunks")
+        self.gen_path = index_path.with_suffix(".gen")
+        self.lexical_path = index_path.with_suffix(".bm25")
+        self._state = _IndexState()
+        self._write_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._seen_stamp: Optional[Tuple[int, int, int]] = None
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        self.meta_path.parent.mkdir(parents=True, exist_ok=True)
 
-    def _ensure(self, dim: int) -> None:
-        if self.index is None:
-            self.index = faiss.IndexFlatIP(dim)
-            self.dim = dim
+    # Read-only views of the current state (kept for backwards compatibility)
+    @property
+    def index(self) -> Optional[faiss.Index]:
+        return self._state.index
 
-    def add(self, embeddings: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]) -> int:
-        if embeddings.shape[0] != len(texts) or len(texts) != len(metas):
-            raise ValueError("embeddings, texts, metas must be same length")
-        if embeddings.dtype != np.float32:
-            embeddings = embeddings.astype(np.float32)
-        self._ensure(embeddings.shape[1])
-        before = self.count
-        self.index.add(embeddings)  # type: ignore[arg-type]
-        self.texts.extend(texts)
-        self.metas.extend(metas)
-        return self.count - before
-
-    def search(self, query_vec: np.ndarray, k: int = 5) -> List[Dict[str, Any]]:
-        if self.index is None or not self.texts:
-            return []
-        if query_vec.ndim == 1:
-            query_vec = query_vec.reshape(1, -1).astype(np.float32)
-        D, I = self.index.search(query_vec, k)
+    @property
+    def texts(self) -> ColumnView:
+        return ColumnView(self._state.chunks, "text")
+
+    @property
+    def metas(self) -> ColumnView:
+        return ColumnView(self._state.chunks, "meta")
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._state.dim
+
+    @property
+    def generation(self) -> int:
+        return self._state.generation
+
+    @property
+    def next_id(self) -> int:
+        return self._state.next_id
+
+    def add(
+        self,
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+        ids: Optional[Sequence[int]] = None,
+    ) -> int:
+        """Append chunks; ids default to the next free ones. Returns chunks added."""
+        with self._write_lock:
+            self._state = self._added(self._state, embeddings, texts, metas, ids)
+            return len(texts)
+
+    def delete(self, source: str) -> int:
+        """Tombstone every chunk of ``source``; returns the number deleted"""
+        return self.remove_sources({source})
+
+    def remove_sources(self, sources: Set[str]) -> int:
+        """Tombstone every chunk whose meta["source"] is in ``sources``.
+
+        If nothing survives the index is left empty, so the next ``add``
+        builds and trains a fresh one from the new data.
+        """
+        return self.remove_matching({"source": list(sources)})
+
+    def remove_matching(self, filters: Dict[str, Any]) -> int:
+        """Tombstone every chunk whose metas match ``filters`` (see ``search``)"""
+        with self._write_lock:
+            cur = self._state
+            new = self._removed(cur, filters)
+            self._state = new
+            return cur.live_count - new.live_count
+
+    def remove_ids(self, ids: Sequence[int]) -> int:
+        """Tombstone chunks by id (ids not live here are ignored); returns the number removed"""
+        with self._write_lock:
+            cur = self._state
+            doomed = np.intersect1d(cur.matching_ids({}), np.asarray(ids, dtype=np.int64), assume_unique=True)
+            new = self._tombstoned(cur, doomed)
+            self._state = new
+            return cur.live_count - new.live_count
+
+    def live_ids(self) -> np.ndarray:
+        """Sorted ids of the live chunks"""
+        return self._state.matching_ids({})
+
+    def upsert(
+        self,
+        source: str,
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+    ) -> int:
+        """Replace all chunks of ``source`` with new ones in a single state swap"""
+        metas = [{**meta, "source": source} for meta in metas]
+        return self.replace({"source": source}, embeddings, texts, metas)
+
+    def replace(
+        self,
+        filters: Dict[str, Any],
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+    ) -> int:
+        """Replace every chunk matching ``filters`` with new ones in a single state swap"""
+        with self._write_lock:
+            state = self._removed(self._state, filters)
+            self._state = self._added(state, embeddings, texts, metas, None)
+            return len(texts)
+
+    def compact(self) -> int:
+        """Physically drop tombstoned chunks; returns the number dropped"""
+        with self._write_lock:
+            cur = self._state
+            self._state = self._compacted(cur)
+            return len(cur.tombstones)
+
+    def rebuild_index(self, factory: Optional[str] = None) -> str:
+        """Re-create the index with ``factory`` (default: configured one), retraining
+        on the stored vectors. Used to switch index types or to upgrade a flat
+        fallback once the corpus is large enough to train. Call ``save()`` after."""
+        with self._write_lock:
+            cur = self._compacted(self._state)
+            if factory:
+                self.factory = factory
+            if cur.index is None:
+                return self.factory
+            vectors = all_vectors(cur.index)
+            index = build_index(self.factory, vectors)
+            index.add_with_ids(vectors, cur.chunks.ids())
+            self._state = _IndexState(index, cur.chunks, cur.dim, cur.generation,
+                                      next_id=cur.next_id, dirty=True, lexical=cur.lexical)
+            return type(_inner(index)).__name__
+
+    def describe(self) -> Dict[str, Any]:
+        state = self._state
+        return {
+            "factory": self.factory,
+            "index_type": type(_inner(state.index)).__name__ if state.index is not None else None,
+            "count": state.live_count,
+            "tombstones": len(state.tombstones),
+            "next_id": state.next_id,
+            "dim": state.dim,
+            "generation": state.generation,
+        }
+
+    def search(
+        self,
+        query_vec: np.ndarray,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-k live chunks, optionally restricted to metas matching ``filters``
+        (``{"source": "leave.pdf"}``, ``{"type": ["hr_policy", "faq"]}``...).
+
+        Filters are resolved through the per-field inverted index into an ID
+        selector, so FAISS only scores matching vectors. Small match sets are
+        scored exactly instead, which is faster than walking the ANN
+        structure and does not lose recall to IVF probes or HNSW pruning.
+        """
+        return self.search_batch(query_vec, k, nprobe, ef_search, filters)[0]
+
+    @_timed("search")
+    def search_batch(
+        self,
+        query_vecs: np.ndarray,
+        k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """``search`` for a (n, dim) query matrix in one FAISS call; one hit list per row"""
+        state = self._state
+        query_vecs = np.ascontiguousarray(np.atleast_2d(query_vecs), dtype=np.float32)
+        empty: List[List[Dict[str, Any]]] = [[] for _ in range(query_vecs.shape[0])]
+        if state.index is None or state.live_count == 0:
+            return empty
+        selector = state.selector
+        if filters:
+            allowed = state.matching_ids(filters)
+            if not len(allowed):
+                return empty
+            if len(allowed) <= settings.filter_exact_max:
+                hits = self._exact_search(state, query_vecs, k, allowed)
+                if hits is not None:
+                    return hits
+            selector = _id_selector(allowed)
+        sel = selector[0] if selector is not None else None
+        params = search_params(state.index, nprobe, ef_search, sel)
+        D, I = state.index.search(query_vecs, k, params=params)
+        return [self._hits(state, D[i], I[i]) for i in range(query_vecs.shape[0])]
+
+    @staticmethod
+    def _exact_search(
+        state: _IndexState, query_vecs: np.ndarray, k: int, ids: np.ndarray
+    ) -> Optional[List[List[Dict[str, Any]]]]:
+        """Brute-force scores over ``ids``; None if the index cannot reconstruct"""
+        try:
+            vectors = state.index.reconstruct_batch(ids)
+        except RuntimeError:  # e.g. IVF without a direct map
+            return None
+        out = []
+        for scores in query_vecs @ vectors.T:
+            top = np.argsort(-scores, kind="stable")[:k]
+            out.append(SimpleFaissIndex._hits(state, scores[top], ids[top]))
+        return out
+
+    @staticmethod
+    def _hits(state: _IndexState, scores: np.ndarray, chunk_ids: np.ndarray) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
-        for score, idx in zip(D[0], I[0]):
-            if idx < 0 or idx >= len(self.texts):
+        for score, chunk_id in zip(scores, chunk_ids):
+            if chunk_id < 0 or chunk_id in state.tombstones:
                 continue
-            out.append({"text": self.texts[idx], "score": float(score), "meta": self.metas[idx]})
+            row = state.chunks.row_of(int(chunk_id))
+            if row < 0:
+                continue
+            out.append({
+                "id": int(chunk_id),
+                "text": state.chunks.text(row),
+                "score": float(score),
+                "meta": state.chunks.meta(row),
+            })
         return out
 
+    @_timed("lexical")
+    def lexical_search(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        stats: Optional[BM25Stats] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-k live chunks by BM25 score of ``query`` against the chunk texts
+        (scored against ``stats`` when searched together with other indices)"""
+        state = self._state
+        if state.live_count == 0:
+            return []
+        allow = state.matching_ids(filters) if filters else None
+        if allow is not None and not len(allow):
+            return []
+        scores, ids = state.lexical.search(
+            query, k, settings.bm25_k1, settings.bm25_b, exclude=state.tombstone_ids, allow=allow, stats=stats
+        )
+        return self._hits(state, scores, ids)
+
+    def lexical_stats(self, query: str) -> BM25Stats:
+        return self._state.lexical.stats(query)
+
+    @_timed("save")
     def save(self) -> None:
-        if self.index is None:
-            return
-        faiss.write_index(self.index, str(self.index_path))
-        self.meta_path.write_text(json.dumps({
-            "texts": self.texts,
-            "metas": self.metas,
-            "dim": self.dim,
-        }, ensure_ascii=False))
+        with self._write_lock:
+            cur = self._state
+            if cur.index is None:
+                return
+            if cur.tombstones and len(cur.tombstones) >= settings.tombstone_compact_ratio * len(cur.chunks):
+                cur = self._compacted(cur)
+            record = self._read_record()
+            generation = max(cur.generation, int(record.get("generation", 0))) + 1
+            data_generation = int(record.get("data_generation", record.get("generation", 0)))
+            chunks = cur.chunks
+            lexical = cur.lexical
+            # Data files first, record last: a reader that sees the new record
+            # is guaranteed to find the matching index, chunk store and BM25
+            # index on disk.
+            rewrite = cur.dirty or not self.chunks_path.exists()
+            if rewrite:
+                data_generation = generation
+                _atomic_write_bytes(self.index_path, faiss.serialize_index(cur.index).tobytes())
+                write_chunk_store(self.chunks_path, cur.chunks, data_generation)
+                # Re-open the freshly written store so the in-memory tail is released
+                chunks = ChunkTable(MappedChunks(self.chunks_path))
+            if rewrite or not self.lexical_path.exists():
+                lexical = lexical.compacted()
+                _atomic_write_bytes(self.lexical_path, lexical.to_bytes(data_generation))
+            _atomic_write_bytes(self.gen_path, json.dumps({
+                "generation": generation,
+                "data_generation": data_generation,
+                "next_id": cur.next_id,
+                "tombstones": sorted(cur.tombstones),
+            }).encode("utf-8"))
+            self._state = _IndexState(cur.index, chunks, cur.dim, generation, cur.tombstones,
+                                      cur.next_id, postings=cur.postings, lexical=lexical, mapped=cur.mapped)
+            self._seen_stamp = self._stamp()
 
+    @_timed("load")
     def load(self) -> bool:
-        if not self.index_path.exists() or not self.meta_path.exists():
+        if not self.chunks_path.exists() and not self._migrate_legacy_sidecar():
+            return False
+        if not self.index_path.exists():
+            return False
+        stamp = self._stamp()
+        record = self._read_record()
+        try:
+            index, mapped = _read_index(self.index_path)
+            chunks = MappedChunks(self.chunks_path)
+        except (RuntimeError, ValueError, OSError):
             return False
-        self.index = faiss.read_index(str(self.index_path))
-        data = json.loads(self.meta_path.read_text(encoding="utf-8"))
-        self.texts = data.get("texts", [])
-        self.metas = data.get("metas", [])
-        self.dim = data.get("dim")
+        # A writer may have replaced one file but not the other yet; keep the
+        # current state and let the next refresh() retry.
+        expected = record.get("data_generation", record.get("generation"))
+        if (expected is not None and chunks.generation != expected) or index.ntotal != len(chunks):
+            return False
+        if not isinstance(index, faiss.IndexIDMap):
+            # Pre-ID index: positions become ids (the chunk store says 0..n-1)
+            if mapped:
+                index, mapped = faiss.read_index(str(self.index_path)), False
+            index = _with_ids(index, all_vectors(index), chunks.ids)
+        self._state = _IndexState(
+            index,
+            ChunkTable(chunks),
+            index.d,
+            int(record.get("generation", chunks.generation)),
+            frozenset(record.get("tombstones", ())),
+            int(record.get("next_id", 0)),
+            lexical=self._load_lexical(chunks),
+            mapped=mapped,
+        )
+        self._seen_stamp = stamp
         return True
 
-    def clear(self) -> None:
-        self.index = None
-        self.texts = []
-        self.metas = []
-        self.dim = None
+    def _added(
+        self,
+        cur: _IndexState,
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+        ids: Optional[Sequence[int]],
+    ) -> _IndexState:
+        if embeddings.shape[0] != len(texts) or len(texts) != len(metas):
+            raise ValueError("embeddings, texts, metas must be same length")
+        if not texts:
+            return cur
+        if embeddings.dtype != np.float32:
+            embeddings = embeddings.astype(np.float32)
+        if ids is None:
+            ids = range(cur.next_id, cur.next_id + len(texts))
+        id_arr = np.asarray(ids, dtype=np.int64)
+        # Copy-on-write: in-flight searches keep using the old index object.
+        # An empty index is rebuilt so trainable types train on real data.
+        if cur.index is None or cur.index.ntotal == 0:
+            index = build_index(self.factory, embeddings)
+        else:
+            index = _writable_index(cur)
+        index.add_with_ids(np.ascontiguousarray(embeddings), id_arr)
+        postings: Dict[str, Dict[Any, List[int]]] = {}
+        for field, table in cur.postings.items():
+            added: Dict[Any, List[int]] = {}
+            for chunk_id, meta in zip(id_arr.tolist(), metas):
+                _post(added, meta.get(field), chunk_id)
+            postings[field] = {**table, **{v: table.get(v, []) + new for v, new in added.items()}}
+        return _IndexState(
+            index,
+            cur.chunks.extended(texts, metas, id_arr.tolist()),
+            embeddings.shape[1],
+            cur.generation,
+            cur.tombstones,
+            int(id_arr.max()) + 1,
+            dirty=True,
+            postings=postings,
+            lexical=cur.lexical.extended(texts, id_arr),
+        )
+
+    def _removed(self, cur: _IndexState, filters: Dict[str, Any]) -> _IndexState:
+        if cur.index is None:
+            return cur
+        return self._tombstoned(cur, cur.matching_ids(filters))
+
+    @staticmethod
+    def _tombstoned(cur: _IndexState, doomed: np.ndarray) -> _IndexState:
+        """``cur`` with the live ids ``doomed`` tombstoned"""
+        if cur.index is None or not len(doomed):
+            return cur
+        if len(doomed) == cur.live_count:
+            empty = faiss.IndexIDMap2(faiss.IndexFlatIP(cur.index.d))
+            return _IndexState(empty, None, cur.dim, cur.generation, next_id=cur.next_id, dirty=True)
+        return _IndexState(cur.index, cur.chunks, cur.dim, cur.generation,
+                           cur.tombstones | frozenset(doomed.tolist()), cur.next_id, cur.dirty, cur.postings,
+                           cur.lexical, cur.mapped)
+
+    @staticmethod
+    def _compacted(cur: _IndexState) -> _IndexState:
+        if not cur.tombstones or cur.index is None:
+            return cur
+        rows = [row for row in range(len(cur.chunks)) if cur.chunks.chunk_id(row) not in cur.tombstones]
+        chunks = cur.chunks.select(rows)
+        base = _writable_index(cur) if cur.mapped else cur.index
+        index = _with_ids(base, all_vectors(cur.index)[rows], chunks.ids())
+        return _IndexState(index, chunks, cur.dim, cur.generation, next_id=cur.next_id, dirty=True,
+                           lexical=cur.lexical.select(chunks.ids()))
+
+    def _load_lexical(self, chunks: MappedChunks) -> BM25Index:
+        """BM25 index matching ``chunks``; rebuilt from the texts if missing or stale.
+
+        A rebuilt index is written back (tagged with the chunk store's
+        generation) so the next load - in this or any other worker - maps it
+        instead of re-tokenizing every chunk.
+        """
         try:
-            if self.index_path.exists():
-                self.index_path.unlink()
-            if self.meta_path.exists():
-                self.meta_path.unlink()
-        except Exception:
+            lexical, generation = BM25Index.load(self.lexical_path, mmap=settings.index_mmap)
+            if generation == chunks.generation and len(lexical) == len(chunks):
+                return lexical
+        except (OSError, ValueError, KeyError):
             pass
+        logger.info("building BM25 index for %s (%d chunks)", self.index_path.name, len(chunks))
+        lexical = BM25Index().extended([chunks.text(i) for i in range(len(chunks))], chunks.ids).compacted()
+        try:
+            _atomic_write_bytes(self.lexical_path, lexical.to_bytes(chunks.generation))
+        except OSError as e:
+            logger.warning("could not persist BM25 index %s: %s", self.lexical_path.name, e)
+            return lexical
+        if settings.index_mmap:
+            try:
+                return BM25Index.load(self.lexical_path, mmap=True)[0]
+            except (OSError, ValueError, KeyError):
+                pass
+        return lexical
+
+    def _migrate_legacy_sidecar(self) -> bool:
+        """One-time conversion of ``*.meta.json`` into the binary chunk store"""
+        if not self.meta_path.exists():
+            return False
+        try:
+            data = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return False
+        table = ChunkTable(None, data.get("texts", []), data.get("metas", []))
+        write_chunk_store(self.chunks_path, table, int(data.get("generation", self._read_generation())))
+        self.meta_path.replace(self.meta_path.with_name(self.meta_path.name + ".migrated"))
+        return True
+
+    def refresh(self) -> bool:
+        """Reload from disk only if a newer generation has been published.
+
+        Returns True when a new state was swapped in. Never blocks: if another
+        thread is already reloading, the caller keeps searching the old state.
+        """
+        stamp = self._stamp()
+        if stamp is None or stamp == self._seen_stamp:
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            if stamp == self._seen_stamp:
+                return False
+            if self._state.index is not None and self._read_generation() == self._state.generation:
+                self._seen_stamp = stamp
+                return False
+            return self.load()
+        finally:
+            self._reload_lock.release()
+
+    def clear(self) -> None:
+        with self._write_lock:
+            self._state = _IndexState()
+            self._seen_stamp = None
+            try:
+                for path in (self.index_path, self.chunks_path, self.lexical_path, self.meta_path, self.gen_path):
+                    if path.exists():
+                        path.unlink()
+            except Exception:
+                pass
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Cheap change marker: stat of the commit record (or chunk store / legacy sidecar)."""
+        for path in (self.gen_path, self.chunks_path, self.meta_path):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        return None
+
+    def _read_record(self) -> Dict[str, Any]:
+        try:
+            record = json.loads(self.gen_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        return record if isinstance(record, dict) else {}
+
+    def _read_generation(self) -> int:
+        try:
+            return int(self._read_record().get("generation", 0))
+        except (TypeError, ValueError):
+            return 0
+
+    @property
+    def count(self) -> int:
+        """Live (non-tombstoned) chunks"""
+        return self._state.live_count
+
+    def live_rows(self) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]], List[int]]:
+        """(vectors, texts, metas, ids) of every live chunk, in id order"""
+        state = self._state
+        if state.index is None or state.live_count == 0:
+            return np.zeros((0, state.dim or 0), dtype=np.float32), [], [], []
+        rows = [row for row in range(len(state.chunks)) if state.chunks.chunk_id(row) not in state.tombstones]
+        return (
+            all_vectors(state.index)[rows],
+            [state.chunks.text(row) for row in rows],
+            [state.chunks.meta(row) for row in rows],
+            [state.chunks.chunk_id(row) for row in rows],
+        )
+
+class SegmentedFaissIndex:
+    """Append-only index made of ``SimpleFaissIndex`` segments.
+
+    Each ``add()`` writes one small new segment and rewrites a manifest that
+    only lists segment names, so storing a meeting costs the same no matter
+    how large the index is. Chunk ids are global across segments (the
+    manifest holds the next free one). Searches fan out over all segments
+    and merge the top-k by score.
+
+    Compaction is size-tiered: a segment of ``c`` live chunks is in size
+    class ``floor(log_T(c))`` for ``T = compact_threshold``. Once a class
+    holds ``T`` segments, a background thread merges them into one segment
+    of the next class, dropping tombstoned chunks on the way. A chunk thus
+    moves up one class per rewrite and is rewritten about ``log_T(n)``
+    times over the index's lifetime, and the index keeps at most about
+    ``T * log_T(n)`` segments.
+
+    Segment vectors never change after they are written; ``delete()`` only
+    tombstones ids in the affected segments' commit records.
+
+    Writers in several processes (e.g. uvicorn workers) take turns through a
+    file lock and adopt each other's manifest before writing; compaction runs
+    in one process at a time. Any number of readers may ``refresh()``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        legacy: Optional[SimpleFaissIndex] = None,
+        factory: Optional[str] = None,
+        compact_threshold: Optional[int] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.root = root
+        self.manifest_path = root / "manifest.json"
+        self.legacy = legacy
+        self.factory = factory
+        self.compact_threshold = max(2, compact_threshold or settings.segment_compact_threshold)
+        self._segments: Tuple[Tuple[str, SimpleFaissIndex], ...] = ()
+        self._next_segment = 1
+        self._next_chunk_id = 0
+        self._generation = 0
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._seen_stamp: Optional[Tuple[int, int, int]] = None
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ---- writes -----------------------------------------------------------
+    def add(self, embeddings: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]) -> int:
+        if not texts:
+            return 0
+        with self._writing():
+            added = self._add_segment(embeddings, texts, metas)
+            self._publish(self._segments + (added,))
+        if self._compaction_victims(self._segments):
+            self.compact_in_background()
+        return len(texts)
+
+    def delete(self, source: str) -> int:
+        """Tombstone every chunk of ``source`` across segments; returns the number deleted"""
+        # A running compaction is not waited for: it re-applies tombstones
+        # made meanwhile to its merged segment before publishing it
+        with self._writing():
+            segments, removed = self._without(self._segments, {"source": source})
+            if removed:
+                self._publish(segments)
+            return removed
+
+    def upsert(
+        self,
+        source: str,
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+    ) -> int:
+        """Replace all chunks of ``source``: one new segment plus tombstones, one manifest write"""
+        metas = [{**meta, "source": source} for meta in metas]
+        return self.replace({"source": source}, embeddings, texts, metas)
+
+    def replace(
+        self,
+        filters: Dict[str, Any],
+        embeddings: np.ndarray,
+        texts: List[str],
+        metas: List[Dict[str, Any]],
+    ) -> int:
+        """Replace every chunk matching ``filters`` like ``upsert`` (e.g. one meeting by id)"""
+        with self._writing():
+            segments, _ = self._without(self._segments, filters)
+            if texts:
+                segments = segments + (self._add_segment(embeddings, texts, metas),)
+            self._publish(segments)
+        if self._compaction_victims(self._segments):
+            self.compact_in_background()
+        return len(texts)
+
+    def save(self) -> None:
+        """No-op: every ``add()`` / ``delete()`` is already durable."""
+
+    def compact_in_background(self) -> None:
+        threading.Thread(target=self.compact, name="onedesk-compactor", daemon=True).start()
+
+    def compact(self) -> int:
+        """Merge every full size class (cascading upwards); returns segments merged
+        (0 if nothing was due or another thread or process is compacting)"""
+        if not self._compact_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._compacting(blocking=False) as acquired:
+                merged = 0
+                while acquired:
+                    step = self._compact()
+                    if not step:
+                        break
+                    merged += step
+                return merged
+        finally:
+            self._compact_lock.release()
+
+    def size_class(self, chunks: int) -> int:
+        """``floor(log_T(chunks))``, computed on integers"""
+        tier = 0
+        while chunks >= self.compact_threshold:
+            chunks //= self.compact_threshold
+            tier += 1
+        return tier
+
+    def _compaction_victims(
+        self, segments: Sequence[Tuple[str, SimpleFaissIndex]]
+    ) -> Tuple[Tuple[str, SimpleFaissIndex], ...]:
+        """The ``T`` smallest segments of the lowest size class holding ``T`` or more"""
+        classes: Dict[int, List[Tuple[str, SimpleFaissIndex]]] = {}
+        for entry in segments:
+            classes.setdefault(self.size_class(entry[1].count), []).append(entry)
+        for tier in sorted(classes):
+            if len(classes[tier]) >= self.compact_threshold:
+                return tuple(heapq.nsmallest(self.compact_threshold, classes[tier], key=lambda s: s[1].count))
+        return ()
+
+    def _compact(self) -> int:
+        with self._writing():
+            snapshot = self._segments
+            victims = self._compaction_victims(snapshot)
+            if not victims:
+                return 0
+            victim_names = {name for name, _ in victims}
+            name = f"seg-{self._next_segment:08d}"
+            self._next_segment += 1
+            # Reserve the name for writers in other processes
+            self._publish(snapshot)
+
+        # Build the merged segment outside the write lock; adds keep flowing
+        merged = self._merged_segment(name, victims)
+
+        with self._writing():
+            # Deletes that ran meanwhile (any process) tombstoned chunks in the
+            # victims or dropped emptied ones; carry that over to the merged segment
+            current = dict(self._segments)
+            still_live = [current[victim].live_ids() for victim in victim_names if victim in current]
+            live = np.concatenate(still_live) if still_live else np.zeros(0, dtype=np.int64)
+            if merged.remove_ids(np.setdiff1d(merged.live_ids(), live)):
+                merged.save()
+            survivors = tuple(s for s in self._segments if s[0] not in victim_names)
+            new = ((name, merged),) if merged.count else ()
+            self._publish(new + survivors)
+        if not merged.count:
+            self._remove_segment_files(name)
+        for victim in victim_names:
+            self._remove_segment_files(victim)
+        logger.info("compacted %d segments into %s (%d chunks)", len(victims), name, merged.count)
+        return len(victims)
+
+    def rebuild_index(self, factory: Optional[str] = None) -> str:
+        """Merge every segment into one built with ``factory`` (default: configured
+        one), trained on all live vectors. Durable on return, like ``add()``."""
+        if factory:
+            self.factory = factory
+        with self._compact_lock, self._compacting(), self._writing():
+            old = self._segments
+            if not self.count:
+                return self.factory or settings.faiss_index_factory
+            name = f"seg-{self._next_segment:08d}"
+            self._next_segment += 1
+            merged = self._merged_segment(name, old)
+            self._publish(((name, merged),))
+        for victim, _ in old:
+            self._remove_segment_files(victim)
+        return merged.describe()["index_type"]
+
+    def clear(self) -> None:
+        with self._writing():
+            names = [name for name, _ in self._segments]
+            self._publish(())
+            for name in names:
+                self._remove_segment_files(name)
+
+    # ---- reads ------------------------------------------------------------
+    @_timed("search")
+    def search(self, query_vec: np.ndarray, k: int = 5, **kwargs: Any) -> List[Dict[str, Any]]:
+        hits: List[Dict[str, Any]] = []
+        for _, segment in self._segments:
+            hits.extend(segment.search(query_vec, k, **kwargs))
+        return heapq.nlargest(k, hits, key=lambda hit: hit["score"])
+
+    @_timed("search")
+    def search_batch(self, query_vecs: np.ndarray, k: int = 5, **kwargs: Any) -> List[List[Dict[str, Any]]]:
+        query_vecs = np.atleast_2d(query_vecs)
+        hits: List[List[Dict[str, Any]]] = [[] for _ in range(query_vecs.shape[0])]
+        for _, segment in self._segments:
+            for merged, found in zip(hits, segment.search_batch(query_vecs, k, **kwargs)):
+                merged.extend(found)
+        return [heapq.nlargest(k, found, key=lambda hit: hit["score"]) for found in hits]
+
+    @_timed("lexical")
+    def lexical_search(self, query: str, k: int = 5, **kwargs: Any) -> List[Dict[str, Any]]:
+        # Every segment scores against the summed statistics of all of them
+        # (N, average length, df): per-segment IDFs would not be comparable
+        segments = self._segments
+        stats = sum((segment.lexical_stats(query) for _, segment in segments), BM25Stats())
+        hits: List[Dict[str, Any]] = []
+        for _, segment in segments:
+            hits.extend(segment.lexical_search(query, k, stats=stats, **kwargs))
+        return heapq.nlargest(k, hits, key=lambda hit: hit["score"])
+
+    @_timed("load")
+    def load(self) -> bool:
+        manifest = self._read_manifest()
+        if manifest is None:
+            return self._migrate_legacy()
+        stamp = self._stamp()
+        loaded = dict(self._segments)
+        segments: List[Tuple[str, SimpleFaissIndex]] = []
+        for name in manifest["segments"]:
+            segment = loaded.get(name)  # vectors are immutable: reuse, just pick up new tombstones
+            if segment is not None:
+                segment.refresh()
+            else:
+                segment = self._segment(name)
+                if not segment.load():
+                    return False  # compaction may have raced us; retry on next refresh
+            segments.append((name, segment))
+        self._segments = tuple(segments)
+        self._next_segment = manifest.get("next_segment", manifest.get("next_id", self._next_segment))
+        self._next_chunk_id = max(
+            [manifest.get("next_chunk_id", 0), *(segment.next_id for _, segment in segments)]
+        )
+        self._generation = manifest.get("generation", 0)
+        self._seen_stamp = stamp
+        return True
+
+    def refresh(self) -> bool:
+        stamp = self._stamp()
+        if stamp is None or stamp == self._seen_stamp:
+            return False
+        return self.load()
 
     @property
     def count(self) -> int:
-        return len(self.texts)
+        return sum(segment.count for _, segment in self._segments)
 
-# Two simple indices: HR and Meetings
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def segment_names(self) -> Sequence[str]:
+        return [name for name, _ in self._segments]
+
+    def live_rows(self) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]], List[int]]:
+        """(vectors, texts, metas, ids) of every live chunk across segments, in id order"""
+        return self._live_rows(self._segments)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "factory": self.factory or settings.faiss_index_factory,
+            "segments": len(self._segments),
+            "count": self.count,
+            "tombstones": sum(segment.describe()["tombstones"] for _, segment in self._segments),
+            "next_id": self._next_chunk_id,
+            "generation": self._generation,
+            "compact_threshold": self.compact_threshold,
+        }
+
+    # ---- internals --------------------------------------------------------
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Write lock across threads and processes. What other processes
+        published is adopted first, so segment names and chunk ids never collide."""
+        with self._write_lock, interprocess_lock(self.root / ".write.lock"):
+            if self._stamp() != self._seen_stamp and self._read_manifest() is not None and not self.load():
+                raise RuntimeError(f"cannot load {self.manifest_path} before writing")
+            yield
+
+    def _compacting(self, blocking: bool = True):
+        """Held by compaction and ``rebuild_index`` so only one runs at a time (any process)"""
+        return interprocess_lock(self.root / ".compact.lock", blocking)
+
+    def _segment(self, name: str) -> SimpleFaissIndex:
+        return SimpleFaissIndex(self.root / f"{name}.index", self.root / f"{name}.meta.json", self.factory)
+
+    def _add_segment(
+        self, embeddings: np.ndarray, texts: List[str], metas: List[Dict[str, Any]]
+    ) -> Tuple[str, SimpleFaissIndex]:
+        """Write a new segment holding ``texts`` (caller holds the write lock and publishes)"""
+        name = f"seg-{self._next_segment:08d}"
+        self._next_segment += 1
+        segment = self._segment(name)
+        first = self._next_chunk_id
+        segment.add(embeddings, texts, metas, ids=range(first, first + len(texts)))
+        segment.save()
+        self._next_chunk_id = first + len(texts)
+        return name, segment
+
+    def _live_rows(
+        self, segments: Sequence[Tuple[str, SimpleFaissIndex]]
+    ) -> Tuple[np.ndarray, List[str], List[Dict[str, Any]], List[int]]:
+        parts = [segment.live_rows() for _, segment in segments if segment.count]
+        if not parts:
+            dim = next((segment.dim for _, segment in segments if segment.dim), 0)
+            return np.zeros((0, dim), dtype=np.float32), [], [], []
+        ids = np.concatenate([np.asarray(part[3], dtype=np.int64) for part in parts])
+        order = np.argsort(ids, kind="stable")
+        texts = [text for part in parts for text in part[1]]
+        metas = [meta for part in parts for meta in part[2]]
+        return (
+            np.vstack([part[0] for part in parts])[order],
+            [texts[i] for i in order],
+            [metas[i] for i in order],
+            ids[order].tolist(),
+        )
+
+    def _merged_segment(self, name: str, segments: Sequence[Tuple[str, SimpleFaissIndex]]) -> SimpleFaissIndex:
+        """Write segment ``name`` holding the live chunks of ``segments``"""
+        merged = self._segment(name)
+        vectors, texts, metas, ids = self._live_rows(segments)
+        if ids:
+            merged.add(vectors, texts, metas, ids=ids)
+            merged.save()
+        return merged
+
+    def _without(
+        self, segments: Tuple[Tuple[str, SimpleFaissIndex], ...], filters: Dict[str, Any]
+    ) -> Tuple[Tuple[Tuple[str, SimpleFaissIndex], ...], int]:
+        """Tombstone chunks matching ``filters`` in every segment; segments left empty are dropped"""
+        kept: List[Tuple[str, SimpleFaissIndex]] = []
+        removed = 0
+        for name, segment in segments:
+            n = segment.remove_matching(filters)
+            if n and segment.count == 0:
+                self._remove_segment_files(name)
+            else:
+                if n:
+                    segment.save()
+                kept.append((name, segment))
+            removed += n
+        return tuple(kept), removed
+
+    def _publish(self, segments: Tuple[Tuple[str, SimpleFaissIndex], ...]) -> None:
+        """Write the manifest (atomically) and swap the in-memory segment list"""
+        self._generation += 1
+        _atomic_write_bytes(self.manifest_path, json.dumps({
+            "segments": [name for name, _ in segments],
+            "next_segment": self._next_segment,
+            "next_chunk_id": self._next_chunk_id,
+            "generation": self._generation,
+        }).encode("utf-8"))
+        self._segments = segments
+        self._seen_stamp = self._stamp()
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = self.manifest_path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _remove_segment_files(self, name: str) -> None:
+        for suffix in (".index", ".chunks", ".bm25", ".gen", ".meta.json"):
+            path = self.root / f"{name}{suffix}"
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _migrate_legacy(self) -> bool:
+        """Adopt a pre-segment single-file index as the first segment"""
+        if self.legacy is None or not self.legacy.load() or self.legacy.count == 0:
+            return False
+        with self._write_lock, interprocess_lock(self.root / ".write.lock"):
+            if self._read_manifest() is not None:
+                # Another worker migrated it while we waited
+                return self.load()
+            name = f"seg-{self._next_segment:08d}"
+            for suffix in (".index", ".chunks", ".bm25", ".gen"):
+                source = self.legacy.index_path.with_suffix(suffix)
+                if source.exists():
+                    shutil.copyfile(source, self.root / f"{name}{suffix}")
+            segment = self._segment(name)
+            if not segment.load():
+                return False
+            self._next_segment += 1
+            self._next_chunk_id = segment.next_id
+            self._publish(((name, segment),))
+        logger.info("migrated %s into segment %s", self.legacy.index_path, name)
+        return True
+
+
+# Two indices: HR (rebuilt by ingestion) and Meetings (append-only segments)
 HR_INDEX = SimpleFaissIndex(
     settings.indices_dir / "hr.index",
     settings.indices_dir / "hr.meta.json",
+    name="hr",
 )
 
-MEET_INDEX = SimpleFaissIndex(
-    settings.indices_dir / "meet.index",
-    settings.indices_dir / "meet.meta.json",
+MEET_INDEX = SegmentedFaissIndex(
+    settings.indices_dir / "meet",
+    legacy=SimpleFaissIndex(
+        settings.indices_dir / "meet.index",
+        settings.indices_dir / "meet.meta.json",
+    ),
+    name="meet",
 )
+
@@ -0,0 +1,15 @@
+from typing import Callable
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def make_vectors() -> Callable[..., np.ndarray]:
+    """``make_vectors(n, dim=8, seed=0)`` -> (n, dim) unit-norm float32 rows"""
+
+    def make(n: int, dim: int = 8, seed: int = 0) -> np.ndarray:
+        vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return make
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.vectorstores import bm25
+from app.vectorstores.bm25 import BM25Index, tokenize
+from app.vectorstores.faiss_store import SegmentedFaissIndex, SimpleFaissIndex
+
+POLICIES = [
+    ("leave.pdf", "Annual leave is 25 days. Unused leave carries over until March."),
+    ("leave.pdf", "Parental leave: see form HR-101 and notify your manager."),
+    ("travel.pdf", "Travel expenses need a receipt; per diem follows policy TR-7."),
+    ("travel.pdf", "Book flights through the travel desk at least two weeks ahead."),
+    ("conduct.pdf", "Überstunden (overtime) are compensated with leave or pay."),
+    ("conduct.pdf", "Report conduct concerns to HR or the ethics hotline."),
+]
+
+
+def test_tokenize_folds_case_and_accents_and_keeps_codes():
+    assert tokenize("Überstunden STRASSE Straße") == ["überstunden", "strasse", "strasse"]
+    assert tokenize("see HR-101") == ["see", "hr-101", "hr", "101"]
+    assert tokenize("ﬁnance") == ["finance"]  # PDF ligature
+
+
+def test_index_built_by_another_tokenizer_is_rebuilt_and_persisted(tmp_path, make_vectors, monkeypatch):
+    index = SimpleFaissIndex(tmp_path / "hr.index", tmp_path / "hr.meta.json")
+    texts = [text for _, text in POLICIES]
+    index.add(make_vectors(len(texts)), texts, [{"source": source} for source, _ in POLICIES])
+    index.save()
+    generation = BM25Index.load(index.lexical_path)[1]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(bm25, "TOKENIZER_VERSION", bm25.TOKENIZER_VERSION - 1)
+        stale = BM25Index().extended(["unrelated"] * len(texts), list(range(len(texts))))
+        index.lexical_path.write_bytes(stale.to_bytes(generation))
+    with pytest.raises(ValueError):
+        BM25Index.load(index.lexical_path)
+
+    loaded = SimpleFaissIndex(tmp_path / "hr.index", tmp_path / "hr.meta.json")
+    assert loaded.load()
+    assert loaded.lexical_search("HR-101", k=1)[0]["text"] == POLICIES[1][1]
+    # Written back for the next load, tagged with the chunk store's generation
+    rebuilt, rebuilt_generation = BM25Index.load(index.lexical_path)
+    assert rebuilt_generation == generation and len(rebuilt) == len(texts)
+
+
+@pytest.mark.parametrize("query", ["leave", "travel receipt", "HR-101", "overtime leave pay"])
+def test_segmented_ranking_matches_a_single_index(tmp_path, make_vectors, monkeypatch, query):
+    monkeypatch.setattr(SegmentedFaissIndex, "compact_in_background", lambda self: None)
+    single = SimpleFaissIndex(tmp_path / "one.index", tmp_path / "one.meta.json")
+    segmented = SegmentedFaissIndex(tmp_path / "segments", compact_threshold=8)
+    vectors = make_vectors(len(POLICIES))
+    for source in dict(POLICIES):
+        rows = [i for i, (name, _) in enumerate(POLICIES) if name == source]
+        texts = [POLICIES[i][1] for i in rows]
+        metas = [{"source": source} for _ in rows]
+        single.add(vectors[rows], texts, metas)
+        segmented.add(vectors[rows], texts, metas)
+
+    expected = {hit["text"]: hit["score"] for hit in single.lexical_search(query, k=len(POLICIES))}
+    got = {hit["text"]: hit["score"] for hit in segmented.lexical_search(query, k=len(POLICIES))}
+    assert got.keys() == expected.keys()
+    np.testing.assert_allclose([got[text] for text in expected], list(expected.values()), rtol=1e-5)
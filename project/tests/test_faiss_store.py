@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.vectorstores.faiss_store import SimpleFaissIndex
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "hr.index", tmp_path / "hr.meta.json"
+
+
+def policy_chunks(source, n):
+    return [f"{source} section {i}" for i in range(n)], [{"source": source, "chunk": i} for i in range(n)]
+
+
+def filled(paths, make_vectors):
+    index = SimpleFaissIndex(*paths)
+    for seed, source in enumerate(("leave.pdf", "travel.pdf")):
+        index.add(make_vectors(3, seed=seed), *policy_chunks(source, 3))
+    return index
+
+
+def test_save_load_round_trip_keeps_ids_metas_and_tombstones(paths, make_vectors):
+    index = filled(paths, make_vectors)
+    assert index.delete("leave.pdf") == 3
+    index.save()
+
+    loaded = SimpleFaissIndex(*paths)
+    assert loaded.load()
+    assert loaded.generation == index.generation
+    np.testing.assert_array_equal(loaded.live_ids(), [3, 4, 5])
+    _, texts, metas, ids = loaded.live_rows()
+    assert ids == [3, 4, 5]
+    assert texts == ["travel.pdf section 0", "travel.pdf section 1", "travel.pdf section 2"]
+    assert all(meta["source"] == "travel.pdf" for meta in metas)
+    # New chunks never reuse the ids of deleted ones
+    loaded.add(make_vectors(1, seed=9), *policy_chunks("leave.pdf", 1))
+    assert loaded.live_ids()[-1] == 6
+
+
+def test_search_skips_tombstones_after_reload(paths, make_vectors):
+    index = filled(paths, make_vectors)
+    query = make_vectors(3, seed=0)[1]
+    assert index.search(query, k=1)[0]["text"] == "leave.pdf section 1"
+    index.delete("leave.pdf")
+    index.save()
+
+    loaded = SimpleFaissIndex(*paths)
+    loaded.load()
+    hits = loaded.search(query, k=6)
+    assert len(hits) == 3 and {hit["meta"]["source"] for hit in hits} == {"travel.pdf"}
+
+
+def test_replace_swaps_only_matching_chunks(paths, make_vectors):
+    index = filled(paths, make_vectors)
+    index.replace({"source": "leave.pdf"}, make_vectors(2, seed=5), *policy_chunks("leave.pdf", 2))
+
+    _, texts, _, ids = index.live_rows()
+    assert ids == [3, 4, 5, 6, 7]
+    assert texts[:3] == ["travel.pdf section 0", "travel.pdf section 1", "travel.pdf section 2"]
+
+
+def test_refresh_picks_up_a_snapshot_saved_elsewhere(paths, make_vectors):
+    writer = filled(paths, make_vectors)
+    writer.save()
+    reader = SimpleFaissIndex(*paths)
+    assert reader.load()
+    assert not reader.refresh()
+
+    writer.add(make_vectors(1, seed=7), *policy_chunks("expenses.pdf", 1))
+    writer.save()
+    assert reader.refresh()
+    assert reader.count == 7 and reader.generation == writer.generation
+
+    # A tombstone-only change rewrites just the commit record
+    writer.delete("travel.pdf")
+    writer.save()
+    assert reader.refresh()
+    assert reader.live_rows()[3] == [0, 1, 2, 6]
+
+
+def test_load_refuses_a_half_published_snapshot(paths, make_vectors):
+    index = filled(paths, make_vectors)
+    index.save()
+    record = json.loads(index.gen_path.read_text())
+    # The record names data the chunk store does not hold yet
+    index.gen_path.write_text(json.dumps({**record, "data_generation": record["data_generation"] + 1}))
+
+    assert not SimpleFaissIndex(*paths).load()
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from app.vectorstores.faiss_store import SegmentedFaissIndex
+
+
+@pytest.fixture
+def segmented(tmp_path, monkeypatch):
+    """``segmented(threshold)``: a meeting-style index that only compacts when told to"""
+    monkeypatch.setattr(SegmentedFaissIndex, "compact_in_background", lambda self: None)
+    return lambda threshold=4: SegmentedFaissIndex(tmp_path / "meet", compact_threshold=threshold)
+
+
+def add_meeting(index, make_vectors, meeting, chunks=1, seed=0):
+    texts = [f"{meeting} chunk {i}" for i in range(chunks)]
+    metas = [{"source": meeting, "meeting_id": meeting, "chunk": i} for i in range(chunks)]
+    index.add(make_vectors(chunks, seed=seed), texts, metas)
+
+
+def live_texts(index):
+    return sorted(index.live_rows()[1])
+
+
+def test_compaction_merges_full_size_classes_only(segmented, make_vectors):
+    index = segmented(threshold=4)
+    for i in range(15):
+        add_meeting(index, make_vectors, f"m{i}", seed=i)
+
+    assert index.compact() == 12
+    # 15 = 3 x 4 (class 1) + 3 x 1 (class 0): neither class holds 4 segments
+    assert sorted(segment.count for _, segment in index._segments) == [1, 1, 1, 4, 4, 4]
+    assert index.count == 15
+
+    add_meeting(index, make_vectors, "m15", seed=15)
+    # The fourth 1-chunk segment fills class 0, whose merge fills class 1 in turn
+    assert index.compact() == 8
+    assert [segment.count for _, segment in index._segments] == [16]
+    assert live_texts(index) == sorted(f"m{i} chunk 0" for i in range(16))
+
+
+def test_compaction_leaves_no_files_behind(segmented, make_vectors, tmp_path):
+    index = segmented(threshold=2)
+    for i in range(4):
+        add_meeting(index, make_vectors, f"m{i}", chunks=2, seed=i)
+    index.compact()
+
+    names = {name for name, _ in index._segments}
+    on_disk = {path.stem for path in (tmp_path / "meet").glob("seg-*")}
+    assert on_disk == names
+
+
+def test_writes_during_compaction_are_not_blocked_and_survive_it(segmented, make_vectors, tmp_path):
+    index = segmented(threshold=2)
+    add_meeting(index, make_vectors, "m1", chunks=2, seed=1)
+    add_meeting(index, make_vectors, "m2", chunks=2, seed=2)
+
+    started, release = threading.Event(), threading.Event()
+    build = index._merged_segment
+
+    def slow_merge(name, segments):
+        started.set()
+        assert release.wait(10)
+        return build(name, segments)
+
+    index._merged_segment = slow_merge
+    compactor = threading.Thread(target=index.compact)
+    compactor.start()
+    try:
+        assert started.wait(10)
+        # Both writes touch the segments being merged and must not wait for it
+        assert index.delete("m1") == 2
+        index.replace({"meeting_id": "m2"}, make_vectors(1, seed=3), ["m2 revised"],
+                      [{"source": "m2", "meeting_id": "m2", "chunk": 0}])
+        assert not release.is_set() and compactor.is_alive()
+    finally:
+        release.set()
+        compactor.join(10)
+
+    assert live_texts(index) == ["m2 revised"]
+    reloaded = SegmentedFaissIndex(tmp_path / "meet", compact_threshold=2)
+    assert reloaded.load()
+    assert live_texts(reloaded) == ["m2 revised"]
+    on_disk = {path.stem for path in (tmp_path / "meet").glob("seg-*")}
+    assert on_disk == {name for name, _ in reloaded._segments}
+
+
+def test_other_instances_pick_up_new_segments(segmented, make_vectors, tmp_path):
+    writer = segmented()
+    add_meeting(writer, make_vectors, "m1", chunks=3)
+    reader = SegmentedFaissIndex(tmp_path / "meet")
+    assert reader.load() and reader.count == 3
+
+    add_meeting(writer, make_vectors, "m2", chunks=2, seed=1)
+    writer.delete("m1")
+    assert reader.refresh()
+    assert live_texts(reader) == ["m2 chunk 0", "m2 chunk 1"]
@@ -0,0 +1,106 @@
+import asyncio
+import tempfile
+
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.services.uploads import InvalidUpload, UploadTooLarge, receive_upload_form
+
+BOUNDARY = b"----onedesk7f3a"
+PDF = b"%PDF-1.4\r\n------onedesk7f3 looks like a boundary but is data\r\n%%EOF"
+
+
+def form_body(pdf=PDF, title=b"Weekly sync", boundary=BOUNDARY):
+    return (
+        b"--" + boundary + b"\r\n"
+        b'Content-Disposition: form-data; name="meeting_title"\r\n\r\n' + title + b"\r\n"
+        b"--" + boundary + b"\r\n"
+        b'Content-Disposition: form-data; name="pdf_file"; filename="weekly_sync.pdf"\r\n'
+        b"Content-Type: application/pdf\r\n\r\n" + pdf + b"\r\n"
+        b"--" + boundary + b"--\r\n"
+    )
+
+
+def make_request(body, chunk_size=None, content_type=b"multipart/form-data; boundary=" + BOUNDARY,
+                 content_length=True):
+    step = chunk_size or max(len(body), 1)
+    chunks = [body[i:i + step] for i in range(0, len(body), step)] or [b""]
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+                for i, chunk in enumerate(chunks)]
+    received = []
+
+    async def receive():
+        received.append(True)
+        return messages.pop(0)
+
+    headers = [(b"content-type", content_type)]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    request = Request({"type": "http", "method": "POST", "headers": headers}, receive)
+    return request, received
+
+
+def receive(request):
+    return asyncio.run(receive_upload_form(request, "pdf_file", ".pdf"))
+
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    """Uploads spool here, so tests can check nothing is left behind"""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, len(BOUNDARY) + 1, None])
+def test_boundaries_split_across_reads(chunk_size):
+    form = receive(make_request(form_body(), chunk_size)[0])
+    assert form.path.read_bytes() == PDF
+    assert form.filename == "weekly_sync.pdf"
+    assert form.fields == {"meeting_title": "Weekly sync"}
+
+
+def test_declared_length_over_limit_is_rejected_before_reading(monkeypatch, spool_dir):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    request, received = make_request(form_body(pdf=b"x" * (2 * 1024 * 1024)))
+    with pytest.raises(UploadTooLarge):
+        receive(request)
+    assert not received
+    assert not list(spool_dir.iterdir())
+
+
+def test_undeclared_body_is_cut_off_at_the_limit(monkeypatch, spool_dir):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    request, _ = make_request(form_body(pdf=b"x" * (2 * 1024 * 1024)), chunk_size=64 * 1024,
+                              content_length=False)
+    with pytest.raises(UploadTooLarge):
+        receive(request)
+    assert not list(spool_dir.iterdir())
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (form_body(), b"application/pdf"),
+    (form_body(), b"multipart/form-data"),
+    (b"not a multipart body", b"multipart/form-data; boundary=" + BOUNDARY),
+    (form_body()[:-40], b"multipart/form-data; boundary=" + BOUNDARY),
+    (b"", b"multipart/form-data; boundary=" + BOUNDARY),
+    (form_body(boundary=b"other"), b"multipart/form-data; boundary=" + BOUNDARY),
+], ids=["not-multipart", "no-boundary", "garbage", "truncated", "empty", "wrong-boundary"])
+def test_malformed_forms_are_invalid_uploads(body, content_type, spool_dir):
+    with pytest.raises(InvalidUpload):
+        receive(make_request(body, chunk_size=16, content_type=content_type)[0])
+    assert not list(spool_dir.iterdir())
+
+
+def test_missing_file_field_is_an_invalid_upload():
+    body = (b"--" + BOUNDARY + b"\r\n"
+            b'Content-Disposition: form-data; name="meeting_title"\r\n\r\nWeekly\r\n'
+            b"--" + BOUNDARY + b"--\r\n")
+    with pytest.raises(InvalidUpload, match="pdf_file"):
+        receive(make_request(body)[0])
+
+
+def test_oversized_text_field_is_an_invalid_upload(spool_dir):
+    with pytest.raises(InvalidUpload, match="meeting_title"):
+        receive(make_request(form_body(title=b"t" * (128 * 1024)), chunk_size=8 * 1024)[0])
+    assert not list(spool_dir.iterdir())